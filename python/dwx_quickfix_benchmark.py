@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+    dwx_quickfix_benchmark.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    Measures the cost per message of the field extraction in parse_MassQuote() and
+    parse_ExecutionReport(): extract_message_field_value() (before) against the
+    field_extractor tables of the application (after), and of the timestamp parsing:
+    str_to_datetime() (before) against fix_time_to_ns() (after).
+    the results of both are compared before timing.
+
+    the MassQuote fast path (fast_mass_quote=True) is checked differentially: random
+    MassQuotes are applied with parse_MassQuote() and parse_MassQuote_fast() to two
+    applications, whose order books and tick stores must be identical afterwards.
+
+    usage: python dwx_quickfix_benchmark.py [number of messages]
+"""
+
+import sys
+import random
+from timeit import timeit
+from time import perf_counter
+
+import numpy as np
+import quickfix as fix
+import quickfix44 as fix44
+
+from dwxquickfix.helpers import extract_message_field_value, str_to_datetime, datetime_to_ns, fix_time_to_ns
+from dwxquickfix.application import application, MASS_QUOTE_FIELDS, EXECUTION_REPORT_FIELDS
+from dwxquickfix.replay import simulated_sender
+
+
+DATA_DICTIONARY = 'specs/FIX44-1.7_mod.xml'
+
+MASS_QUOTE = ('35=i|34=327|49=XC116|52=20171208-12:43:57.593|56=Q024|117=14|296=2|'
+              '302=0|295=1|299=0|134=501000|135=251000|188=1.17425|190=1.17429|'
+              '302=2|295=1|299=0|134=2251000|135=501000|188=1.34401|190=1.34409|')
+
+EXECUTION_REPORT = ('35=8|34=15|49=XCD17|52=20200817-07:29:25.121|56=T008|6=1.18561|11=0|14=1000|'
+                    '15=EUR|17=923228_0_0|31=1.18561|32=1000|37=923228|38=1000|39=2|40=1|44=1.18561|'
+                    '54=2|55=EUR/USD|60=20200817-07:29:25.120|64=20200819|110=0|150=F|151=0|')
+
+
+"""
+# FIX message with BodyLength and CheckSum from fields separated by '|'
+"""
+def build_message(fields, data_dictionary):
+
+    body = fields.replace('|', '\x01')
+    raw = f'8=FIX.4.4\x019={len(body)}\x01{body}'
+    raw += f'10={sum(raw.encode()) % 256:03d}\x01'
+    return fix.Message(raw, data_dictionary, False)
+
+##########################################################################
+
+# field extraction as it was done before field_extractor
+
+def legacy_MassQuote(message):
+
+    quotes = []
+    num_sets = extract_message_field_value(fix.NoQuoteSets(), message, 'int')
+    for i in range(num_sets):
+        NoQuoteSets_Group = fix44.MassQuote.NoQuoteSets()
+        message.getGroup(i+1, NoQuoteSets_Group)
+        reqid = extract_message_field_value(fix.QuoteSetID(), NoQuoteSets_Group)
+        NoQuoteEntries_Group = fix44.MassQuote.NoQuoteSets.NoQuoteEntries()
+        NoQuoteSets_Group.getGroup(1, NoQuoteEntries_Group)
+        quotes.append((reqid,
+                       extract_message_field_value(fix.QuoteEntryID(), NoQuoteEntries_Group, 'int'),
+                       extract_message_field_value(fix.BidSpotRate(), NoQuoteEntries_Group, 'float'),
+                       extract_message_field_value(fix.OfferSpotRate(), NoQuoteEntries_Group, 'float'),
+                       extract_message_field_value(fix.BidSize(), NoQuoteEntries_Group, 'int'),
+                       extract_message_field_value(fix.OfferSize(), NoQuoteEntries_Group, 'int')))
+    return quotes, message.isSetField(fix.QuoteID())
+
+
+def legacy_ExecutionReport(message):
+
+    transactTime = fix.TransactTime()
+    message.getField(transactTime)
+    return (extract_message_field_value(fix.ClOrdID(), message, 'int'),
+            extract_message_field_value(fix.OrdStatus(), message, 'str'),
+            extract_message_field_value(fix.ExecType(), message),
+            extract_message_field_value(fix.OrdType(), message, 'str'),
+            extract_message_field_value(fix.Price(), message, 'float'),
+            extract_message_field_value(fix.Side(), message, 'str'),
+            extract_message_field_value(fix.Symbol(), message, 'str'),
+            datetime_to_ns(str_to_datetime(transactTime.getString())),
+            extract_message_field_value(fix.OrderQty(), message, 'int'),
+            extract_message_field_value(fix.MinQty(), message, 'int'),
+            extract_message_field_value(fix.CumQty(), message, 'int'),
+            extract_message_field_value(fix.LeavesQty(), message, 'int'))
+
+##########################################################################
+
+# field extraction as it is done now
+
+def new_MassQuote(message):
+
+    fields, quote_sets = MASS_QUOTE_FIELDS.extract_groups(message)
+    quotes = [(quote_set['QuoteSetID'], quote_set['QuoteEntryID'],
+               quote_set['BidSpotRate'], quote_set['OfferSpotRate'],
+               quote_set['BidSize'], quote_set['OfferSize']) for quote_set in quote_sets]
+    return quotes, fields['QuoteID'] is not None
+
+
+def new_ExecutionReport(message):
+
+    fields = EXECUTION_REPORT_FIELDS.extract(message)
+    return (fields['ClOrdID'], fields['OrdStatus'], fields['ExecType'], fields['OrdType'],
+            fields['Price'], fields['Side'], fields['Symbol'], fields['TransactTime'],
+            fields['OrderQty'], fields['MinQty'], fields['CumQty'], fields['LeavesQty'])
+
+##########################################################################
+
+def benchmark(name, message, before, after, number):
+
+    if before(message) != after(message):
+        print(f'[ERROR] {name}: different values')
+        print(f'  before: {before(message)}')
+        print(f'  after:  {after(message)}')
+        return
+
+    time_before = timeit(lambda: before(message), number=number) / number * 1e6
+    time_after = timeit(lambda: after(message), number=number) / number * 1e6
+    print(f'{name:<20} before: {time_before:8.2f} us   after: {time_after:8.2f} us   '
+          f'speedup: {time_before / time_after:5.1f}x')
+
+
+##########################################################################
+
+class no_op_processor():
+
+    def on_tick(self, symbol, app):
+        pass
+
+    def on_execution_report(self, report, app):
+        pass
+
+
+"""
+# random MassQuote with one quote set per symbol (some without bid or ask, some only with sizes)
+"""
+def random_MassQuote(symbols, data_dictionary):
+
+    fields = '35=i|34=1|49=XC116|52=20171208-12:43:57.593|56=Q024|'
+    quote_sets = random.sample(range(len(symbols)), random.randint(1, len(symbols)))
+    fields += f'296={len(quote_sets)}|'
+    for reqid in quote_sets:
+        fields += f'302={reqid}|295=1|299={random.randint(0, 4)}|'
+        fields += f'134={random.randint(1, 50) * 100000}|135={random.randint(1, 50) * 100000}|'
+        price = 1.1 + random.randint(0, 1000) * 1e-5
+        kind = random.random()
+        if kind < 0.8 or kind >= 0.9:
+            fields += f'188={price:.5f}|'
+        if kind < 0.9:
+            fields += f'190={price + random.randint(1, 20) * 1e-5:.5f}|'
+    return build_message(fields, data_dictionary)
+
+
+def mass_quote_app(symbols, fast):
+
+    app = application(None, no_op_processor(), store_all_ticks='array', save_history_to_files=False,
+                      verbose=False, message_log_file='', execution_history_file='', fast_mass_quote=fast)
+    app.sender = simulated_sender(app)
+    for symbol in symbols:
+        app.check_new_symbol(symbol)
+    return app
+
+
+"""
+# apply the same MassQuotes with both paths and compare the histories
+"""
+def verify_MassQuote_fast(data_dictionary, number):
+
+    symbols = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'XAU/USD', 'AUD/USD']
+    messages = [random_MassQuote(symbols, data_dictionary) for _ in range(number)]
+    sending_times = [1512737037593000000 + i * 1000000 for i in range(number)]
+
+    app, fast_app = mass_quote_app(symbols, False), mass_quote_app(symbols, True)
+
+    start = perf_counter()
+    for message, sending_time in zip(messages, sending_times):
+        app.parse_MassQuote(message, sending_time)
+    time_before = (perf_counter() - start) / number * 1e6
+
+    start = perf_counter()
+    for message, sending_time in zip(messages, sending_times):
+        fast_app.parse_MassQuote_fast(message, sending_time)
+    time_after = (perf_counter() - start) / number * 1e6
+
+    for symbol in symbols:
+        history, fast_history = app.history_dict[symbol], fast_app.history_dict[symbol]
+        for name in ('bid_price', 'ask_price', 'bid_size', 'ask_size'):
+            if not np.array_equal(getattr(history.book, name), getattr(fast_history.book, name), equal_nan=True):
+                print(f'[ERROR] MassQuote fast path: {symbol} book.{name} differs')
+                return
+        for store, fast_store in ((history.HISTORY, fast_history.HISTORY), 
+                                  (history.HISTORY_TOB, fast_history.HISTORY_TOB)):
+            for name, column in store.columns().items():
+                if not np.array_equal(column, fast_store.columns()[name], equal_nan=True):
+                    print(f'[ERROR] MassQuote fast path: {symbol} tick store column {name} differs')
+                    return
+
+    print(f'{"MassQuote parse":<20} before: {time_before:8.2f} us   after: {time_after:8.2f} us   '
+          f'speedup: {time_before / time_after:5.1f}x   (fast path identical on {number} messages)')
+
+##########################################################################
+
+if __name__ == '__main__':
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data_dictionary = fix.DataDictionary(DATA_DICTIONARY)
+
+    benchmark('MassQuote', build_message(MASS_QUOTE, data_dictionary),
+              legacy_MassQuote, new_MassQuote, number)
+    benchmark('ExecutionReport', build_message(EXECUTION_REPORT, data_dictionary),
+              legacy_ExecutionReport, new_ExecutionReport, number)
+    benchmark('SendingTime', '20200817-07:29:25.121',
+              lambda time_str: datetime_to_ns(str_to_datetime(time_str)), fix_time_to_ns, number)
+    verify_MassQuote_fast(data_dictionary, min(number, 20000))
@@ -40,10 +40,20 @@ class tick_processor():
 
         self.client = client(self, config_file='config/client_sample.conf', 
                              read_positions_from_file=False,     # to load positions after restart
-                             store_all_ticks=True,               # to store all incoming ticks
+                             store_all_ticks=True,               # to store all incoming ticks ('array' for a bounded NumPy store)
                              save_history_to_files=True,         # to save the price history to file
+                             history_file_format='csv',          # 'binary' for compact files, see dwxquickfix/tick_file.py
+                             rotate_history_files=False,         # one (compressed) history file per session day, see dwxquickfix/history_archive.py
+                             async_persistence=False,            # to write the history, logs and positions from a background thread
                              verbose=False,                       # to control the print output
+                             conflate_ticks=False,               # to skip intermediate ticks if on_tick() is slower than the feed
+                             dispatch_workers=0,                 # e.g. 1 to call on_tick()/on_execution_report() from worker threads instead of the QuickFIX thread
+                             dispatch_shards=None,               # e.g. 4 for parallel on_tick() calls, with a worker and lock per group of symbols
+                             rolling_stats_window=None,          # e.g. 60 (seconds) for EWMA mid/spread, volatility and tick rate in history.stats
                              message_log_file = 'messages.log',  # if the file names are set to an empty string, the specific logger will be disabled. 
+                             message_log_sampling=None,          # e.g. {'i': 100} to log only 1 in 100 MassQuotes (35=i)
+                             journal_file='',                    # e.g. 'messages.journal' to record all raw FIX messages for replay.journal_replay
+                             fast_mass_quote=False,              # parse MassQuotes from the raw message (see dwx_quickfix_benchmark.py)
                              execution_history_file='execution_history.log')
 
         self.trade_done = False
@@ -55,9 +65,9 @@ class tick_processor():
         # live:
         # symbols = ['EURUSD', 'GBPUSD', 'USDJPY']
 
-        for symbol in symbols:
-            self.client.app.sender.send_MarketDataRequest(symbol)
-            sleep(1)
+        # depth: 0 = full book, 1 = top of book, N = N levels. the subscriptions are restored after a reconnect. 
+        # to unsubscribe: self.client.app.subscriptions.unsubscribe('EUR/USD')
+        self.client.app.subscriptions.subscribe(symbols, depth=0)
 
     """
     # override this method with your own logic. 
@@ -71,14 +81,21 @@ class tick_processor():
         # access current bid/ask prices and order book sizes. 
         # print('prices:', app.history_dict[symbol].BID, app.history_dict[symbol].ASK, 
         #       ' | sizes:', app.history_dict[symbol].BID_SIZE, app.history_dict[symbol].ASK_SIZE)
+
+        # order book queries on the price/size arrays:
+        # book = app.history_dict[symbol].book
+        # print('spread:', book.spread(), '| imbalance:', book.imbalance(levels=3), '| vwap to buy 1M:', book.vwap('ask', 1000000))
         
         # access tick history (use HISTORY_TOB for top-of-book history):
         # print('Symbol ticks received:', len(app.history_dict[symbol].HISTORY))
 
         # to generate candle data for a specific time frame:
         # print(app.history_dict[symbol].resampled_history('bid', '5min'))
+        # or, with bar_time_frames=('1m', '5m') passed to the client, without rebuilding them:
+        # print(app.history_dict[symbol].current_bar('5m'))
 
         # # open order can also be accessed through a dictionary app.open_orders. 
+        # # indexed queries, e.g. all open buy limits: app.open_orders.query(symbol=symbol, order_type='buy_limit')
         print(symbol, 'open orders:', app.num_orders(symbol))
 
         # net positions can be accessed through a dictionary app.open_net_positions. 
@@ -106,18 +123,27 @@ class tick_processor():
             # app.sender.send_NewOrderSingle(_order)
 
 
+    """
+    # optional. it is executed when a bar is closed (requires bar_time_frames). 
+    """
+    # def on_bar(self, symbol, time_frame, bar, app):
+    #     print(symbol, time_frame, bar)
+
     """
     # override this method with your own logic. 
     # it is executed on receiving a new execution report. 
     """
     def on_execution_report(self, report, app):
-        # you can also access all historic execution reports through the list app.execution_history. 
+        # you can also access the recent execution reports through app.execution_history (app.execution_history[-1] is the last one). 
+        # aggregates without looping over the reports, e.g. app.execution_history.average_fill_price() or .fill_rate()
         print('\nExecution Report:')
         print(report)
 
+        # the orders are changed on the QuickFIX thread. with dispatch_workers or dispatch_shards, 
+        # this runs on another thread, so iterate over a snapshot (or hold app.open_orders.lock). 
         print('Open orders:')
-        for key in app.open_orders.keys():
-            print(key, '|', app.open_orders[key])
+        for key, open_order in app.open_orders.snapshot().items():
+            print(key, '|', open_order)
         
 
 ##############################################################################
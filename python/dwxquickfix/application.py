@@ -7,19 +7,77 @@
     
 """
 
+import os
+import re
 import json
 import logging
-import datetime
+from time import time_ns, perf_counter
 from threading import Lock
 import quickfix as fix
-import quickfix44 as fix44
     
-from dwxquickfix.helpers import log, setup_logger, read_FIX_message, extract_message_field_value, datetime_to_str
+from dwxquickfix.helpers import log, setup_logger, read_FIX_message, extract_message_field_value, fix_time_to_ns, ns_to_str
 
 from dwxquickfix.order import order
 from dwxquickfix.sender import sender
 from dwxquickfix.history import history
 from dwxquickfix.execution_report import execution_report
+from dwxquickfix.async_writer import async_writer
+from dwxquickfix.history_archive import history_catalog
+from dwxquickfix.dispatcher import sync_dispatcher, conflating_dispatcher, queued_dispatcher, sharded_dispatcher
+from dwxquickfix.field_extractor import field_extractor, to_int, to_float
+from dwxquickfix.message_logger import message_logger
+from dwxquickfix.fix_journal import fix_journal, FROM_APP, FROM_ADMIN, TO_APP, TO_ADMIN
+from dwxquickfix.subscriptions import subscription_manager
+from dwxquickfix.position_store import position_store
+from dwxquickfix.order_store import order_store
+from dwxquickfix.symbol_registry import symbol_registry
+from dwxquickfix.execution_store import execution_store
+
+
+# fields read from the incoming messages, format: tag: (name, type). see field_extractor.py
+MASS_QUOTE_FIELDS = field_extractor({117: ('QuoteID', ''), 
+                                     302: ('QuoteSetID', ''), 
+                                     299: ('QuoteEntryID', 'int'), 
+                                     188: ('BidSpotRate', 'float'), 
+                                     190: ('OfferSpotRate', 'float'), 
+                                     134: ('BidSize', 'int'), 
+                                     135: ('OfferSize', 'int')}, group_tag=302)
+
+SNAPSHOT_FIELDS = field_extractor({55: ('Symbol', ''), 
+                                   269: ('MDEntryType', 'str'), 
+                                   270: ('MDEntryPx', 'float'), 
+                                   271: ('MDEntrySize', 'float'), 
+                                   299: ('QuoteEntryID', 'int')}, group_tag=269)
+
+# every MDEntry starts with MDUpdateAction (279). Symbol (55) can be set per entry. 
+INCREMENTAL_FIELDS = field_extractor({262: ('MDReqID', ''), 
+                                      279: ('MDUpdateAction', 'str'), 
+                                      269: ('MDEntryType', 'str'), 
+                                      55: ('Symbol', ''), 
+                                      270: ('MDEntryPx', 'float'), 
+                                      271: ('MDEntrySize', 'float'), 
+                                      299: ('QuoteEntryID', 'int')}, group_tag=279)
+
+EXECUTION_REPORT_FIELDS = field_extractor({11: ('ClOrdID', 'int'), 
+                                           39: ('OrdStatus', 'str'), 
+                                           150: ('ExecType', ''), 
+                                           40: ('OrdType', 'str'), 
+                                           44: ('Price', 'float'), 
+                                           54: ('Side', 'str'), 
+                                           55: ('Symbol', 'str'), 
+                                           60: ('TransactTime', 'ns'), 
+                                           38: ('OrderQty', 'int'), 
+                                           110: ('MinQty', 'int'), 
+                                           14: ('CumQty', 'int'), 
+                                           151: ('LeavesQty', 'int'), 
+                                           6: ('AvgPx', 'float')})
+
+# parse_MassQuote_fast(): the fields that are used, found in one regex scan of the raw message, 
+# and the position of the QuoteEntry fields in an update and their types. 
+_MASS_QUOTE_FIELD = re.compile('\x01(117|302|299|188|190|134|135)=([^\x01]*)')
+# update format: [history, QuoteEntryID (299), BidSpotRate (188), OfferSpotRate (190), BidSize (134), OfferSize (135)]
+_QUOTE_ENTRY_SLOTS = {'299': 1, '188': 2, '190': 3, '134': 4, '135': 5}
+_QUOTE_ENTRY_TYPES = (None, to_int, to_float, to_float, to_int, to_int)
 
 
 class application(fix.Application):
@@ -32,12 +90,51 @@ class application(fix.Application):
                  message_log_file='messages.log',
                  execution_history_file='execution_history.log', 
                  client_str='[CLIENT (FIX API v4.4)] ',
-                 server_str='[SERVER (FIX API v4.4)] '):
+                 server_str='[SERVER (FIX API v4.4)] ',
+                 tick_store_capacity=100000,  # only used with store_all_ticks='array'
+                 tick_store_window=None,
+                 bar_time_frames=None,  # e.g. ('1s', '1m', '5m') to build bars and call tick_processor.on_bar()
+                 max_bars=1000,
+                 history_file_format='csv',  # 'csv' or 'binary' (see tick_file.py)
+                 async_persistence=False,  # to write all files from a background thread
+                 persistence_queue_size=100000,
+                 persistence_full_policy='block',  # 'block' or 'drop' if the queue is full
+                 book_depth=10,  # order book levels preallocated per symbol
+                 rotate_history_files=False,  # one history file per session day (rolled over at EndTime)
+                 compress_history_files=True,  # gzip the closed daily history files
+                 conflate_ticks=False,  # call the tick_processor from a separate thread, coalescing pending tick updates
+                 rolling_stats_window=None,  # seconds, to keep rolling statistics in history.stats
+                 rolling_stats_alpha=0.05,
+                 message_log_sampling=None,  # e.g. {'i': 100} to log only 1 in 100 MassQuotes
+                 journal_file='',  # binary journal of all raw FIX messages, e.g. 'messages.journal'
+                 fast_mass_quote=False,  # parse MassQuotes with parse_MassQuote_fast()
+                 dispatch_workers=0,  # 1 to call the tick_processor from a worker thread (more give no parallelism, see dispatcher.py)
+                 dispatch_shards=None,  # e.g. 4 or [['EUR/USD', 'GBP/USD'], ['USD/JPY']] for a worker and lock per group of symbols
+                 dispatch_queue_size=100000,
+                 dispatch_full_policy='drop',  # 'drop' or 'block' tick events if the queue is full ('block' can stall the heartbeats)
+                 position_snapshot_interval=1000,  # position log records between two snapshots (see position_store.py)
+                 execution_history_capacity=100000):  # execution reports kept in execution_history
         
         super().__init__()
         self.store_all_ticks = store_all_ticks
+        self.tick_store_capacity = tick_store_capacity
+        self.tick_store_window = tick_store_window
+        self.bar_time_frames = bar_time_frames
+        self.max_bars = max_bars
+        self.history_file_format = history_file_format
+        self.book_depth = book_depth
+        self.compress_history_files = compress_history_files
+        self.rolling_stats_window = rolling_stats_window
+        self.rolling_stats_alpha = rolling_stats_alpha
+
+        self.history_rollover = None
+        self.history_catalog = None
+        if rotate_history_files:
+            self.history_rollover = self._session_end_time()
+            self.history_catalog = history_catalog('history')
         self.save_history_to_files = save_history_to_files
         self.verbose = verbose
+        # files of earlier versions, only read by load_positions_from_file() if there is no position_store yet
         self._position_file = 'positions.json'
         self._order_file = 'orders.json'
         self.execution_history_file = execution_history_file
@@ -47,46 +144,118 @@ class application(fix.Application):
         self.settings = settings
         self.tick_processor = tick_processor
         self.lock = Lock()
+        if sum((bool(conflate_ticks), dispatch_workers > 0, dispatch_shards is not None)) > 1:
+            raise ValueError('conflate_ticks, dispatch_workers and dispatch_shards cannot be combined.')
+        if dispatch_shards is not None:
+            self.dispatcher = sharded_dispatcher(self, dispatch_shards, dispatch_queue_size, dispatch_full_policy)
+        elif dispatch_workers > 0:
+            self.dispatcher = queued_dispatcher(self, dispatch_workers, dispatch_queue_size, dispatch_full_policy)
+        elif conflate_ticks:
+            self.dispatcher = conflating_dispatcher(self)
+        else:
+            self.dispatcher = sync_dispatcher(self)
         self.sender = sender(self)  # passing self here so that we can call app functions from there. 
 
+        self.writer = None
+        if async_persistence:
+            self.writer = async_writer(persistence_queue_size, persistence_full_policy)
+
+        # the message_logger hands the messages to the writer itself. 
         self.logger = None
         if len(message_log_file) > 0:
             self.logger = setup_logger('message_logger', message_log_file, 
                                        '%(asctime)s %(levelname)s %(message)s', 
                                        level=logging.INFO)
+        self.message_log = message_logger(self.logger, verbose, message_log_sampling, self.writer)
+
+        # see fix_journal.py and replay.journal_replay
+        self.journal = None
+        if len(journal_file) > 0:
+            self.journal = fix_journal(journal_file, self.writer)
         
         self.execution_logger = None
         if len(execution_history_file) > 0:
             self.execution_logger = setup_logger('execution_logger', 
                                                  execution_history_file, 
                                                  '%(message)s', 
-                                                 level=logging.INFO)
+                                                 level=logging.INFO, 
+                                                 writer=self.writer)
             log(self.execution_logger, 'transactTime,ClOrdID,Symbol,Side,Price,OrdType,OrdStatus,OrderQty,MinQty,CumQty,LeavesQty')
         
         self._client_str = client_str
         self._server_str = server_str
         
-        # Unique identifier for Market Data Request <V>
-        self._id_to_symbol = {}  # format: '0': 'EURUSD'
+        # message handlers by MsgType, see register_handler()
+        self._app_handlers = {fix.MsgType_MassQuote: self.parse_MassQuote, 
+                              fix.MsgType_MarketDataSnapshotFullRefresh: self.parse_MarketDataSnapshotFullRefresh, 
+                              fix.MsgType_MarketDataIncrementalRefresh: self.parse_MarketDataIncrementalRefresh, 
+                              fix.MsgType_ExecutionReport: self.parse_ExecutionReport, 
+                              fix.MsgType_OrderCancelReject: self.parse_OrderCancelReject, 
+                              fix.MsgType_MarketDataRequestReject: self.parse_MarketDataRequestReject}
+        self._admin_handlers = {fix.MsgType_Heartbeat: self.on_Heartbeat, 
+                                fix.MsgType_Logon: self.on_Logon, 
+                                fix.MsgType_Logout: self.on_Logout}
+        self._handler_stats = {}  # format: 'i': [count, total seconds, max seconds]
+        self._unhandled = {}      # format: 'B': count of messages without a handler
+        if fast_mass_quote:
+            self.register_handler(fix.MsgType_MassQuote, self.parse_MassQuote_fast)
+
+        # integer ids of the symbols and their MDReqIDs (unique identifier for Market Data Request <V>). 
+        # see symbol_registry.py
+        self.symbols = symbol_registry()
+        # active MarketDataRequests, sent again on logon. see subscriptions.py
+        self.subscriptions = subscription_manager(self)
 
         # Dictionary to hold Asset Histories
         self.history_dict = {}  # format: 'EURUSD': History
 
         # Dictionary to hold open orders
-        self.open_orders = {}  # format: ClOrdID: Order
+        # indexed by symbol, side, type and status (see order_store.py)
+        self.open_orders = order_store()  # format: ClOrdID: Order
         
         self.open_net_positions = {}     # format: 'EURUSD': 0.0
         self.canceled_net_quantity = {}  # format: 'EURUSD': 0.0
 
-        self.execution_history = []
+        # bounded, columnar store of the execution reports (see execution_store.py)
+        self.execution_history = execution_store(self.symbols, execution_history_capacity)
 
         self.read_positions_from_file = read_positions_from_file
         
+        # log and snapshots of the open orders and positions
+        self.position_store = None
         if self.read_positions_from_file:
+            self.position_store = position_store('positions', self.writer, position_snapshot_interval)
             self.load_positions_from_file()
     
     ##########################################################################
 
+    """
+    # flush and close all files. called by client.stop(). 
+    """
+    def stop(self):
+        self.dispatcher.stop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.position_store is not None:
+            self.save_positions_to_file()
+            self.position_store.close()
+        # write everything that is still queued before closing the files. 
+        if self.writer is not None:
+            self.writer.stop()
+        for symbol in self.history_dict:
+            self.history_dict[symbol].close()
+
+    """
+    # EndTime of the sessions in the config (UTC), used as the rollover time of the history files. 
+    """
+    def _session_end_time(self):
+        try:
+            return self.settings.get().getString('EndTime')
+        except Exception:
+            return '00:00:00'
+
+    ##########################################################################
+
     # QuickFIX Application Methods.
 
     def onCreate(self, sessionID):
@@ -100,41 +269,51 @@ class application(fix.Application):
             self.sender.set_sessionID_Trade(sessionID)
             self.sender.set_account(self.settings.get(sessionID).getString('Account'))
 
-        log(self.logger, f'Session created with sessionID = {sessionID.toString()}.')
+        if self.journal is not None:
+            self.journal.add_session(sessionID, self.settings.get(sessionID).getString('SessionQualifier'))
+
+        self.message_log.event(f'Session created with sessionID = {sessionID.toString()}.')
 
 
     def onLogon(self, sessionID):
         
         self.connected = True
-        log(self.logger, 'Logon.')
+        self.message_log.event('Logon.')
         print(self._client_str + ' ' + sessionID.toString() + ' | Login Successful')
 
+        if self._is_quote_session(sessionID):
+            self.subscriptions.on_logon()
+
 
     def onLogout(self, sessionID):
         
         self.connected = False
-        log(self.logger, 'Logout.')
+        self.message_log.event('Logout.')
         print(self._client_str + ' ' + sessionID.toString() + ' | Logout Successful')
 
+        if self._is_quote_session(sessionID):
+            self.subscriptions.on_logout()
+
+    def _is_quote_session(self, sessionID):
+        return (self.sender.sessionID_Quote is not None 
+                and sessionID.toString() == self.sender.sessionID_Quote.toString())
+
 
     def onMessage(self, message, sessionID):
         
-        if self.verbose:
-            print('[onMessage] {}'.format(read_FIX_message(message)))
-        
-        log(self.logger, f'Message = {read_FIX_message(message)}.')
+        self.message_log.message('onMessage', message, sessionID)
 
 
     def toAdmin(self, message, sessionID):
         
-        if self.verbose:
-            print(f'[toAdmin] {sessionID} | {read_FIX_message(message)}')
-        
-        log(self.logger, f'[toAdmin] {sessionID} | {read_FIX_message(message)}')
-        
         msgType = fix.MsgType()
         message.getHeader().getField(msgType)
 
+        # logged before the credentials are set. 
+        self.message_log.message('toAdmin', message, sessionID, msgType.getValue())
+        if self.journal is not None:
+            self.journal.record(TO_ADMIN, message, sessionID)
+
         base_str = self._client_str + ' ' + sessionID.toString() + ' | '
         
         if msgType.getValue() == fix.MsgType_Logon:
@@ -162,102 +341,117 @@ class application(fix.Application):
     
     def toApp(self, message, sessionID):
         
-        if self.verbose:
-            print(f'[toApp] {sessionID} | {read_FIX_message(message)}')
-        
-        log(self.logger, f'[toApp] {sessionID} | {read_FIX_message(message)}')
+        self.message_log.message('toApp', message, sessionID)
+        if self.journal is not None:
+            self.journal.record(TO_APP, message, sessionID)
     
 
     def fromAdmin(self, message, sessionID):
 
-        if self.verbose:
-            print(f'[fromAdmin] {sessionID} | {read_FIX_message(message)}')
-        
-        log(self.logger, f'[fromAdmin] {sessionID} | {read_FIX_message(message)}')
-        
-        msgType = fix.MsgType()
-        message.getHeader().getField(msgType)
+        msgType = message.getHeader().getField(35)
 
-        base_str = self._server_str + ' ' + sessionID.toString() + ' | '
-        
-        if msgType.getValue() == fix.MsgType_Heartbeat:
-            
+        self.message_log.message('fromAdmin', message, sessionID, msgType)
+        if self.journal is not None:
+            self.journal.record(FROM_ADMIN, message, sessionID)
+
+        handler = self._admin_handlers.get(msgType)
+        if handler is None:
+            self._unhandled[msgType] = self._unhandled.get(msgType, 0) + 1
             if self.verbose:
-                print(base_str + 'Heartbeat, right back at ya!')
-            
-        elif msgType.getValue() == fix.MsgType_Logon:
-            
-            print(base_str + 'Hello there, good to have you back!')
-            
-        elif msgType.getValue() == fix.MsgType_Logout:
-            
-            print(base_str + 'Logout. See you later!')
-            
-        elif self.verbose:
-            print(f'[fromAdmin] {sessionID} | {read_FIX_message(message)}')
-            
-            if msgType.getValue() != fix.MsgType_SequenceReset:
-                print('unknown message type: ', msgType)
-                # exit()
+                print(f'[fromAdmin] {sessionID} | {read_FIX_message(message)}')
+                if msgType != fix.MsgType_SequenceReset:
+                    print('unknown message type: ', msgType)
+            return
+
+        start = perf_counter()
+        handler(message, sessionID)
+        self._record_handler_time(msgType, perf_counter() - start)
 
 
     def fromApp(self, message, sessionID):
 
-        if self.verbose:
-            print(f'[fromApp] {sessionID} | {read_FIX_message(message)}')
-        
-        log(self.logger, f'[fromApp] {sessionID} | {read_FIX_message(message)}')
-        
         # Get incoming message Type
-        msgType = fix.MsgType()
-        message.getHeader().getField(msgType)
-        msgType = msgType.getValue()
-        
-        # Get timestamp (tag 52)
-        sending_time = extract_message_field_value(fix.SendingTime(), message, 'datetime')
-        # print('sending_time:', sending_time)
+        msgType = message.getHeader().getField(35)
 
-        ########## Quote messages ##########
-        
-        if msgType == fix.MsgType_MassQuote:
-            
-            self.parse_MassQuote(message, sending_time)
-        
-        elif msgType == fix.MsgType_MarketDataSnapshotFullRefresh:
-            
-            self.parse_MarketDataSnapshotFullRefresh(message, sending_time)
+        self.message_log.message('fromApp', message, sessionID, msgType)
+        if self.journal is not None:
+            self.journal.record(FROM_APP, message, sessionID)
         
-        # 3) Process MarketDataSnapshot_IncrementalRefresh message
-        elif msgType == fix.MsgType_MarketDataIncrementalRefresh:
-            
-            print(self._server_str + ' {MD} INCREMENTAL REFRESH!')
+        handler = self._app_handlers.get(msgType)
+        if handler is None:
+            self._unhandled[msgType] = self._unhandled.get(msgType, 0) + 1
+            if self.verbose:
+                print(f'[fromApp] {sessionID} | {read_FIX_message(message)}')
+                print('unknown message type: ', msgType)
+            return
+
+        start = perf_counter()
+        # Get timestamp (tag 52) in epoch nanoseconds
+        sending_time = fix_time_to_ns(message.getHeader().getField(52))
+        handler(message, sending_time)
+        self._record_handler_time(msgType, perf_counter() - start)
         
-        ########## Trade messages ##########
+    ##########################################################################
 
-        elif msgType == fix.MsgType_ExecutionReport:
+    # message routing
+    """
+    # handle the messages of a MsgType with handler instead of the built-in parse method, 
+    # e.g. app.register_handler(fix.MsgType_News, my_news_handler). 
+    # application messages: handler(message, sending_time), sending_time in epoch ns. 
+    # admin messages (admin=True): handler(message, sessionID). 
+    # handler=None removes the handler. returns the previous handler (or None). 
+    """
+    def register_handler(self, msgType, handler, admin=False):
 
-            self.parse_ExecutionReport(message, sending_time)
+        handlers = self._admin_handlers if admin else self._app_handlers
+        previous = handlers.pop(msgType, None)
+        if handler is not None:
+            handlers[msgType] = handler
+        return previous
 
-        elif msgType == fix.MsgType_OrderCancelReject:
-            
-            # An OrderCancelReject will be sent as an answer to an  OrderCancelRequest, which cannot be executed. 
-            # Not much to do here as our order dict would stay the same. 
-            # If it was canceled successfully, we should get an execution report. 
+    def _record_handler_time(self, msgType, seconds):
 
-            ClOrdID = extract_message_field_value(fix.ClOrdID(), message, 'int')
+        stats = self._handler_stats.get(msgType)
+        if stats is None:
+            stats = self._handler_stats[msgType] = [0, 0., 0.]  # count, total seconds, max seconds
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+
+    """
+    # statistics of the message handlers (per MsgType), the messages without a handler 
+    # and of the dispatcher, writer and message log
+    """
+    def stats(self):
+
+        handlers = {}
+        for msgType, (count, total, maximum) in self._handler_stats.items():
+            handlers[msgType] = {'count': count, 
+                                 'total_seconds': total, 
+                                 'mean_seconds': total / count if count > 0 else 0., 
+                                 'max_seconds': maximum}
+
+        return {'handlers': handlers, 
+                'unhandled': dict(self._unhandled), 
+                'dispatcher': self.dispatcher.stats(), 
+                'writer': self.writer.stats() if self.writer is not None else {}, 
+                'message_log': self.message_log.stats()}
+
+    ##########################################################################
+
+    # admin message handlers
+
+    def on_Heartbeat(self, message, sessionID):
+        if self.verbose:
+            print(self._server_str + ' ' + sessionID.toString() + ' | Heartbeat, right back at ya!')
+
+    def on_Logon(self, message, sessionID):
+        print(self._server_str + ' ' + sessionID.toString() + ' | Hello there, good to have you back!')
+
+    def on_Logout(self, message, sessionID):
+        print(self._server_str + ' ' + sessionID.toString() + ' | Logout. See you later!')
 
-            print(f'[fromApp] Order Cancel Request Rejected for order: {ClOrdID}')
-        
-        elif msgType == fix.MsgType_MarketDataRequestReject:
-        
-            text = extract_message_field_value(fix.Text(), message, 'str')
-            print(f'[fromApp] Market Data Request Reject with message: {text}')
-        
-        elif self.verbose:
-            print(f'[fromApp] {sessionID} | {read_FIX_message(message)}')
-            print('unknown message type: ', msgType)
-            # exit()
-        
     ##########################################################################
 
     # message parsing methods
@@ -277,37 +471,68 @@ class application(fix.Application):
         #################################
         # Enter Tick Storage Logic here.
 
-        # we could have multiple QuoteSets for multiple symbols
-        num_sets = extract_message_field_value(fix.NoQuoteSets(), message, 'int')  # 296
-        # print('num_sets:', num_sets)
+        # we could have multiple QuoteSets (296) for multiple symbols. 
+        # one group entry per QuoteSet. the NoQuoteEntries group (295) inside should always have one entry. 
+        fields, quote_sets = MASS_QUOTE_FIELDS.extract_groups(message)
         
-        for i in range(num_sets):
-
-            NoQuoteSets_Group = fix44.MassQuote.NoQuoteSets()
-            
-            # Groups have indexes in FIX messages starting at 1
-            message.getGroup(i+1, NoQuoteSets_Group)
-            reqid = extract_message_field_value(fix.QuoteSetID(), NoQuoteSets_Group)
-            # print(self._id_to_symbol)
-            _symbol = self._id_to_symbol[reqid]
-                        
-            # Bid/Offer data is inside NoQuoteEntries group, inside _NoQuoteSets group.
-            # num_sets = extract_message_field_value(fix.NoQuoteEntries(), message, 'int')  # 295, should always be 1.
-            NoQuoteEntries_Group = fix44.MassQuote.NoQuoteSets.NoQuoteEntries()          
-            NoQuoteSets_Group.getGroup(1, NoQuoteEntries_Group)
-
-            depth = extract_message_field_value(fix.QuoteEntryID(), NoQuoteEntries_Group, 'int')  # 299
-            bid = extract_message_field_value(fix.BidSpotRate(), NoQuoteEntries_Group, 'float')  # 188
-            ask = extract_message_field_value(fix.OfferSpotRate(), NoQuoteEntries_Group, 'float')  # 190
-            bid_size = extract_message_field_value(fix.BidSize(), NoQuoteEntries_Group, 'int')  # 134
-            ask_size = extract_message_field_value(fix.OfferSize(), NoQuoteEntries_Group, 'int')  # 135
-
-            self.update_asset(sending_time, _symbol, depth, bid, ask, bid_size, ask_size)
+        for quote_set in quote_sets:
+
+            # None for the QuoteSetID of a batch of symbols (see subscriptions.py)
+            _symbol = self.symbols.symbol_for_reqid(quote_set['QuoteSetID'])  # 302
+            if _symbol is None:
+                self.subscriptions.check_quote_set(quote_set['QuoteSetID'])
+
+            self.update_asset(sending_time, _symbol, 
+                              quote_set['QuoteEntryID'],  # 299
+                              quote_set['BidSpotRate'],  # 188
+                              quote_set['OfferSpotRate'],  # 190
+                              quote_set['BidSize'],  # 134
+                              quote_set['OfferSize'])  # 135
         
         #################################
         
         # If QuoteID is set the client has to respond immediately with a MassQuoteAcknowledgement.
-        if message.isSetField(fix.QuoteID()):
+        if fields['QuoteID'] is not None:
+            self.sender.send_MassQuoteAcknowledgement(message)
+
+    """
+    # parse a MassQuote in one pass over the raw message (enabled with fast_mass_quote=True). 
+    # the histories are updated and on_tick() is called as in parse_MassQuote(): once per quote set, 
+    # before the next quote set is applied. 
+    """
+    def parse_MassQuote_fast(self, message, sending_time):
+
+        symbols = self.symbols
+        updates = []
+        update = None
+        quote_id = False
+
+        for tag, value in _MASS_QUOTE_FIELD.findall(message.toString()):
+
+            if tag == '302':  # QuoteSetID, starts a new quote set
+                update = [symbols.history_for_reqid(value), None, None, None, None, None]
+                updates.append(update)
+                if update[0] is None:
+                    self.subscriptions.check_quote_set(value)
+
+            elif update is not None:
+                # only the first QuoteEntry of a set is used, as in parse_MassQuote(). 
+                slot = _QUOTE_ENTRY_SLOTS.get(tag)
+                if slot is not None and update[slot] is None:
+                    update[slot] = _QUOTE_ENTRY_TYPES[slot](value)
+
+            elif tag == '117':  # QuoteID
+                quote_id = True
+
+        for asset, depth, bid, ask, bid_size, ask_size in updates:
+            if asset is None or (bid is None and ask is None and bid_size is None and ask_size is None):
+                continue
+            with self.dispatcher.symbol_lock(asset.symbol):
+                asset._update_asset(sending_time, asset.symbol, depth, bid, ask, bid_size, ask_size)
+            self.dispatcher.dispatch_tick(asset.symbol)
+
+        # If QuoteID is set the client has to respond immediately with a MassQuoteAcknowledgement.
+        if quote_id:
             self.sender.send_MassQuoteAcknowledgement(message)
 
     ##########################################################################
@@ -328,26 +553,20 @@ class application(fix.Application):
         if self.verbose:
             print(self._server_str + ' {MD} Full refresh!')
 
-        symbol = extract_message_field_value(fix.Symbol(), message)
+        # MarketDataSnapshotFullRefresh message contains multiple NoMDEntries (268) group entries
+        fields, entries = SNAPSHOT_FIELDS.extract_groups(message)
+        symbol = fields['Symbol']
         
         if symbol in self.history_dict:
 
-            num_entries = extract_message_field_value(fix.NoMDEntries(), message, 'int')  # 268
-
-            # MarketDataSnapshotFullRefresh message contains multiple NoQuoteSets group
-            # Groups have indexes in FIX messages starting at 1
-            NoMDEntries_Group = fix44.MarketDataSnapshotFullRefresh.NoMDEntries()
-            # NoMDEntries_Group = fix44.MarketDataIncrementalRefresh.NoMDEntries()
-
-            for i in range(num_entries):
-                message.getGroup(i+1, NoMDEntries_Group)
+            for entry in entries:
                 
                 bid, ask, bid_size, ask_size = None, None, None, None 
 
-                _type = extract_message_field_value(fix.MDEntryType(), NoMDEntries_Group, 'str')  # 269 (0: bid, 1: ask)
-                price = extract_message_field_value(fix.MDEntryPx(), NoMDEntries_Group, 'float')  # 270
-                size = extract_message_field_value(fix.MDEntrySize(), NoMDEntries_Group, 'float')  # 271
-                depth = extract_message_field_value(fix.QuoteEntryID(), NoMDEntries_Group, 'int')  # 299
+                _type = entry['MDEntryType']  # 269 (0: bid, 1: ask)
+                price = entry['MDEntryPx']  # 270
+                size = entry['MDEntrySize']  # 271
+                depth = entry['QuoteEntryID']  # 299
                 
                 if _type == '0':
                     bid = price
@@ -363,6 +582,70 @@ class application(fix.Application):
 
     ##########################################################################
 
+    """
+    # parse MarketDataIncrementalRefresh
+
+    # example message:
+    # 8=FIX.4.4 9=... 35=X 34=1709 49=XCT 52=20171201-11:35:11.186 56=Q001 262=10 268=3 
+    # 279=1 269=0 55=XAG/USD 270=16.405 271=20000 299=0 279=2 269=1 55=XAG/USD 299=2 
+    # 279=0 269=1 55=XAG/USD 270=16.414 271=15000 299=2 10=...
+
+    # MDUpdateAction (279): 0 = new, 1 = change (the level is set), 2 = delete (the level is removed). 
+    # all entries are applied to the books first, on_tick() is called once per updated symbol afterwards. 
+    """
+    def parse_MarketDataIncrementalRefresh(self, message, sending_time):
+
+        if self.verbose:
+            print(self._server_str + ' {MD} Incremental refresh!')
+
+        fields, entries = INCREMENTAL_FIELDS.extract_groups(message)
+
+        # entries without a Symbol belong to the symbol of the previous entry or of the request
+        symbol = self.symbols.symbol_for_reqid(fields['MDReqID'])
+        symbols = []
+
+        for entry in entries:
+
+            if entry['Symbol'] is not None:
+                symbol = entry['Symbol']
+            if symbol not in self.history_dict:
+                continue
+
+            _action = entry['MDUpdateAction']  # 279
+            _type = entry['MDEntryType']  # 269 (0: bid, 1: ask)
+            price = entry['MDEntryPx']  # 270
+            size = entry['MDEntrySize']  # 271
+            depth = entry['QuoteEntryID']  # 299
+
+            if _type not in ('0', '1'):
+                continue
+            side = 'bid' if _type == '0' else 'ask'
+
+            if self.verbose:
+                print(f'symbol: {symbol} | action: {_action} | {side}: {price} | size: {size} | depth: {depth}')
+
+            if _action in ('0', '1'):
+                if price is None and size is None:
+                    continue
+                with self.dispatcher.symbol_lock(symbol):
+                    if side == 'bid':
+                        self.history_dict[symbol]._update_asset(sending_time, symbol, depth, price, None, size, None)
+                    else:
+                        self.history_dict[symbol]._update_asset(sending_time, symbol, depth, None, price, None, size)
+            elif _action == '2':
+                with self.dispatcher.symbol_lock(symbol):
+                    self.history_dict[symbol]._delete_level(sending_time, symbol, side, depth)
+            else:
+                continue
+
+            if symbol not in symbols:
+                symbols.append(symbol)
+
+        for symbol in symbols:
+            self.dispatcher.dispatch_tick(symbol)
+
+    ##########################################################################
+
     """
     # parse execution report
 
@@ -383,9 +666,11 @@ class application(fix.Application):
             print('[fromApp] Execution Report received!')
             print(f'[fromApp] {read_FIX_message(message)}')
 
+        fields = EXECUTION_REPORT_FIELDS.extract(message)
+
         # Tag 11 (client order ID, the one we sent)
         # must be the same type (int) as in open_orders. 
-        ClOrdID = extract_message_field_value(fix.ClOrdID(), message, 'int')
+        ClOrdID = fields['ClOrdID']
         # print('ClOrdID:', ClOrdID)
 
         # Tag 15
@@ -406,37 +691,34 @@ class application(fix.Application):
         # D = Accepted for bidding, E = Pending Replace (e.g. result of Order Cancel/Replace Request <G>)
         # maybe also check 3=Done for day, 7=Stopped, 9=Suspended, B=Calculated and C=Expired, but it seems that Stopped means it can still be filled? 
         # https://www.onixs.biz/fix-dictionary/4.4/tagNum_39.html
-        ordStatus = extract_message_field_value(fix.OrdStatus(), message, 'str')
+        ordStatus = fields['OrdStatus']
         # print('ordStatus:', ordStatus)
 
         # Tag 150 Execution type
         # 0 = New, 4 = Canceled, F = Trade (partial fill or fill), I = Order Status, ...
-        _ExecType = extract_message_field_value(fix.ExecType(), message)
+        _ExecType = fields['ExecType']
         # print('_ExecType:', _ExecType)
 
         # if the exection report is a response to an OrderStatusRequest, 
         # fields other than OrdStatus might not be set.
         if _ExecType == 'I':
-            if ClOrdID in self.open_orders.keys():
-                self.open_orders[ClOrdID].status = ordStatus
-            else:
-                print(f'Order {ClOrdID} not found! Order status: {ordStatus}')
+            self.process_execution_report(ClOrdID, _ExecType, ordStatus)
             return
 
         # Tag 40 OrderType: 1 = Market, 2 = Limit, 3 = Stop
-        ordType = extract_message_field_value(fix.OrdType(), message, 'str')
+        ordType = fields['OrdType']
         # print('ordType:', ordType)
 
         # Tag 44
-        price = extract_message_field_value(fix.Price(), message, 'float')
+        price = fields['Price']
         # print('price:', price)
 
         # Tag 54
-        side = extract_message_field_value(fix.Side(), message, 'str')
+        side = fields['Side']
         # print('side:', side)
 
         # Tag 55
-        symbol = extract_message_field_value(fix.Symbol(), message, 'str')
+        symbol = fields['Symbol']
         # print('symbol:', symbol)
 
         # canceled or rejected: here a few fields are not defined, which would 
@@ -447,6 +729,71 @@ class application(fix.Application):
         # 56=T008, 11=51515, 14=0.0, 17=0, 37=0, 38=1000, 39=8, 40=2, 44=1.17, 54=1, 
         # 55=EUR/USD, 58=reject: duplicate clOrdID, 150=8, 151=0.0, 10=073
 
+        if ordStatus == '4' or ordStatus == '6' or ordStatus == '8':
+            self.process_execution_report(ClOrdID, _ExecType, ordStatus, ordType, price, side, symbol)
+            return
+
+        # Tag 60 in epoch nanoseconds. helpers.ns_to_datetime() converts it to a datetime. 
+        transactTime = fields['TransactTime']
+        # print('transactTime:', transactTime)
+
+        # Tag 18
+        orderQty = fields['OrderQty']
+        # print('orderQty:', orderQty)
+
+        # Tag 110
+        minQty = fields['MinQty']
+        # print('minQty:', minQty)
+
+        # Tag 14 CumQty: Total quantity filled.
+        cumQty = fields['CumQty']
+        # print('cumQty:', cumQty)
+
+        # Tag 151 LeavesQty: Quantity open for further execution. 0 if 'Canceled', 'DoneForTheDay', 
+        # 'Expired', 'Calculated', or' Rejected', else LeavesQty <151> = OrderQty <38> - CumQty <14>. 
+        leavesQty = fields['LeavesQty']
+        # print('leavesQty:', leavesQty)
+
+        # Tag 6 AvgPx: average price of the fills so far (0 if nothing is filled).
+        avgPx = fields['AvgPx']
+        # print('avgPx:', avgPx)
+
+        self.process_execution_report(ClOrdID, _ExecType, ordStatus, ordType, price, side, symbol, 
+                                      transactTime, orderQty, minQty, cumQty, leavesQty, avgPx)
+
+    """
+    # An OrderCancelReject will be sent as an answer to an  OrderCancelRequest, which cannot be executed. 
+    # Not much to do here as our order dict would stay the same. 
+    # If it was canceled successfully, we should get an execution report. 
+    """
+    def parse_OrderCancelReject(self, message, sending_time):
+
+        ClOrdID = extract_message_field_value(fix.ClOrdID(), message, 'int')
+
+        print(f'[fromApp] Order Cancel Request Rejected for order: {ClOrdID}')
+
+    def parse_MarketDataRequestReject(self, message, sending_time):
+
+        text = extract_message_field_value(fix.Text(), message, 'str')
+        print(f'[fromApp] Market Data Request Reject with message: {text}')
+
+    """
+    # update orders and positions with the fields of an execution report and 
+    # call tick_processor.on_execution_report(). 
+    # also used by the replay engine to simulate fills without a FIX session. 
+    """
+    def process_execution_report(self, ClOrdID, ExecType, ordStatus, ordType=None, price=None, side=None, 
+                                 symbol=None, transactTime=None, orderQty=0, minQty=0, cumQty=0, leavesQty=0, 
+                                 avgPx=None):
+
+        # response to an OrderStatusRequest. 
+        if ExecType == 'I':
+            if ClOrdID in self.open_orders.keys():
+                self.open_orders.set_status(ClOrdID, ordStatus)
+            else:
+                print(f'Order {ClOrdID} not found! Order status: {ordStatus}')
+            return
+
         if ordStatus == '4' or ordStatus == '6' or ordStatus == '8':
 
             action = 'canceled'
@@ -464,63 +811,38 @@ class application(fix.Application):
             elif self.verbose:
                 print(f'Order {action}, but not found in open_orders.')
 
-            report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, 0, 0, 0, 0)
+            # tag 60 is not set in rejects. 
+            if transactTime is None:
+                transactTime = time_ns()
+
+            report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, 0, 0, 0, 0, transactTime)
             self.execution_history.append(report)
 
             if self.verbose:
                 print(report)
             
-            
-            
-            transactTime = datetime_to_str(datetime.datetime.utcnow())
-            log(self.execution_logger, '{},{},{},{},{},{},{},{},{},{},{}'.format(transactTime, ClOrdID, symbol, 
+            log(self.execution_logger, '{},{},{},{},{},{},{},{},{},{},{}'.format(ns_to_str(transactTime), ClOrdID, symbol, 
                                                                                  side, price, ordType, ordStatus, 
                                                                                  0, 0, 0, 0))
 
-            if self.read_positions_from_file:
-                self.save_positions_to_file()
+            self._persist_positions(ClOrdID, symbol)
 
-            self.lock.acquire()
-            self.tick_processor.on_execution_report(report, self)
-            self.lock.release()
+            self.dispatcher.dispatch_execution_report(report)
             return
 
-        # Tag 60 (how to make it a datetime object?)
-        # here without extract_message_field_value() because we want to call getString() and not getValue(). 
-        transactTime = fix.TransactTime()
-        message.getField(transactTime)
-        transactTime = transactTime.getString()
-        # print('transactTime:', transactTime)
-
-        # Tag 18
-        orderQty = extract_message_field_value(fix.OrderQty(), message, 'int')
-        # print('orderQty:', orderQty)
-
-        # Tag 110
-        minQty = extract_message_field_value(fix.MinQty(), message, 'int')
-        # print('minQty:', minQty)
-
-        # Tag 14 CumQty: Total quantity filled.
-        cumQty = extract_message_field_value(fix.CumQty(), message, 'int')
-        # print('cumQty:', cumQty)
-
-        # Tag 151 LeavesQty: Quantity open for further execution. 0 if 'Canceled', 'DoneForTheDay', 
-        # 'Expired', 'Calculated', or' Rejected', else LeavesQty <151> = OrderQty <38> - CumQty <14>. 
-        leavesQty = extract_message_field_value(fix.LeavesQty(), message, 'int')
-        # print('leavesQty:', leavesQty)
-
         if not ClOrdID in self.open_orders.keys():
             log(self.execution_logger, f'[ERROR] ClOrdID {ClOrdID} not found in open_orders:', True)
-            for o in self.open_orders:
+            for o in self.open_orders.snapshot():
                 log(self.execution_logger, o)
-            report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, orderQty, minQty, cumQty, leavesQty)
+            report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, orderQty, minQty, cumQty, leavesQty, 
+                                      transactTime, avgPx)
             self.execution_history.append(report)
             print(report)
             # maybe better exit if the ID was not found? 
             # but it could happen on the start of a session with PersistMessages=Y. 
             return
         
-        self.open_orders[ClOrdID].status = ordStatus
+        self.open_orders.set_status(ClOrdID, ordStatus)
 
         if ordStatus == '0':  # new
             self.open_orders[ClOrdID].openTime = transactTime
@@ -546,22 +868,20 @@ class application(fix.Application):
             if ClOrdID in self.open_orders.keys():
                 del self.open_orders[ClOrdID]
         
-        report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, orderQty, minQty, cumQty, leavesQty)
+        report = execution_report(ClOrdID, symbol, side, price, ordType, ordStatus, orderQty, minQty, cumQty, leavesQty, 
+                                  transactTime, avgPx)
         self.execution_history.append(report)
 
         if self.verbose:
             print(report)
 
-        log(self.execution_logger, '{},{},{},{},{},{},{},{},{},{},{}'.format(transactTime, ClOrdID, symbol, side, 
+        log(self.execution_logger, '{},{},{},{},{},{},{},{},{},{},{}'.format(ns_to_str(transactTime), ClOrdID, symbol, side, 
                                                                              price, ordType, ordStatus, orderQty, 
                                                                              minQty, cumQty, leavesQty))
         
-        if self.read_positions_from_file:
-            self.save_positions_to_file()
+        self._persist_positions(ClOrdID, symbol)
 
-        self.lock.acquire()
-        self.tick_processor.on_execution_report(report, self)
-        self.lock.release()
+        self.dispatcher.dispatch_execution_report(report)
 
     ##########################################################################
 
@@ -578,39 +898,53 @@ class application(fix.Application):
         if self.verbose:
             print(self._client_str + 'Updating ' + symbol + ' Asset History')
 
-        self.history_dict[symbol]._update_asset(sending_time, symbol, depth, bid, ask, bid_size, ask_size)
+        with self.dispatcher.symbol_lock(symbol):
+            self.history_dict[symbol]._update_asset(sending_time, symbol, depth, bid, ask, bid_size, ask_size)
+
+        self.dispatcher.dispatch_tick(symbol)
+
+    """
+    # called by the bar builders when a bar is closed. 
+    # tick_processor.on_bar() is optional. 
+    """
+    def on_bar(self, symbol, time_frame, bar):
+
+        if not hasattr(self.tick_processor, 'on_bar'):
+            return
 
-        self.lock.acquire()
-        self.tick_processor.on_tick(symbol, self)
-        self.lock.release()
+        self.dispatcher.dispatch_bar(symbol, time_frame, bar)
 
     def add_order(self, order):
         self.open_orders[order.ClOrdID] = order
 
     """
-    # check if a symbol is already in the _id_to_symbol dict. 
-    # add the symbol if it is not the case. 
+    # register a symbol and create its history if it is new. returns its MDReqID (str). 
+    # reqid: MDReqID to use instead of a new one (e.g. of a replayed request). 
     """
-    def check_new_symbol(self, symbol):
+    def check_new_symbol(self, symbol, reqid=None):
         # Create asset in self.history_dict if it doesn't exist.
         
-        reqid = None
-        
-        if symbol not in self._id_to_symbol.values():
-            reqid = self._ID_Incrementor
+        symbol_id = self.symbols.add(symbol)
+
+        if reqid is not None:
+            self.symbols.set_reqid(symbol_id, reqid)
+        elif self.symbols.reqid(symbol_id) is None:
+            reqid = self.next_MDReqID()
             print(f'{self._client_str}Symbol {symbol} not found. Adding {symbol} with MDReqID {reqid}.')
-            self._id_to_symbol[str(reqid)] = symbol
-            self._ID_Incrementor += 1
-        else:
-            for key, val in self._id_to_symbol.items(): 
-                if symbol == val:
-                    reqid = key
+            self.symbols.set_reqid(symbol_id, reqid)
 
         if symbol not in self.history_dict.keys():
             print(f'{self._client_str}Creating Asset History for {symbol}')
-            self.history_dict[symbol] = history(symbol, self.store_all_ticks, self.save_history_to_files)
+            self.history_dict[symbol] = history(symbol, self.store_all_ticks, self.save_history_to_files, 
+                                                self.tick_store_capacity, self.tick_store_window, 
+                                                self.bar_time_frames, self.max_bars, self.on_bar, 
+                                                self.history_file_format, self.writer, self.book_depth, 
+                                                self.history_rollover, self.compress_history_files, 
+                                                self.history_catalog, self.rolling_stats_window, 
+                                                self.rolling_stats_alpha, self.symbols, symbol_id)
+            self.symbols.set_history(symbol_id, self.history_dict[symbol])
         
-        return reqid
+        return self.symbols.reqid(symbol_id)
 
     ##########################################################################
 
@@ -639,6 +973,8 @@ class application(fix.Application):
             self.open_net_positions[symbol] += quantity
         else:
             self.open_net_positions[symbol] = orderQty
+
+        self.symbols.set_net_position(self.symbols.add(symbol), self.open_net_positions[symbol])
     """
     # add canceled position
     """
@@ -656,48 +992,73 @@ class application(fix.Application):
             self.canceled_net_quantity[symbol] = orderQty
     
     """
-    # save positions to file
+    # log the state of an order and the position of its symbol after an execution report. 
+    # the cost does not depend on the number of open orders. a snapshot is written every 
+    # position_snapshot_interval records. 
+    """
+    def _persist_positions(self, ClOrdID, symbol):
+
+        store = self.position_store
+        if store is None:
+            return
+
+        _order = self.open_orders.get(ClOrdID)
+        store.record('order', ClOrdID, None if _order is None else _order.__dict__)
+        if symbol in self.open_net_positions:
+            store.record('position', symbol, [self.open_net_positions[symbol], 
+                                              self.canceled_net_quantity.get(symbol, 0.)])
+
+        if store.due():
+            self.save_positions_to_file()
+
+    """
+    # save positions to file (snapshot of all open orders and positions)
     """
     def save_positions_to_file(self):
 
-        with open(self._order_file, 'w') as f:
+        if self.position_store is None:
+            return
 
-            orders_as_dict = {}
-            for key in self.open_orders.keys():
-                orders_as_dict[key] = self.open_orders[key].__dict__
-            
-            json.dump(orders_as_dict, f)
-        
-        with open(self._position_file, 'w') as f:
-            json.dump(self.open_net_positions, f)
+        orders_as_dict = {}
+        for key, _order in self.open_orders.snapshot().items():
+            orders_as_dict[key] = _order.__dict__
+
+        self.position_store.snapshot(orders_as_dict, self.open_net_positions, self.canceled_net_quantity)
     
     """
-    # load positions from file
+    # load positions from file: the last snapshot and the log records after it. 
+    # falls back to orders.json / positions.json of earlier versions. 
     """
     def load_positions_from_file(self):
-        with open(self._order_file) as f:
 
-            orders_as_dict = json.load(f)
+        state = self.position_store.load() if self.position_store is not None else None
 
-            for key in orders_as_dict.keys():
-                self.open_orders[key] = order(_dict=orders_as_dict[key])
-            
-            ids = [int(_id) for _id in self.open_orders.keys()]
-            if len(ids) > 0:
-                self.ClOrdID_Incrementor = max(ids)
-            
-        with open(self._position_file) as f:
-            self.open_net_positions = json.load(f)
+        if state is not None:
+            orders_as_dict, self.open_net_positions, self.canceled_net_quantity = state
+        elif os.path.isfile(self._order_file) and os.path.isfile(self._position_file):
+            with open(self._order_file) as f:
+                orders_as_dict = {int(key) if key.isdigit() else key: value for key, value in json.load(f).items()}
+            with open(self._position_file) as f:
+                self.open_net_positions = json.load(f)
+        else:
+            return
+
+        for key in orders_as_dict.keys():
+            self.open_orders[key] = order(_dict=orders_as_dict[key])
+        
+        ids = [_id for _id in self.open_orders.keys() if isinstance(_id, int)]
+        if len(ids) > 0:
+            self.ClOrdID_Incrementor = max(ids)
+
+        for symbol in self.open_net_positions:
+            self.canceled_net_quantity.setdefault(symbol, 0.)
+            self.symbols.set_net_position(self.symbols.add(symbol), self.open_net_positions[symbol])
     
     """
     # count open positions for one symbol
     """
     def num_orders(self, symbol):
-        n = 0
-        for key in self.open_orders.keys():
-            if self.open_orders[key].symbol == symbol:
-                n += 1
-        return n
+        return self.open_orders.count(symbol=symbol)
 
     """
     # count open positions for all symbols
@@ -717,17 +1078,29 @@ class application(fix.Application):
     
     ##########################################################################
 
+    """
+    # get the MDReqID for the next MarketDataRequest (also the QuoteSetID of its MassQuotes). 
+    """
+    def next_MDReqID(self):
+
+        reqid = self._ID_Incrementor
+        self._ID_Incrementor += 1
+
+        return reqid
+
     """
     # get the ClOrdID for the next order. 
     """
     def next_ClOrdID(self):
         
-        self.ClOrdID_Incrementor += 1
-
-        # to make sure we don't have duplicates. 
-        while self.ClOrdID_Incrementor in self.open_orders.keys():
+        # orders can be sent from several dispatcher threads. 
+        with self.open_orders.lock:
             self.ClOrdID_Incrementor += 1
 
-        return self.ClOrdID_Incrementor
+            # to make sure we don't have duplicates. 
+            while self.ClOrdID_Incrementor in self.open_orders.keys():
+                self.ClOrdID_Incrementor += 1
+
+            return self.ClOrdID_Incrementor
     
     ##########################################################################
\ No newline at end of file
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+    async_client.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    async_client - asyncio front end for the application
+
+    the async_client is the tick_processor of its application. ticks and execution reports
+    arrive on the QuickFIX (or dispatcher) threads and are handed to the event loop with
+    loop.call_soon_threadsafe(), so all futures and queues are only used on the loop thread.
+
+    example:
+        client = async_client('config/client_sample.conf', store_all_ticks='array')
+        await client.connect()
+        client.subscribe(['EUR/USD'])
+        report = await client.submit(order('buy_market', 'EUR/USD', 1000), final=True)
+        async for tick in client.ticks('EUR/USD'):
+            print(tick['bid'], tick['ask'])
+"""
+
+import asyncio
+from time import time_ns
+import quickfix as fix
+
+from dwxquickfix.application import application
+
+
+# OrdStatus (39) of the reports after which an order is not open anymore:
+# filled, done for day, canceled, pending cancel, rejected, expired
+FINAL_ORDER_STATUS = ('2', '3', '4', '6', '8', 'C')
+
+
+class async_client():
+
+    """
+    # config_file: QuickFIX session settings.
+    # all other keyword arguments are passed to the application (see application.py).
+    # the client has to be created in a coroutine of the event loop that uses it (or pass loop).
+    """
+    def __init__(self, config_file='config/client_sample.conf', loop=None, **kwargs):
+
+        self.settings = fix.SessionSettings(config_file)
+        self.storeFactory = fix.FileStoreFactory(self.settings)
+        self.logFactory = fix.FileLogFactory(self.settings)
+
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+
+        self._tick_queues = {}   # format: 'EUR/USD': [asyncio.Queue, ...] (replaced on change, not modified)
+        self._pending = {}       # format: ClOrdID: (asyncio.Future, final)
+        self.num_dropped_ticks = 0
+
+        self.app = application(self.settings, self, **kwargs)
+        self.initiator = fix.SocketInitiator(self.app,
+                                             self.storeFactory,
+                                             self.settings,
+                                             self.logFactory)
+
+    ##########################################################################
+
+    """
+    # start the sessions and wait until both are logged on.
+    # raises asyncio.TimeoutError if they are not logged on within timeout seconds.
+    """
+    async def connect(self, timeout=10., poll_interval=0.1):
+
+        self.initiator.start()
+
+        async def logged_on():
+            while not self.isLoggedOn():
+                await asyncio.sleep(poll_interval)
+
+        await asyncio.wait_for(logged_on(), timeout)
+
+    def isLoggedOn(self):
+
+        sender = self.app.sender
+        if sender.sessionID_Quote is None or sender.sessionID_Trade is None:
+            return False
+        return (fix.Session.lookupSession(sender.sessionID_Quote).isLoggedOn()
+                and fix.Session.lookupSession(sender.sessionID_Trade).isLoggedOn())
+
+    """
+    # stop the sessions and cancel the orders that are still awaited
+    """
+    async def stop(self):
+
+        await self.loop.run_in_executor(None, self.initiator.stop)
+        await self.loop.run_in_executor(None, self.app.stop)
+
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    ##########################################################################
+
+    """
+    # see subscription_manager.subscribe()
+    """
+    def subscribe(self, symbols, depth=0, batch=False):
+        return self.app.subscriptions.subscribe(symbols, depth, batch)
+
+    def unsubscribe(self, symbols):
+        self.app.subscriptions.unsubscribe(symbols)
+
+    """
+    # async iterator of the ticks of a symbol: {'symbol', 'time', 'bid', 'ask', 'bid_size', 'ask_size'},
+    # time in epoch nanoseconds (arrival), the others are the top of book.
+    # if the consumer is slower than the feed, the oldest of maxsize queued ticks are dropped.
+    """
+    async def ticks(self, symbol, maxsize=1000):
+
+        queue = asyncio.Queue(maxsize)
+        self._tick_queues[symbol] = self._tick_queues.get(symbol, []) + [queue]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            queues = [q for q in self._tick_queues.get(symbol, []) if q is not queue]
+            if len(queues) > 0:
+                self._tick_queues[symbol] = queues
+            else:
+                self._tick_queues.pop(symbol, None)
+
+    """
+    # send an order and wait for its execution report.
+    # final=False: the first report (e.g. new, filled or rejected).
+    # final=True:  the report after which the order is not open anymore (see FINAL_ORDER_STATUS).
+    # raises RuntimeError if the order is not sent (invalid order, duplicate ClOrdID or no trade session)
+    # and asyncio.TimeoutError if the report does not arrive within timeout seconds (the order is not canceled).
+    """
+    async def submit(self, order, timeout=10., final=False):
+
+        if order.ClOrdID is None:
+            order.ClOrdID = self.app.next_ClOrdID()
+        if order.ClOrdID in self._pending:
+            raise ValueError(f'An execution report for ClOrdID {order.ClOrdID} is already awaited.')
+
+        # registered before sending, the report can arrive before send_NewOrderSingle() returns.
+        future = self.loop.create_future()
+        self._pending[order.ClOrdID] = (future, final)
+        try:
+            if not self.app.sender.send_NewOrderSingle(order):
+                raise RuntimeError(f'Order {order.ClOrdID} was not sent, see the [ERROR] message above.')
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(order.ClOrdID, None)
+
+    ##########################################################################
+
+    # tick_processor methods, called on the QuickFIX or dispatcher threads.
+
+    def on_tick(self, symbol, app):
+
+        if symbol not in self._tick_queues:
+            return
+
+        history = app.history_dict[symbol]
+        book = history.book
+        tick = {'symbol': symbol,
+                'time': time_ns(),
+                'bid': history.BID_TOB,
+                'ask': history.ASK_TOB,
+                'bid_size': float(book.best_bid_size),
+                'ask_size': float(book.best_ask_size)}
+        self.loop.call_soon_threadsafe(self._put_tick, symbol, tick)
+
+    def on_execution_report(self, report, app):
+        self.loop.call_soon_threadsafe(self._resolve, report)
+
+    ##########################################################################
+
+    # on the loop thread
+
+    def _put_tick(self, symbol, tick):
+
+        for queue in self._tick_queues.get(symbol, []):
+            if queue.full():
+                queue.get_nowait()
+                self.num_dropped_ticks += 1
+            queue.put_nowait(tick)
+
+    def _resolve(self, report):
+
+        pending = self._pending.get(report.ClOrdID)
+        if pending is None:
+            return
+
+        future, final = pending
+        if future.done() or (final and report.OrdStatus not in FINAL_ORDER_STATUS):
+            return
+        future.set_result(report)
+
+    ##########################################################################
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+    async_writer.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    async_writer - A background thread that performs file I/O off the QuickFIX callback threads
+"""
+
+import logging
+from queue import Queue, Full, Empty
+from threading import Thread, Condition, Event, Lock
+from time import perf_counter
+
+
+_STOP = object()
+
+
+class async_writer():
+
+    """
+    # queue_size: maximum number of pending writes.
+    # full_policy: what submit() does if the queue is full.
+    #     'block': wait until the writer thread has made space (nothing is lost).
+    #     'drop':  discard the write and count it in num_dropped (unless it is submitted with block=True).
+    # batch_size: maximum number of writes between two flushes.
+    """
+    def __init__(self, queue_size=100000, full_policy='block', batch_size=1000):
+
+        if full_policy not in ('block', 'drop'):
+            raise ValueError(f'Invalid full_policy: {full_policy}')
+
+        self.full_policy = full_policy
+        self.batch_size = batch_size
+        self._queue = Queue(maxsize=queue_size)
+        self._flushables = []
+
+        # counters
+        self.num_written = 0
+        self.num_dropped = 0
+        self.num_blocked = 0
+        self.num_errors = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.   # seconds from submit() until written
+        self.max_latency = 0.
+
+        # submit() and stop() synchronize on _running and the number of submits that are queuing
+        # an item, so that nothing is queued after the stop marker.
+        self._running = True
+        self._num_submitting = 0
+        self._state = Condition(Lock())
+
+        self._thread = Thread(target=self._run, name='dwx_async_writer', daemon=True)
+        self._thread.start()
+
+    ##########################################################################
+
+    """
+    # register a file/stream that is flushed after every batch
+    """
+    def register(self, flushable):
+        if flushable not in self._flushables:
+            self._flushables.append(flushable)
+
+    """
+    # stop flushing a file/stream, e.g. before it is closed. call it on the writer thread
+    # (through submit()) if writes to it might still be queued.
+    """
+    def unregister(self, flushable):
+        if flushable in self._flushables:
+            self._flushables.remove(flushable)
+
+    """
+    # queue func(*args) to be executed on the writer thread.
+    # block=True: wait if the queue is full, also with full_policy 'drop'. for writes that must
+    # not be lost, e.g. the position records, or that close files.
+    # after stop(), func is executed directly (once the writer thread has finished).
+    """
+    def submit(self, func, *args, block=False):
+
+        with self._state:
+            running = self._running
+            if running:
+                self._num_submitting += 1
+
+        if not running:
+            if self._thread.is_alive():
+                self._thread.join()
+            func(*args)
+            return
+
+        try:
+            item = (perf_counter(), func, args)
+
+            try:
+                self._queue.put_nowait(item)
+            except Full:
+                if self.full_policy == 'drop' and not block:
+                    self.num_dropped += 1
+                    return
+                self.num_blocked += 1
+                self._queue.put(item)
+
+            depth = self._queue.qsize()
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+        finally:
+            with self._state:
+                self._num_submitting -= 1
+                if self._num_submitting == 0:
+                    self._state.notify_all()
+
+    """
+    # wait until the items submitted before are written and the registered files are flushed,
+    # e.g. before the files are read. returns False if that takes longer than timeout seconds.
+    """
+    def flush(self, timeout=None):
+        done = Event()
+        self.submit(self._flush_and_set, done, block=True)
+        return done.wait(timeout)
+
+    def _flush_and_set(self, done):
+        self._flush()
+        done.set()
+
+    ##########################################################################
+
+    def _run(self):
+
+        stop = False
+        while not stop:
+
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                pass
+
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                else:
+                    self._execute(item)
+
+            self._flush()
+
+    def _execute(self, item):
+
+        submitted, func, args = item
+        try:
+            func(*args)
+        except Exception as e:
+            self.num_errors += 1
+            print(f'[ERROR] async_writer: {func} failed: {e}')
+
+        latency = perf_counter() - submitted
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.num_written += 1
+
+    def _flush(self):
+        for flushable in self._flushables:
+            try:
+                flushable.flush()
+            except Exception as e:
+                self.num_errors += 1
+                print(f'[ERROR] async_writer: flush failed: {e}')
+
+    """
+    # write all pending items and stop the thread. later writes are executed directly.
+    # returns False if the thread has not finished within timeout seconds. it then keeps writing
+    # the pending items, and later writes wait for it.
+    """
+    def stop(self, timeout=None):
+
+        with self._state:
+            if not self._running:
+                return not self._thread.is_alive()
+            self._running = False
+            while self._num_submitting > 0:
+                self._state.wait()
+
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f'[ERROR] async_writer: {self._queue.qsize()} writes are still pending after {timeout} seconds')
+            return False
+
+        # nothing is queued behind the stop marker by submit(), but anything that is gets written here
+        leftover = False
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except Empty:
+                break
+            if item is not _STOP:
+                self._execute(item)
+                leftover = True
+        if leftover:
+            self._flush()
+        return True
+
+    ##########################################################################
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'num_written': self.num_written,
+                'num_dropped': self.num_dropped,
+                'num_blocked': self.num_blocked,
+                'num_errors': self.num_errors,
+                'mean_latency': self.total_latency / self.num_written if self.num_written > 0 else 0.,
+                'max_latency': self.max_latency}
+
+    ##########################################################################
+
+
+class async_log_handler(logging.Handler):
+
+    """
+    # wraps a logging.StreamHandler (e.g. FileHandler) so that formatting and
+    # writing of the records happens on the writer thread.
+    """
+    def __init__(self, handler, writer):
+
+        super().__init__(handler.level)
+        self.handler = handler
+        self.writer = writer
+        self.writer.register(handler)
+
+    def emit(self, record):
+        self.writer.submit(self._write, record)
+
+    def _write(self, record):
+        handler = self.handler
+        handler.stream.write(handler.format(record) + handler.terminator)
+
+    def close(self):
+        self.handler.close()
+        super().close()
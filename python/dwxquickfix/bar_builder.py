@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    bar_builder.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    bar_builder - Incremental OHLC bars for multiple time frames
+"""
+
+from collections import deque
+
+
+# seconds per time frame unit, e.g. '1s', '1m', '5min', '1h', '1d'.
+TIME_FRAME_UNITS = {'s': 1, 'min': 60, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+"""
+# Convert a time frame string to nanoseconds
+"""
+def time_frame_to_ns(time_frame):
+
+    for unit in sorted(TIME_FRAME_UNITS, key=len, reverse=True):
+        if time_frame.endswith(unit):
+            number = time_frame[:-len(unit)]
+            try:
+                return int(number or 1) * TIME_FRAME_UNITS[unit] * 1000000000
+            except ValueError:
+                break
+
+    raise ValueError(f'Invalid time frame: {time_frame}')
+
+
+class bar():
+
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'tick_count', 'max_spread', '_spread_sum')
+
+    # time: bar open time in epoch nanoseconds.
+    def __init__(self, time, price, spread):
+
+        self.time = time
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.tick_count = 1
+        self.max_spread = spread
+        self._spread_sum = spread
+
+    """
+    # average spread of all ticks in the bar
+    """
+    @property
+    def spread(self):
+        return self._spread_sum / self.tick_count
+
+    def __str__(self):
+        return (f'time: {self.time}, open: {self.open}, high: {self.high}, low: {self.low}, '
+                f'close: {self.close}, spread: {self.spread}, max_spread: {self.max_spread}, '
+                f'tick_count: {self.tick_count}')
+
+
+class bar_builder():
+
+    """
+    # time_frames: e.g. ('1s', '1m', '5m').
+    # max_bars: number of closed bars kept per time frame.
+    # price: 'bid', 'ask' or 'mid'.
+    # callback(symbol, time_frame, bar) is called when a bar is closed.
+    """
+    def __init__(self, symbol, time_frames=('1m',), max_bars=1000, price='mid', callback=None):
+
+        if price not in ('bid', 'ask', 'mid'):
+            raise ValueError(f'Invalid bar price: {price}')
+
+        self.symbol = symbol
+        self.price = price
+        self.callback = callback
+        self.time_frames = [(time_frame, time_frame_to_ns(time_frame)) for time_frame in time_frames]
+
+        self.bars = {time_frame: deque(maxlen=max_bars) for time_frame in time_frames}  # closed bars
+        self.current = {time_frame: None for time_frame in time_frames}   # bar that is still open
+
+    ##########################################################################
+
+    """
+    # update all time frames with a new top of book tick. O(1) per time frame.
+    """
+    def update(self, time_ns, bid, ask):
+
+        if self.price == 'mid':
+            price = (bid + ask) / 2
+        elif self.price == 'bid':
+            price = bid
+        else:
+            price = ask
+        spread = ask - bid
+
+        for time_frame, length in self.time_frames:
+
+            start = time_ns - time_ns % length
+            current = self.current[time_frame]
+
+            if current is None or start > current.time:
+                if current is not None:
+                    self.bars[time_frame].append(current)
+                    if self.callback is not None:
+                        self.callback(self.symbol, time_frame, current)
+                self.current[time_frame] = bar(start, price, spread)
+                continue
+
+            # ticks that arrive late are added to the current bar.
+            if price > current.high:
+                current.high = price
+            elif price < current.low:
+                current.low = price
+            current.close = price
+            current.tick_count += 1
+            current._spread_sum += spread
+            if spread > current.max_spread:
+                current.max_spread = spread
+
+    ##########################################################################
@@ -22,7 +22,30 @@ class client():
                  save_history_to_files=True,
                  verbose=True,
                  message_log_file = 'messages.log',
-                 execution_history_file='execution_history.log'):
+                 execution_history_file='execution_history.log',
+                 tick_store_capacity=100000,
+                 tick_store_window=None,
+                 bar_time_frames=None,
+                 max_bars=1000,
+                 history_file_format='csv',
+                 async_persistence=False,
+                 persistence_queue_size=100000,
+                 persistence_full_policy='block',
+                 book_depth=10,
+                 rotate_history_files=False,
+                 compress_history_files=True,
+                 conflate_ticks=False,
+                 rolling_stats_window=None,
+                 rolling_stats_alpha=0.05,
+                 message_log_sampling=None,
+                 journal_file='',
+                 fast_mass_quote=False,
+                 dispatch_workers=0,
+                 dispatch_shards=None,
+                 dispatch_queue_size=100000,
+                 dispatch_full_policy='drop',
+                 position_snapshot_interval=1000,
+                 execution_history_capacity=100000):
 
         # Load FIX v4.4 DEFAULT & SESSION Configuration Settings
         self.settings = fix.SessionSettings(config_file)
@@ -36,7 +59,30 @@ class client():
         self.app = application(self.settings, self.tick_processor, 
                                read_positions_from_file, store_all_ticks, 
                                save_history_to_files, verbose, 
-                               message_log_file, execution_history_file)
+                               message_log_file, execution_history_file, 
+                               tick_store_capacity=tick_store_capacity, 
+                               tick_store_window=tick_store_window, 
+                               bar_time_frames=bar_time_frames, 
+                               max_bars=max_bars, 
+                               history_file_format=history_file_format, 
+                               async_persistence=async_persistence, 
+                               persistence_queue_size=persistence_queue_size, 
+                               persistence_full_policy=persistence_full_policy, 
+                               book_depth=book_depth, 
+                               rotate_history_files=rotate_history_files, 
+                               compress_history_files=compress_history_files, 
+                               conflate_ticks=conflate_ticks, 
+                               rolling_stats_window=rolling_stats_window, 
+                               rolling_stats_alpha=rolling_stats_alpha, 
+                               message_log_sampling=message_log_sampling, 
+                               journal_file=journal_file, 
+                               fast_mass_quote=fast_mass_quote, 
+                               dispatch_workers=dispatch_workers, 
+                               dispatch_shards=dispatch_shards, 
+                               dispatch_queue_size=dispatch_queue_size, 
+                               dispatch_full_policy=dispatch_full_policy, 
+                               position_snapshot_interval=position_snapshot_interval, 
+                               execution_history_capacity=execution_history_capacity)
 
         self.initiator = fix.SocketInitiator(self.app, 
                                              self.storeFactory, 
@@ -81,3 +127,4 @@ class client():
     def stop(self):
 
         self.initiator.stop()
+        self.app.stop()
@@ -0,0 +1,510 @@
+# -*- coding: utf-8 -*-
+"""
+    dispatcher.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    Delivery of ticks and execution reports from the application to the tick_processor
+
+    sync_dispatcher:        calls the tick_processor directly on the QuickFIX thread (default).
+    conflating_dispatcher:  calls the tick_processor from a separate thread. updates of a symbol
+                            that arrive while on_tick() is busy are coalesced into one call.
+    queued_dispatcher:      publishes tick, bar and execution events to queues that are
+                            delivered by worker threads. the QuickFIX thread never waits on
+                            the tick_processor. execution reports are delivered in order.
+    sharded_dispatcher:     a queue, worker thread and lock per group of symbols instead of
+                            app.lock, so the callbacks of different symbols run in parallel.
+"""
+
+from contextlib import nullcontext
+from queue import Queue, Full
+from threading import Thread, Condition, Lock
+from time import perf_counter
+
+
+_STOP = object()
+_NO_LOCK = nullcontext()
+
+
+class sync_dispatcher():
+
+    def __init__(self, app):
+        self.app = app
+
+    def dispatch_tick(self, symbol):
+        app = self.app
+        app.lock.acquire()
+        app.tick_processor.on_tick(symbol, app)
+        app.lock.release()
+
+    def dispatch_execution_report(self, report):
+        app = self.app
+        app.lock.acquire()
+        app.tick_processor.on_execution_report(report, app)
+        app.lock.release()
+
+    def dispatch_bar(self, symbol, time_frame, bar):
+        app = self.app
+        app.lock.acquire()
+        app.tick_processor.on_bar(symbol, time_frame, bar, app)
+        app.lock.release()
+
+    """
+    # lock that the QuickFIX thread holds while it updates the history of a symbol
+    """
+    def symbol_lock(self, symbol):
+        return _NO_LOCK
+
+    def stop(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class conflating_dispatcher(sync_dispatcher):
+
+    """
+    # the order book is updated immediately on the QuickFIX thread. on_tick() is called
+    # from the dispatcher thread for every symbol with pending updates, so it always sees
+    # the latest state, but not every intermediate one.
+    # prices can change while on_tick() runs. copy the values that have to be consistent.
+    # execution reports and closed bars are not conflated. on_execution_report() and on_bar()
+    # are called from the dispatcher thread for every report / bar, in the order in which they
+    # were received, before the pending ticks.
+    # stop() delivers the pending reports, bars and ticks before the thread exits.
+    """
+    def __init__(self, app):
+
+        super().__init__(app)
+        self._condition = Condition()
+        self._pending = {}  # format: 'EURUSD': None (dict to keep the arrival order)
+        self._bars = []     # format: [(symbol, time_frame, bar), ...]
+        self._reports = []  # format: [execution_report, ...]
+        self._running = True
+
+        self.num_updates = 0      # ticks received
+        self.num_dispatched = 0   # on_tick() calls
+        self.num_conflated = 0    # ticks merged into a pending call
+        self.num_bars = 0         # on_bar() calls
+        self.num_reports = 0      # on_execution_report() calls
+
+        self._thread = Thread(target=self._run, name='dwx_conflating_dispatcher', daemon=True)
+        self._thread.start()
+
+    ##########################################################################
+
+    def dispatch_tick(self, symbol):
+
+        with self._condition:
+            self.num_updates += 1
+            if symbol in self._pending:
+                self.num_conflated += 1
+                return
+            self._pending[symbol] = None
+            self._condition.notify()
+
+    def dispatch_bar(self, symbol, time_frame, bar):
+
+        with self._condition:
+            self._bars.append((symbol, time_frame, bar))
+            self._condition.notify()
+
+    def dispatch_execution_report(self, report):
+
+        with self._condition:
+            self._reports.append(report)
+            self._condition.notify()
+
+    def _has_work(self):
+        return len(self._pending) > 0 or len(self._bars) > 0 or len(self._reports) > 0
+
+    def _run(self):
+
+        processor = self.app.tick_processor
+        while True:
+
+            with self._condition:
+                while self._running and not self._has_work():
+                    self._condition.wait()
+                if not self._has_work():
+                    return
+                symbols = list(self._pending)
+                self._pending.clear()
+                bars, self._bars = self._bars, []
+                reports, self._reports = self._reports, []
+
+            for report in reports:
+                self._deliver(f'on_execution_report({report.ClOrdID})', 
+                              processor.on_execution_report, report)
+                self.num_reports += 1
+
+            for symbol, time_frame, bar in bars:
+                self._deliver(f'on_bar({symbol}, {time_frame})', 
+                              processor.on_bar, symbol, time_frame, bar)
+                self.num_bars += 1
+
+            for symbol in symbols:
+                self._deliver(f'on_tick({symbol})', processor.on_tick, symbol)
+                self.num_dispatched += 1
+
+    def _deliver(self, name, callback, *args):
+
+        app = self.app
+        app.lock.acquire()
+        try:
+            callback(*args, app)
+        except Exception as e:
+            print(f'[ERROR] {name} failed: {e}')
+        finally:
+            app.lock.release()
+
+    """
+    # deliver the pending reports, bars and ticks and stop the thread
+    """
+    def stop(self):
+
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def stats(self):
+        return {'updates': self.num_updates,
+                'dispatched': self.num_dispatched,
+                'conflated': self.num_conflated,
+                'bars': self.num_bars,
+                'reports': self.num_reports,
+                'pending': len(self._pending)}
+
+    ##########################################################################
+
+
+##############################################################################
+
+# events of the queued_dispatcher. published: perf_counter() when the event was queued. 
+
+class tick_event():
+
+    __slots__ = ('symbol', 'published')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.published = perf_counter()
+
+    def deliver(self, app):
+        app.tick_processor.on_tick(self.symbol, app)
+
+
+class bar_event():
+
+    __slots__ = ('symbol', 'time_frame', 'bar', 'published')
+
+    def __init__(self, symbol, time_frame, bar):
+        self.symbol = symbol
+        self.time_frame = time_frame
+        self.bar = bar
+        self.published = perf_counter()
+
+    def deliver(self, app):
+        app.tick_processor.on_bar(self.symbol, self.time_frame, self.bar, app)
+
+
+class execution_event():
+
+    __slots__ = ('report', 'published')
+
+    def __init__(self, report):
+        self.report = report
+        self.published = perf_counter()
+
+    def deliver(self, app):
+        app.tick_processor.on_execution_report(self.report, app)
+
+
+class queued_dispatcher():
+
+    """
+    # workers: number of threads that deliver the tick and bar events. 
+    #     the tick_processor is called under app.lock, so more than one worker gives no 
+    #     parallelism: the callbacks still run one at a time, and the ticks of a symbol can be 
+    #     delivered out of order. use 1, or a sharded_dispatcher for parallel callbacks. 
+    # execution reports have their own queue and thread and are delivered in the order 
+    # in which they were received. they are never dropped. 
+    # app.lock is not held by the QuickFIX thread, which changes app.open_orders while the 
+    # callbacks run. iterate over app.open_orders.snapshot() (see order_store.py). 
+    # queue_size: maximum number of queued tick and bar events. 
+    # full_policy: what the QuickFIX thread does if the queue is full. 
+    #     'drop': drop the event (counted in stats()['dropped']). on_tick() reads the current 
+    #         state of the book, so the next delivered tick of the symbol has the latest prices. 
+    #     'block': wait until a worker has taken an event. a slow tick_processor then stalls the 
+    #         QuickFIX thread, which can delay the heartbeats until the server disconnects. 
+    """
+    def __init__(self, app, workers=1, queue_size=100000, full_policy='drop'):
+
+        if workers < 1:
+            raise ValueError(f'Invalid number of dispatcher workers: {workers}')
+
+        self._init(app, full_policy)
+        self._events = Queue(maxsize=queue_size)
+        for i in range(workers):
+            self._add_worker(self._events, 'events', f'dwx_dispatcher_{i}')
+        self._start()
+
+    def _init(self, app, full_policy):
+
+        if full_policy not in ('block', 'drop'):
+            raise ValueError(f'Invalid full_policy: {full_policy}')
+
+        self.app = app
+        self.full_policy = full_policy
+        self._executions = Queue()
+        self._workers = []  # format: (thread, queue)
+
+        # counters of the QuickFIX thread
+        self.num_published = 0
+        self.num_dropped = 0
+        self.num_blocked = 0
+        self.max_queue_depth = 0
+
+        # counters of each worker, summed in stats(). latency: seconds from publishing an event 
+        # until its delivery starts. 
+        self._counters = []  # format: (channel, [delivered, total latency, max latency, errors])
+
+    def _add_worker(self, queue, channel, name):
+        counters = [0, 0., 0., 0]
+        thread = Thread(target=self._run, args=(queue, counters), name=name, daemon=True)
+        self._workers.append((thread, queue))
+        self._counters.append((channel, counters))
+
+    def _start(self):
+        self._add_worker(self._executions, 'executions', 'dwx_dispatcher_executions')
+        self._running = True
+        for thread, _ in self._workers:
+            thread.start()
+
+    ##########################################################################
+
+    def dispatch_tick(self, symbol):
+        self._publish(tick_event(symbol), self._events)
+
+    def dispatch_bar(self, symbol, time_frame, bar):
+        self._publish(bar_event(symbol, time_frame, bar), self._events)
+
+    def dispatch_execution_report(self, report):
+        self._executions.put(execution_event(report))
+
+    def symbol_lock(self, symbol):
+        return _NO_LOCK
+
+    def _publish(self, event, queue):
+
+        self.num_published += 1
+        try:
+            queue.put_nowait(event)
+        except Full:
+            if self.full_policy == 'drop':
+                self.num_dropped += 1
+                return
+            self.num_blocked += 1
+            queue.put(event)
+
+        depth = queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    """
+    # lock that is held while an event is delivered
+    """
+    def _lock(self, event):
+        return self.app.lock
+
+    def _run(self, queue, counters):
+
+        app = self.app
+        while True:
+
+            event = queue.get()
+            if event is _STOP:
+                return
+
+            with self._lock(event):
+                try:
+                    waited = perf_counter() - event.published
+                    counters[0] += 1
+                    counters[1] += waited
+                    if waited > counters[2]:
+                        counters[2] = waited
+                    event.deliver(app)
+                except Exception as e:
+                    counters[3] += 1
+                    print(f'[ERROR] {type(event).__name__} delivery failed: {e}')
+
+    """
+    # deliver all queued events and stop the threads
+    """
+    def stop(self, timeout=None):
+
+        if not self._running:
+            return
+        self._running = False
+
+        for _, queue in self._workers:
+            queue.put(_STOP)
+        for thread, _ in self._workers:
+            thread.join(timeout)
+
+    def _event_queues(self):
+        return [self._events]
+
+    def stats(self):
+
+        channels = {}  # format: channel: [delivered, total latency, max latency, errors]
+        for channel, counters in self._counters:
+            total = channels.setdefault(channel, [0, 0., 0., 0])
+            total[0] += counters[0]
+            total[1] += counters[1]
+            total[2] = max(total[2], counters[2])
+            total[3] += counters[3]
+
+        stats = {'queue_depth': sum(queue.qsize() for queue in self._event_queues()),
+                 'execution_queue_depth': self._executions.qsize(),
+                 'max_queue_depth': self.max_queue_depth,
+                 'published': self.num_published,
+                 'dropped': self.num_dropped,
+                 'blocked': self.num_blocked,
+                 'errors': sum(errors for _, _, _, errors in channels.values())}
+        for channel, (delivered, total, maximum, _) in channels.items():
+            stats[f'{channel}_delivered'] = delivered
+            stats[f'{channel}_mean_latency'] = total / delivered if delivered > 0 else 0.
+            stats[f'{channel}_max_latency'] = maximum
+        return stats
+
+    ##########################################################################
+
+
+class sharded_dispatcher(queued_dispatcher):
+
+    """
+    # the symbols are distributed over shards. every shard has its own queue, worker thread 
+    # and lock, so on_tick() / on_bar() of different shards run in parallel and the ticks of 
+    # a symbol are delivered in order. 
+    # shards: number of shards (the symbols are assigned round robin in the order of their 
+    #     first tick), or a list of symbol groups, e.g. [['EUR/USD', 'GBP/USD'], ['USD/JPY']]. 
+    #     symbols that are not in a group are assigned round robin. 
+    # execution reports are delivered in order by their own thread, holding the lock of the 
+    # shard of report.Symbol (all shard locks if the symbol is not known). 
+    # the QuickFIX thread holds the lock of a shard while it updates the histories of its 
+    # symbols (see symbol_lock()), so the callbacks see consistent books and tick stores. 
+    # a slow callback delays the updates of the symbols of its shard. 
+    # app.lock is not used: code in the tick_processor that changes state shared between 
+    # shards has to synchronize it itself. app.open_orders is changed on the QuickFIX thread, 
+    # iterate over app.open_orders.snapshot() (see order_store.py). 
+    # queue_size / full_policy: per shard, as in queued_dispatcher. 
+    """
+    def __init__(self, app, shards=4, queue_size=100000, full_policy='drop'):
+
+        groups = [] if isinstance(shards, int) else [list(group) for group in shards]
+        num_shards = shards if isinstance(shards, int) else len(groups)
+        if num_shards < 1:
+            raise ValueError(f'Invalid number of dispatcher shards: {shards}')
+
+        self._init(app, full_policy)
+        self._shard_of = {symbol: i for i, group in enumerate(groups) for symbol in group}  # format: 'EURUSD': shard
+        self._next_shard = 0
+        self.locks = [Lock() for _ in range(num_shards)]
+        self._queues = [Queue(maxsize=queue_size) for _ in range(num_shards)]
+        for i, queue in enumerate(self._queues):
+            self._add_worker(queue, 'events', f'dwx_dispatcher_shard_{i}')
+        self._all_locks = _all_locks(self.locks)
+        self._updating = False   # True while the QuickFIX thread holds a shard lock
+        self._deferred_bars = []  # format: [(symbol, time_frame, bar), ...]
+        self._start()
+
+    ##########################################################################
+
+    """
+    # shard of a symbol, assigned on first use
+    """
+    def shard(self, symbol):
+
+        shard = self._shard_of.get(symbol)
+        if shard is None:
+            shard = self._next_shard % len(self.locks)
+            self._next_shard += 1
+            self._shard_of[symbol] = shard
+        return shard
+
+    def dispatch_tick(self, symbol):
+        self._publish(tick_event(symbol), self._queues[self.shard(symbol)])
+
+    def dispatch_bar(self, symbol, time_frame, bar):
+
+        # bars closed by an update are published after the shard lock is released, so a full 
+        # queue with full_policy 'block' cannot deadlock with the worker of the shard. 
+        if self._updating:
+            self._deferred_bars.append((symbol, time_frame, bar))
+            return
+        self._publish(bar_event(symbol, time_frame, bar), self._queues[self.shard(symbol)])
+
+    def symbol_lock(self, symbol):
+        return _shard_update(self, self.locks[self.shard(symbol)])
+
+    def _end_update(self):
+
+        self._updating = False
+        if len(self._deferred_bars) > 0:
+            bars, self._deferred_bars = self._deferred_bars, []
+            for symbol, time_frame, bar in bars:
+                self.dispatch_bar(symbol, time_frame, bar)
+
+    def _lock(self, event):
+
+        if isinstance(event, execution_event):
+            shard = self._shard_of.get(event.report.Symbol)
+            return self._all_locks if shard is None else self.locks[shard]
+        return self.locks[self._shard_of[event.symbol]]
+
+    def _event_queues(self):
+        return self._queues
+
+    def stats(self):
+        stats = super().stats()
+        stats['shard_queue_depths'] = [queue.qsize() for queue in self._queues]
+        return stats
+
+    ##########################################################################
+
+
+class _shard_update():
+
+    # held by the QuickFIX thread while it updates the history of a symbol (sharded_dispatcher). 
+
+    __slots__ = ('dispatcher', 'lock')
+
+    def __init__(self, dispatcher, lock):
+        self.dispatcher = dispatcher
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.dispatcher._updating = True
+
+    def __exit__(self, *args):
+        self.lock.release()
+        self.dispatcher._end_update()
+
+
+class _all_locks():
+
+    # acquired in a fixed order, so it cannot deadlock with the shard workers (one lock each). 
+
+    def __init__(self, locks):
+        self.locks = locks
+
+    def __enter__(self):
+        for lock in self.locks:
+            lock.acquire()
+
+    def __exit__(self, *args):
+        for lock in reversed(self.locks):
+            lock.release()
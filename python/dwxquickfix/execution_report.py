@@ -6,11 +6,16 @@
     execution_report - A data structure to hold execution reports
 """
 
+from dwxquickfix.helpers import ns_to_str
+
+
 class execution_report():
     
     # Side: 1=buy, 2=sell
+    # Price: price of the order (44), AvgPx: average price of the fills so far (6)
+    # TransactTime: epoch nanoseconds
     def __init__(self, ClOrdID, Symbol, Side, Price, OrdType, 
-                 OrdStatus, OrderQty, MinQty, CumQty, LeavesQty):
+                 OrdStatus, OrderQty, MinQty, CumQty, LeavesQty, TransactTime=None, AvgPx=None):
 
         self.ClOrdID = ClOrdID
         self.Symbol = Symbol
@@ -22,8 +27,11 @@ class execution_report():
         self.MinQty = MinQty
         self.CumQty = CumQty
         self.LeavesQty = LeavesQty
+        self.TransactTime = TransactTime
+        self.AvgPx = AvgPx
 
     def __str__(self):
         return (f'ClOrdID: {self.ClOrdID}, symbol: {self.Symbol}, Side: {self.Side}, Price: {self.Price}, '
                 f'OrdType: {self.OrdType}, OrdStatus: {self.OrdStatus}, OrderQty: {self.OrderQty}, '
-                f'MinQty: {self.MinQty}, CumQty: {self.CumQty}, LeavesQty: {self.LeavesQty}')
+                f'MinQty: {self.MinQty}, CumQty: {self.CumQty}, LeavesQty: {self.LeavesQty}, '
+                f'AvgPx: {self.AvgPx}, TransactTime: {ns_to_str(self.TransactTime)}')
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+    execution_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    execution_store - A bounded, columnar store of the execution reports
+
+    one row per report in fixed-width NumPy columns (a tick_store). the symbols are stored as
+    their symbol_registry ids, Side, OrdType and OrdStatus as the code of their character
+    (e.g. ord('2') for filled, 0 if not set). the oldest rows are evicted beyond the capacity.
+    ClOrdIDs that are not ints >= 0 (e.g. custom strings) are stored as negative codes -1, -2, ...
+
+    the queries and aggregates work on the columns without creating execution_report objects.
+    the aggregates only see the reports that are still in the store.
+"""
+
+import numpy as np
+
+from dwxquickfix.tick_store import tick_store
+from dwxquickfix.execution_report import execution_report
+
+
+EXECUTION_COLUMNS = (('time', np.int64),        # TransactTime, epoch ns
+                     ('ClOrdID', np.int64),     # negative: code of a ClOrdID that is not an int
+                     ('symbol', np.int32),      # symbol_registry id
+                     ('side', np.uint8),        # ord('1') buy, ord('2') sell
+                     ('price', np.float64),     # Price (44) of the order, NaN if not set
+                     ('ord_type', np.uint8),
+                     ('status', np.uint8),
+                     ('order_qty', np.int64),
+                     ('min_qty', np.int64),
+                     ('cum_qty', np.int64),
+                     ('leaves_qty', np.int64),
+                     ('avg_px', np.float64))    # AvgPx (6), average price of the fills so far, NaN if not set
+
+SELL = ord('2')
+REJECTED = ord('8')
+
+
+def _code(value):
+    return ord(value) if value else 0
+
+
+def _char(code):
+    return chr(code) if code else None
+
+
+class execution_store():
+
+    """
+    # registry: symbol_registry of the application, to store the symbols as ids.
+    # capacity: maximum number of reports that are kept.
+    """
+    def __init__(self, registry, capacity=100000):
+
+        self.registry = registry
+        self.store = tick_store(EXECUTION_COLUMNS, capacity)
+
+        # ClOrdIDs that are not ints. they are kept for the lifetime of the store.
+        self._other_ClOrdIDs = []     # format: -code - 1: ClOrdID
+        self._other_codes = {}        # format: ClOrdID: code
+
+    ##########################################################################
+
+    def _ClOrdID_code(self, ClOrdID, add=True):
+
+        if isinstance(ClOrdID, (int, np.integer)) and ClOrdID >= 0:
+            return ClOrdID
+        code = self._other_codes.get(ClOrdID)
+        if code is None and add:
+            self._other_ClOrdIDs.append(ClOrdID)
+            code = self._other_codes[ClOrdID] = -len(self._other_ClOrdIDs)
+        return code
+
+    def _ClOrdID(self, code):
+        return code if code >= 0 else self._other_ClOrdIDs[-code - 1]
+
+    def append(self, report):
+
+        self.store.append(report.TransactTime or 0,
+                          self._ClOrdID_code(report.ClOrdID),
+                          self.registry.add(report.Symbol) if report.Symbol else -1,
+                          _code(report.Side),
+                          np.nan if report.Price is None else report.Price,
+                          _code(report.OrdType),
+                          _code(report.OrdStatus),
+                          report.OrderQty or 0,
+                          report.MinQty or 0,
+                          report.CumQty or 0,
+                          report.LeavesQty or 0,
+                          np.nan if report.AvgPx is None else report.AvgPx)
+
+    def __len__(self):
+        return len(self.store)
+
+    """
+    # store[-1] is the last report as an execution_report, store[-10:] a list of them,
+    # as with the list it replaces. the values are Python types (tick_store rows use .item()).
+    """
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        row = self.store[i]
+        return execution_report(self._ClOrdID(row['ClOrdID']),
+                                self.registry.symbol(row['symbol']) if row['symbol'] >= 0 else None,
+                                _char(row['side']),
+                                None if np.isnan(row['price']) else row['price'],
+                                _char(row['ord_type']),
+                                _char(row['status']),
+                                row['order_qty'], row['min_qty'], row['cum_qty'], row['leaves_qty'],
+                                row['time'],
+                                None if np.isnan(row['avg_px']) else row['avg_px'])
+
+    ##########################################################################
+
+    """
+    # columns (copies) of the reports with all given values. start/end: epoch ns, end exclusive.
+    # symbol / status are given as in the reports, e.g. query(symbol='EUR/USD', status='8').
+    """
+    def query(self, ClOrdID=None, symbol=None, status=None, start=None, end=None):
+
+        columns = self.store.columns()
+        mask = np.ones(len(self.store), dtype=bool)
+
+        if ClOrdID is not None:
+            code = self._ClOrdID_code(ClOrdID, add=False)
+            mask &= columns['ClOrdID'] == (code if code is not None else np.iinfo(np.int64).min)
+        if symbol is not None:
+            mask &= columns['symbol'] == self._symbol_id(symbol)
+        if status is not None:
+            mask &= columns['status'] == _code(status)
+        if start is not None:
+            mask &= columns['time'] >= start
+        if end is not None:
+            mask &= columns['time'] < end
+
+        return {name: column[mask] for name, column in columns.items()}
+
+    def _symbol_id(self, symbol):
+        symbol_id = self.registry.symbol_id(symbol)
+        return -2 if symbol_id is None else symbol_id
+
+    """
+    # one report per order (columns): the one with the highest CumQty, the latest of them if equal.
+    # a cancel after a partial fill is reported with CumQty 0, so the last report is not used. 
+    """
+    def order_fills(self):
+
+        columns = self.store.columns()
+        ids = columns['ClOrdID']
+        order = np.lexsort((np.arange(len(ids)), columns['cum_qty'], ids))
+        ids = ids[order]
+        last = order[np.append(ids[1:] != ids[:-1], True)] if len(ids) > 0 else order
+        return {name: column[last] for name, column in columns.items()}
+
+    ##########################################################################
+
+    # aggregates per symbol: {symbol: value}, for the symbols with reports
+
+    def _per_symbol(self, symbol_ids, weights=None):
+
+        valid = symbol_ids >= 0
+        counts = np.bincount(symbol_ids[valid], minlength=len(self.registry))
+        sums = counts if weights is None else np.bincount(symbol_ids[valid], weights=weights[valid], 
+                                                          minlength=len(self.registry))
+        return {self.registry.symbol(i): sums[i].item() for i in np.flatnonzero(counts)}
+
+    """
+    # number of rejected reports (OrdStatus 8)
+    """
+    def reject_counts(self):
+        columns = self.store.columns()
+        return self._per_symbol(columns['symbol'][columns['status'] == REJECTED])
+
+    """
+    # filled quantity of the orders, signed=True: buys - sells
+    """
+    def traded_volume(self, signed=False):
+
+        fills = self.order_fills()
+        quantity = fills['cum_qty']
+        if signed:
+            quantity = np.where(fills['side'] == SELL, -quantity, quantity)
+        return self._per_symbol(fills['symbol'], quantity)
+
+    """
+    # quantity weighted average fill price. the AvgPx of an order's report with the highest
+    # CumQty is the average price of its fills, weighted by CumQty.
+    """
+    def average_fill_price(self):
+
+        fills = self.order_fills()
+        filled = (fills['cum_qty'] > 0) & ~np.isnan(fills['avg_px'])
+        symbols, quantity = fills['symbol'][filled], fills['cum_qty'][filled]
+        notional = self._per_symbol(symbols, fills['avg_px'][filled] * quantity)
+        volume = self._per_symbol(symbols, quantity)
+        return {symbol: notional[symbol] / volume[symbol] for symbol in notional if volume[symbol] > 0}
+
+    """
+    # share of the orders (ClOrdIDs) with a fill
+    """
+    def fill_rate(self):
+
+        fills = self.order_fills()
+        orders = self._per_symbol(fills['symbol'])
+        filled = self._per_symbol(fills['symbol'][fills['cum_qty'] > 0])
+        return {symbol: filled.get(symbol, 0) / n for symbol, n in orders.items()}
+
+    ##########################################################################
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+    field_extractor.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    field_extractor - Extracts a declared set of fields from a FIX message in one pass
+
+    extract_message_field_value() creates a field object and makes several QuickFIX calls
+    for every field. field_extractor serializes the message once (message.toString()) and
+    reads all declared tags while splitting it on the SOH delimiter.
+    the raw buffer is not suitable for messages with binary data fields (e.g. 96 RawData),
+    which may contain the delimiter.
+"""
+
+from dwxquickfix.helpers import str_to_datetime, fix_time_to_ns
+
+
+"""
+# int of a field value, None if invalid. quantities can have decimals, e.g. 14=0.0
+"""
+def to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+"""
+# float of a field value, None if invalid
+"""
+def to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# same types as in extract_message_field_value()
+_CONVERTERS = {'': str,
+               'str': str,
+               'int': to_int,
+               'float': to_float,
+               'datetime': str_to_datetime,
+               'ns': fix_time_to_ns}
+
+
+class field_extractor():
+
+    """
+    # fields: {tag: (name, type)}, type: '', 'str', 'int', 'float', 'datetime' or 'ns' (epoch nanoseconds).
+    # group_tag: first tag of a repeating group entry (e.g. 302 QuoteSetID in a MassQuote).
+    #     the fields of every entry are returned separately from the message fields.
+    # fields that are not in the message are None. if a tag occurs more than once
+    # (in the message or in one group entry), the first occurrence is used.
+    """
+    def __init__(self, fields, group_tag=None):
+
+        self.fields = {str(tag): (name, _CONVERTERS[type]) for tag, (name, type) in fields.items()}
+        self.group_tag = None if group_tag is None else str(group_tag)
+        self._empty = {name: None for name, _ in self.fields.values()}
+
+    ##########################################################################
+
+    """
+    # message fields as a dictionary, e.g. {'ClOrdID': 12, 'Symbol': 'EUR/USD', ...}
+    """
+    def extract(self, message):
+        return self.parse(message.toString())[0]
+
+    """
+    # (message fields, list of group entry fields)
+    """
+    def extract_groups(self, message):
+        return self.parse(message.toString())
+
+    """
+    # same as extract_groups() for a raw FIX string (SOH delimited)
+    """
+    def parse(self, raw):
+
+        fields = self.fields
+        group_tag = self.group_tag
+        values = self._empty.copy()
+        groups = []
+        current = values
+
+        for field in raw.split('\x01'):
+            tag, _, value = field.partition('=')
+            if tag == group_tag:
+                current = self._empty.copy()
+                groups.append(current)
+            declared = fields.get(tag)
+            if declared is not None and current[declared[0]] is None:
+                current[declared[0]] = declared[1](value)
+
+        return values, groups
+
+    ##########################################################################
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+    fix_journal.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    fix_journal - Binary append-only journal of the raw FIX messages of both sessions
+
+    File layout (little endian):
+        header:  magic 'DWXJ' | uint16 schema version | uint16 reserved
+        records: int64 receive/send time (epoch ns) | uint32 message length |
+                 uint8 callback (see CALLBACKS) | uint8 session (see SESSIONS) | message (utf-8)
+
+    the records are read through a memory map (read_fix_journal()), so large journals
+    are not loaded into memory. see replay.journal_replay to feed them through an application.
+"""
+
+import os
+import mmap
+import struct
+from time import time_ns
+
+from dwxquickfix.async_writer import async_writer
+
+
+MAGIC = b'DWXJ'
+SCHEMA_VERSION = 1
+
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<qIBB')
+
+CALLBACKS = ('fromApp', 'fromAdmin', 'toApp', 'toAdmin')
+SESSIONS = ('', 'Quote', 'Trade')  # SessionQualifier, '' if unknown
+
+FROM_APP, FROM_ADMIN, TO_APP, TO_ADMIN = range(4)
+
+
+class fix_journal():
+
+    """
+    # appends the messages to path. an existing journal is continued.
+    # writer: async_writer that writes the records. if None, the journal starts its own.
+    """
+    def __init__(self, path, writer=None, buffer_size=65536):
+
+        self.path = path
+        self._own_writer = writer is None
+        self.writer = async_writer() if writer is None else writer
+        self._sessions = {}  # format: sessionID.toString(): session code
+        self.num_records = 0
+
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                _parse_header(f.read(HEADER.size), path)
+            self._file = open(path, 'ab', buffering=buffer_size)
+            self._truncate_partial_record()
+        else:
+            self._file = open(path, 'ab', buffering=buffer_size)
+            self._file.write(HEADER.pack(MAGIC, SCHEMA_VERSION, 0))
+
+        self.writer.register(self._file)
+
+    """
+    # a record that was only partially written (e.g. on a crash) is removed.
+    """
+    def _truncate_partial_record(self):
+
+        end = HEADER.size
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for _, _, _, _, end in _scan(data, self.path):
+                pass
+        if os.path.getsize(self.path) > end:
+            self._file.truncate(end)
+
+    ##########################################################################
+
+    """
+    # remember the SessionQualifier ('Quote' or 'Trade') of a session, called in onCreate()
+    """
+    def add_session(self, sessionID, qualifier):
+        self._sessions[sessionID.toString()] = SESSIONS.index(qualifier) if qualifier in SESSIONS else 0
+
+    """
+    # journal a message of a callback (FROM_APP, FROM_ADMIN, TO_APP or TO_ADMIN).
+    # only the timestamp and the raw string are taken here, the record is packed on the writer thread.
+    # the records are never dropped, even if the writer drops writes when it is full.
+    """
+    def record(self, callback, message, sessionID):
+        self.writer.submit(self._write, time_ns(), callback, self._sessions.get(sessionID.toString(), 0),
+                           message.toString(), block=True)
+
+    def _write(self, time, callback, session, raw):
+        data = raw.encode('utf-8')
+        self._file.write(RECORD.pack(time, len(data), callback, session))
+        self._file.write(data)
+        self.num_records += 1
+
+    """
+    # write the pending records and close the file
+    """
+    def close(self):
+
+        if self._own_writer:
+            self.writer.stop()
+        else:
+            self.writer.submit(self._close, block=True)
+            return
+        self._close()
+
+    def _close(self):
+        self.writer.unregister(self._file)
+        if not self._file.closed:
+            self._file.close()
+
+    ##########################################################################
+
+
+def _parse_header(data, path):
+
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is not a FIX journal (header too short).')
+
+    magic, version, _ = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a FIX journal (magic: {magic}).')
+    if version != SCHEMA_VERSION:
+        raise ValueError(f'FIX journal {path} has schema version {version}, expected {SCHEMA_VERSION}.')
+
+
+"""
+# (time_ns, callback, session, begin, end) of the complete records in a memory-mapped journal.
+# data[begin:end] is the message.
+"""
+def _scan(data, path):
+
+    _parse_header(data[:HEADER.size], path)
+    offset, size = HEADER.size, len(data)
+    while offset + RECORD.size <= size:
+        time, length, callback, session = RECORD.unpack_from(data, offset)
+        begin = offset + RECORD.size
+        offset = begin + length
+        if offset > size:
+            return  # partial last record
+        yield time, callback, session, begin, offset
+
+
+"""
+# iterate over the messages of a journal as (time_ns, callback, session, raw message) tuples,
+# e.g. (1620122405500000000, 'fromApp', 'Quote', '8=FIX.4.4\x019=...').
+# start/end: epoch ns to read only start <= time < end (None = open ended).
+# callbacks: e.g. ('fromApp', 'fromAdmin') to read only the inbound messages.
+"""
+def read_fix_journal(path, start=None, end=None, callbacks=None):
+
+    if os.path.getsize(path) <= HEADER.size:
+        return
+
+    codes = None if callbacks is None else set(CALLBACKS.index(callback) for callback in callbacks)
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for time, callback, session, begin, end_offset in _scan(data, path):
+            if ((start is not None and time < start) or (end is not None and time >= end) 
+                    or (codes is not None and callback not in codes)):
+                continue
+            yield time, CALLBACKS[callback], SESSIONS[session], data[begin:end_offset].decode('utf-8')
@@ -7,56 +7,95 @@
 """
 
 from os.path import join
-import logging
 from pathlib import Path
+from time import time_ns
 
-import quickfix as fix
+import numpy as np
 
-from dwxquickfix.helpers import log, setup_logger, extract_message_field_value
+from dwxquickfix.tick_store import tick_store, TICK_COLUMNS, TOB_COLUMNS
+from dwxquickfix.bar_builder import bar_builder
+from dwxquickfix.history_archive import history_archive
+from dwxquickfix.order_book import order_book
+from dwxquickfix.history_index import read_history_range, to_ns
+from dwxquickfix.rolling_stats import rolling_stats
 
 
 class history():
     
-    def __init__(self, _symbol, store_all_ticks=True, save_history_to_files=True):
+    """
+    # store_all_ticks: True (or 'list') to keep all ticks in lists of dicts, 
+    # 'array' to keep them in bounded NumPy ring buffers (see tick_store), False to not store them.
+    # tick_store_capacity / tick_store_window: maximum rows / age in seconds kept by the ring buffers. 
+    # bar_time_frames: time frames of the bars built from the top of book, e.g. ('1s', '1m', '5m'). 
+    # bar_callback(symbol, time_frame, bar) is called when a bar is closed. 
+    # history_file_format: 'csv' (text logs) or 'binary' (fixed-width records, see tick_file). 
+    # writer: optional async_writer to write the history files off the calling thread. 
+    # book_depth: number of order book levels preallocated per side. 
+    # rollover: 'HH:MM:SS' (UTC) to start a new history file every session day, None for one file per symbol. 
+    # compress_history_files / catalog: gzip the closed daily files and add them to a history_catalog. 
+    # rolling_stats_window: window in seconds of the rolling statistics of the top of book, None to disable. 
+    # rolling_stats_alpha: weight of the newest tick in the EWMA mid price and spread. 
+    # registry / symbol_id: symbol_registry whose top of book arrays are updated with this symbol's. 
+    """
+    def __init__(self, _symbol, store_all_ticks=True, save_history_to_files=True, 
+                 tick_store_capacity=100000, tick_store_window=None, 
+                 bar_time_frames=None, max_bars=1000, bar_callback=None, 
+                 history_file_format='csv', writer=None, book_depth=10, 
+                 rollover=None, compress_history_files=True, catalog=None, 
+                 rolling_stats_window=None, rolling_stats_alpha=0.05, 
+                 registry=None, symbol_id=None):
         
         self.symbol = _symbol
         self.save_history_to_files = save_history_to_files
         self.store_all_ticks = store_all_ticks
+        self._store_arrays = store_all_ticks == 'array'
+        self._binary_files = history_file_format == 'binary'
+        self._file_extension = '.ticks' if self._binary_files else '.log'
+        self._rotate_files = rollover is not None
 
-        # current bid/ask values depending on depth. top of book is self.BID[0]. 
-        self.BID = {}
-        self.ASK = {}
-        self.BID_SIZE = {}
-        self.ASK_SIZE = {}
+        # current bid/ask values depending on depth. top of book is the lowest depth with a price. 
+        self.book = order_book(self.symbol, book_depth)
         self.BID_TOB = 0
         self.ASK_TOB = 0
-        self._lowest_bid_depth = -1
-        self._lowest_ask_depth = -1
+        self.registry = registry
+        self.symbol_id = symbol_id
         
         self.HISTORY_DIR = 'history'
         Path(self.HISTORY_DIR).mkdir(parents=True, exist_ok=True)
 
-        self.HISTORY_FILE = f"{self.symbol.replace('/', '')}.log"
-        self.HISTORY_FILE_TOB = f"{self.symbol.replace('/', '')}_TOB.log"
+        self.HISTORY_FILE = f"{self.symbol.replace('/', '')}{self._file_extension}"
+        self.HISTORY_FILE_TOB = f"{self.symbol.replace('/', '')}_TOB{self._file_extension}"
+
+        # writers of the history files, see history_archive.py
+        self.archive = None
+        self.archive_tob = None
+        self.catalog = catalog
+
+        if self.save_history_to_files:
+            self.archive = history_archive(self.HISTORY_DIR, self.symbol, False, history_file_format, 
+                                           rollover, compress_history_files, catalog, writer)
+            self.archive_tob = history_archive(self.HISTORY_DIR, self.symbol, True, history_file_format, 
+                                               rollover, compress_history_files, catalog, writer)
 
-        self.history_logger = setup_logger('history_logger', 
-                                           join(self.HISTORY_DIR, self.HISTORY_FILE), 
-                                           '%(message)s', 
-                                           level=logging.INFO)
-        self.history_tob_logger = setup_logger('history_tob_logger', 
-                                               join(self.HISTORY_DIR, self.HISTORY_FILE_TOB), 
-                                               '%(message)s', 
-                                               level=logging.INFO)
+        if self._store_arrays:
+            self.HISTORY = tick_store(TICK_COLUMNS, tick_store_capacity, tick_store_window)
+            self.HISTORY_TOB = tick_store(TOB_COLUMNS, tick_store_capacity, tick_store_window)
+        else:
+            self.HISTORY = []
+            self.HISTORY_TOB = []
 
-        log(self.history_logger, 'date_time,depth,bid,ask,bid_size,ask_size')
-        log(self.history_tob_logger, 'date_time,bid,ask')
+        self.bar_builder = None
+        if bar_time_frames:
+            self.bar_builder = bar_builder(self.symbol, bar_time_frames, max_bars, callback=bar_callback)
 
-        self.HISTORY = []
-        self.HISTORY_TOB = []
+        # e.g. self.stats.ewma_mid, self.stats.realized_variance, self.stats.tick_rate (see rolling_stats.py)
+        self.stats = None
+        if rolling_stats_window:
+            self.stats = rolling_stats(rolling_stats_window, rolling_stats_alpha, tick_store_capacity)
                     
     ##########################################################################
     
-    # Update Asset History depending on set fields in the message
+    # Update Asset History depending on set fields in the message. date_time is in epoch nanoseconds. 
     def _update_asset(self, date_time, _symbol, depth, bid, ask, bid_size, ask_size):
         
         """
@@ -66,65 +105,223 @@ class history():
         
         if depth is None or _symbol != self.symbol:
             return
+
+        # without a timestamp, the arrival time keeps the stored times sorted for the range queries. 
+        if date_time is None:
+            date_time = time_ns()
         
-        new_tob_bid, new_tob_ask = False, False
-
-        # replace with current value if there is no update
-        if bid is not None:
-            if depth < self._lowest_bid_depth or self._lowest_bid_depth == -1:
-                self._lowest_bid_depth = depth
-            self.BID[depth] = bid
-            if depth == self._lowest_bid_depth:
-                self.BID_TOB = bid
-                new_tob_bid = True
-        if ask is not None:
-            if depth < self._lowest_ask_depth or self._lowest_ask_depth == -1:
-                self._lowest_ask_depth = depth
-            self.ASK[depth] = ask
-            if depth == self._lowest_bid_depth:
-                self.ASK_TOB = ask
-                new_tob_ask = True
-        if bid_size is not None:
-            self.BID_SIZE[depth] = bid_size
-        if ask_size is not None:
-            self.ASK_SIZE[depth] = ask_size
+        # fields that are None keep their current value
+        book = self.book
+        new_tob_bid, new_tob_ask = book.update(depth, bid, ask, bid_size, ask_size)
+        if new_tob_bid:
+            self.BID_TOB = bid
+        if new_tob_ask:
+            self.ASK_TOB = ask
+        if (new_tob_bid or new_tob_ask) and self.registry is not None:
+            self.registry.set_tob(self.symbol_id, self.BID_TOB, self.ASK_TOB)
+
+        if ((new_tob_bid or new_tob_ask) and self.BID_TOB > 0 and self.ASK_TOB > 0 
+                and (self.bar_builder is not None or self.stats is not None)):
+            if self.bar_builder is not None:
+                self.bar_builder.update(date_time, self.BID_TOB, self.ASK_TOB)
+            if self.stats is not None:
+                self.stats.update(date_time, self.BID_TOB, self.ASK_TOB)
         
         # only save complete ticks
-        if self.BID[depth] is None or self.ASK[depth] is None or self.BID_SIZE[depth] is None or self.ASK_SIZE[depth] is None:
+        if not book.is_complete(depth):
             return
-        
+
+        bid, ask = book.bid_price[depth], book.ask_price[depth]
+        bid_size, ask_size = book.bid_size[depth], book.ask_size[depth]
 
         if self.store_all_ticks:
 
             try:
-                self.HISTORY.append({'date_time': date_time, 'depth': depth, 'bid': 
-                                     self.BID[depth], 'ask': self.ASK[depth], 
-                                    'bid_size': self.BID_SIZE[depth], 
-                                    'ask_size': self.ASK_SIZE[depth]})
-                log(self.history_logger, '{},{},{},{},{},{}'.format(date_time, depth, 
-                                                                    self.BID[depth], self.ASK[depth], 
-                                                                    self.BID_SIZE[depth], 
-                                                                    self.ASK_SIZE[depth]))
+                if self._store_arrays:
+                    self.HISTORY.append(date_time, depth, bid, ask, bid_size, ask_size)
+                else:
+                    self.HISTORY.append({'date_time': date_time, 'depth': depth, 'bid': bid, 'ask': ask, 
+                                         'bid_size': bid_size, 'ask_size': ask_size})
+                if self.archive is not None:
+                    self.archive.write(date_time, depth, bid, ask, bid_size, ask_size)
                 
                 if new_tob_bid or new_tob_ask:
-                    self.HISTORY_TOB.append({'date_time': date_time, 
-                                             'bid': self.BID_TOB, 
-                                             'ask': self.ASK_TOB})
-                    log(self.history_tob_logger, '{},{},{}'.format(date_time, self.BID_TOB, self.ASK_TOB))
+                    self._append_tob(date_time)
 
             except KeyError:
                 pass
+
+    def _append_tob(self, date_time):
+
+        if self._store_arrays:
+            self.HISTORY_TOB.append(date_time, self.BID_TOB, self.ASK_TOB)
+        else:
+            self.HISTORY_TOB.append({'date_time': date_time, 
+                                     'bid': self.BID_TOB, 
+                                     'ask': self.ASK_TOB})
+        if self.archive_tob is not None:
+            self.archive_tob.write(date_time, self.BID_TOB, self.ASK_TOB)
+
+    # Remove a level of one side ('bid' or 'ask') of the book, e.g. an MDUpdateAction delete (279=2). 
+    # if it was the top of book, the next level becomes the top of book (0 if the side is empty). 
+    def _delete_level(self, date_time, _symbol, side, depth):
+
+        if depth is None or _symbol != self.symbol or side not in ('bid', 'ask'):
+            return
+
+        book = self.book
+        if not book.delete(side, depth):
+            return
+
+        if side == 'bid':
+            self.BID_TOB = book.best_bid.item() if book.top_bid_level >= 0 else 0
+        else:
+            self.ASK_TOB = book.best_ask.item() if book.top_ask_level >= 0 else 0
+        if self.registry is not None:
+            self.registry.set_tob(self.symbol_id, self.BID_TOB, self.ASK_TOB)
+
+        if not (self.BID_TOB > 0 and self.ASK_TOB > 0):
+            return
+        if date_time is None:
+            date_time = time_ns()
+
+        if self.bar_builder is not None:
+            self.bar_builder.update(date_time, self.BID_TOB, self.ASK_TOB)
+        if self.stats is not None:
+            self.stats.update(date_time, self.BID_TOB, self.ASK_TOB)
+        if self.store_all_ticks:
+            self._append_tob(date_time)
             
     ##########################################################################
 
+    # time range queries. start/end are datetimes or epoch nanoseconds (None = open ended), 
+    # the end is exclusive. with store_all_ticks='array', the results are zero-copy views. 
+
+    """
+    # ticks in memory with start <= date_time < end. 
+    # a dictionary of column arrays ('array' store) or a list of tick dicts ('list' store). 
+    """
+    def ticks_between(self, start=None, end=None, tob=False):
+
+        store = self.HISTORY_TOB if tob else self.HISTORY
+        start, end = to_ns(start), to_ns(end)
+
+        if self._store_arrays:
+            return store.between(start, end)
+
+        first = 0 if start is None else self._bisect(store, start)
+        last = len(store) if end is None else self._bisect(store, end)
+        return store[first:max(first, last)]
+
+    """
+    # ticks in memory of the last seconds before the newest tick
+    """
+    def last_seconds(self, seconds, tob=True):
+
+        store = self.HISTORY_TOB if tob else self.HISTORY
+
+        if self._store_arrays:
+            return store.last(seconds)
+
+        if len(store) == 0:
+            return []
+        return store[self._bisect(store, store[-1]['date_time'] - int(seconds * 1e9)):]
+
+    """
+    # first position in a list of tick dicts with date_time >= time_ns
+    """
+    @staticmethod
+    def _bisect(store, time_ns):
+
+        low, high = 0, len(store)
+        while low < high:
+            mid = (low + high) // 2
+            if store[mid]['date_time'] < time_ns:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    """
+    # ticks in the history file with start <= date_time < end as a dictionary of column arrays. 
+    # see history_index.py. rows that are still queued in the async writer are written first.
+    """
+    def file_ticks_between(self, start=None, end=None, tob=False):
+
+        archive = self.archive_tob if tob else self.archive
+        if archive is not None:
+            archive.flush()
+
+        if not self._rotate_files:
+            path = join(self.HISTORY_DIR, self.HISTORY_FILE_TOB if tob else self.HISTORY_FILE)
+            return read_history_range(path, start, end)
+
+        # one file per session day
+        start_ns, end_ns = to_ns(start), to_ns(end)
+        paths = self.catalog.files(self.symbol, start_ns, end_ns, tob, 
+                                   'binary' if self._binary_files else 'csv')
+        parts = [read_history_range(path, start_ns, end_ns) for path in paths]
+        if len(parts) == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in (TOB_COLUMNS if tob else TICK_COLUMNS)}
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    ##########################################################################
+
+    # current prices and sizes per depth as {depth: value} dictionaries. 
+    # use self.book for the arrays and order book queries. 
+
+    @property
+    def BID(self):
+        return order_book.levels_to_dict(self.book.bid_price)
+
+    @property
+    def ASK(self):
+        return order_book.levels_to_dict(self.book.ask_price)
+
+    @property
+    def BID_SIZE(self):
+        return order_book.levels_to_dict(self.book.bid_size)
+
+    @property
+    def ASK_SIZE(self):
+        return order_book.levels_to_dict(self.book.ask_size)
+
+    ##########################################################################
+
+    """
+    # flush and close the history files
+    """
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+        if self.archive_tob is not None:
+            self.archive_tob.close()
+
+    ##########################################################################
+
+    """
+    # closed bars of a time frame (oldest first)
+    """
+    def bars(self, time_frame):
+        return self.bar_builder.bars[time_frame]
+
+    """
+    # bar of a time frame that is still open
+    """
+    def current_bar(self, time_frame):
+        return self.bar_builder.current[time_frame]
+
     """
     # Resample the M1 data to a higher time frame
     """
     def resampled_history(self, rate_type='', time_frame=''):
-        from pandas import DataFrame
+        from pandas import DataFrame, to_datetime
         
-        df = DataFrame.from_dict(self.HISTORY)
-        df.index = df.date_time
+        if self._store_arrays:
+            df = DataFrame(self.HISTORY.columns())
+        else:
+            df = DataFrame.from_dict(self.HISTORY)
+        df.index = to_datetime(df.date_time, unit='ns')
         
         return df[rate_type].resample(time_frame).ohlc()
     
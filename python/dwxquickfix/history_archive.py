@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+    history_archive.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    history_archive - Writes the history files of one symbol, optionally rotated per session day
+    history_catalog - Index of the closed (and compressed) daily history files
+
+    without rotation:  history/<SYMBOL>.log, history/<SYMBOL>_TOB.log (.ticks for binary files)
+    with rotation:     history/<SYMBOL>/<YYYYMMDD>.log, history/<SYMBOL>/<YYYYMMDD>_TOB.log, ...
+                       history/catalog.csv
+
+    a session day starts at the rollover time (e.g. EndTime=22:00:00 in the config) of the
+    previous UTC day. closed files are compressed in a background thread and added to the catalog.
+"""
+
+import os
+import csv
+import gzip
+import shutil
+import datetime
+from os.path import join, isfile, getsize
+from threading import Thread, Lock
+
+from dwxquickfix.helpers import ns_to_datetime
+from dwxquickfix.tick_file import tick_file_writer, read_tick_file, RECORD_DEPTH, RECORD_TOB
+from dwxquickfix.history_index import parse_csv_time
+
+
+DAY_NS = 86400 * 1000000000
+
+DEPTH_HEADER = 'date_time,depth,bid,ask,bid_size,ask_size'
+TOB_HEADER = 'date_time,bid,ask'
+
+
+"""
+# seconds after midnight of a 'HH:MM:SS' string
+"""
+def time_str_to_seconds(time_str):
+    hours, minutes, seconds = time_str.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+class history_catalog():
+
+    FIELDS = ['symbol', 'kind', 'day', 'rows', 'first', 'last', 'path']
+
+    """
+    # catalog.csv in history_dir with one line per archived file.
+    # first/last are epoch nanoseconds, path is relative to history_dir.
+    """
+    def __init__(self, history_dir='history'):
+
+        self.history_dir = history_dir
+        self.path = join(history_dir, 'catalog.csv')
+        self._lock = Lock()
+        self.entries = {}  # format: ('EUR/USD', 'depth', '20210504'): entry
+
+        if isfile(self.path):
+            with open(self.path, newline='') as f:
+                for entry in csv.DictReader(f):
+                    self._add_entry(entry)
+
+    def _add_entry(self, entry):
+        entry['rows'] = int(entry['rows'])
+        entry['first'] = int(entry['first'])
+        entry['last'] = int(entry['last'])
+        # a day can be archived again after a restart. the last entry wins.
+        self.entries[(entry['symbol'], entry['kind'], entry['day'])] = entry
+
+    """
+    # add an archived file. thread-safe.
+    """
+    def add(self, symbol, kind, day, rows, first, last, path):
+
+        entry = {'symbol': symbol, 'kind': kind, 'day': day, 'rows': rows,
+                 'first': first, 'last': last, 'path': os.path.relpath(path, self.history_dir)}
+
+        with self._lock:
+            new_file = not isfile(self.path) or getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(entry)
+            self._add_entry(dict(entry))
+
+    ##########################################################################
+
+    """
+    # entries of a symbol that overlap start <= date_time < end (epoch ns, None = open ended), sorted by day.
+    """
+    def find(self, symbol, start=None, end=None, tob=False):
+
+        kind = 'tob' if tob else 'depth'
+        with self._lock:
+            entries = [entry for key, entry in self.entries.items() if key[0] == symbol and key[1] == kind]
+
+        return sorted([entry for entry in entries
+                       if (start is None or entry['last'] >= start) and (end is None or entry['first'] < end)],
+                      key=lambda entry: entry['day'])
+
+    """
+    # paths of the files that may contain start <= date_time < end, sorted by day.
+    # includes the files that are not archived yet (e.g. the current day).
+    # file_format: 'csv', 'binary' or None for both.
+    """
+    def files(self, symbol, start=None, end=None, tob=False, file_format=None):
+
+        paths = [join(self.history_dir, entry['path']) for entry in self.find(symbol, start, end, tob)]
+
+        archived_days = set(entry['day'] for key, entry in self.entries.items()
+                            if key[0] == symbol and key[1] == ('tob' if tob else 'depth'))
+        directory = join(self.history_dir, symbol.replace('/', ''))
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                day, kind, extension = parse_history_file_name(name)
+                if day is not None and day not in archived_days and kind == ('tob' if tob else 'depth'):
+                    paths.append(join(directory, name))
+
+        if file_format == 'csv':
+            paths = [path for path in paths if '.log' in path]
+        elif file_format == 'binary':
+            paths = [path for path in paths if '.ticks' in path]
+        return paths
+
+    ##########################################################################
+
+
+"""
+# ('20210504', 'depth' or 'tob', '.log' or '.ticks') for daily history file names, else (None, None, None).
+# compressed files are not included.
+"""
+def parse_history_file_name(name):
+
+    for extension in ('.log', '.ticks'):
+        if name.endswith(extension):
+            stem = name[:-len(extension)]
+            kind = 'depth'
+            if stem.endswith('_TOB'):
+                stem = stem[:-4]
+                kind = 'tob'
+            if len(stem) == 8 and stem.isdigit():
+                return stem, kind, extension
+    return None, None, None
+
+
+class history_archive():
+
+    """
+    # history_dir: base directory.
+    # tob: True for top of book files.
+    # file_format: 'csv' or 'binary'.
+    # rollover: 'HH:MM:SS' (UTC) at which a new daily file is started, None to use one file.
+    # compress: gzip the closed daily files in a background thread.
+    # catalog: history_catalog to add the closed daily files to.
+    # writer: optional async_writer to write the files off the calling thread.
+    """
+    def __init__(self, history_dir, symbol, tob=False, file_format='csv', rollover=None,
+                 compress=True, catalog=None, writer=None):
+
+        self.history_dir = history_dir
+        self.symbol = symbol
+        self.tob = tob
+        self.kind = 'tob' if tob else 'depth'
+        self.binary = file_format == 'binary'
+        self.compress = compress
+        self.catalog = catalog
+        self.writer = writer
+
+        self._name = symbol.replace('/', '')
+        self._suffix = '_TOB' if tob else ''
+        self._extension = '.ticks' if self.binary else '.log'
+        self._file = None
+        self._threads = []
+
+        self.day = None
+        self.path = None
+
+        if rollover is None:
+            self._next_rollover_ns = None
+            self.path = join(history_dir, f'{self._name}{self._suffix}{self._extension}')
+            self._open()
+        else:
+            # shifts timestamps so that the session day starts at midnight.
+            self._offset_ns = ((86400 - time_str_to_seconds(rollover)) % 86400) * 1000000000
+            self._next_rollover_ns = -1  # the first file is opened with the first tick.
+            self.directory = join(history_dir, self._name)
+            os.makedirs(self.directory, exist_ok=True)
+
+    ##########################################################################
+
+    def _open(self):
+
+        if self.binary:
+            self._file = tick_file_writer(self.path, self.symbol, RECORD_TOB if self.tob else RECORD_DEPTH,
+                                          writer=self.writer)
+            return
+
+        new_file = not isfile(self.path) or getsize(self.path) == 0
+        self._file = open(self.path, 'a', buffering=65536)
+        # the header is only written once per file, not on every restart.
+        if new_file:
+            self._file.write((TOB_HEADER if self.tob else DEPTH_HEADER) + '\n')
+        if self.writer is not None:
+            self.writer.register(self._file)
+
+    """
+    # write one row. depth: (depth, bid, ask, bid_size, ask_size), TOB: (bid, ask).
+    """
+    def write(self, time_ns, *values):
+
+        if self._next_rollover_ns is not None and time_ns >= self._next_rollover_ns:
+            self._rotate(time_ns)
+
+        if self.binary:
+            self._file.write(time_ns, *values)
+            return
+
+        line = ','.join([str(ns_to_datetime(time_ns))] + [str(value) for value in values]) + '\n'
+        if self.writer is not None:
+            self.writer.submit(self._file.write, line)
+        else:
+            self._file.write(line)
+
+    """
+    # make the rows written so far readable. with a writer, wait until it has written them.
+    """
+    def flush(self):
+        if self._file is None:
+            return
+        if self.writer is not None:
+            self.writer.flush()
+        else:
+            self._file.flush()
+
+    """
+    # close the current file. it is not archived, as the day might not be finished.
+    """
+    def close(self):
+
+        if self._file is not None:
+            self._close_file(self._file, None)
+            self._file = None
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    ##########################################################################
+
+    def _rotate(self, time_ns):
+
+        old_file, old_path = self._file, self.path
+
+        day_index = (time_ns + self._offset_ns) // DAY_NS
+        self.day = (datetime.date(1970, 1, 1) + datetime.timedelta(days=day_index)).strftime('%Y%m%d')
+        self._next_rollover_ns = (day_index + 1) * DAY_NS - self._offset_ns
+        self.path = join(self.directory, f'{self.day}{self._suffix}{self._extension}')
+        self._open()
+
+        if old_file is not None:
+            self._close_file(old_file, old_path)
+        else:
+            # files of earlier days that were not archived before the last shutdown.
+            for name in sorted(os.listdir(self.directory)):
+                day, kind, extension = parse_history_file_name(name)
+                if day is not None and day < self.day and kind == self.kind and extension == self._extension:
+                    self._start_archive(join(self.directory, name))
+
+    """
+    # close a file after all queued writes and archive it (if path is given).
+    """
+    def _close_file(self, file, path):
+        if self.writer is not None:
+            self.writer.submit(self._finish, file, path, block=True)
+        else:
+            self._finish(file, path)
+
+    def _finish(self, file, path):
+
+        if self.writer is not None and not self.binary:
+            self.writer.unregister(file)
+        file.close()
+
+        if path is not None:
+            self._start_archive(path)
+
+    def _start_archive(self, path):
+
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        thread = Thread(target=self._archive, args=(path,), name='dwx_history_archive', daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    """
+    # add a closed daily file to the catalog and compress it. runs in a background thread.
+    """
+    def _archive(self, path):
+
+        try:
+            rows, first, last = history_file_stats(path)
+
+            if self.compress:
+                # written to a temporary file first so that a crash never leaves a truncated archive.
+                with open(path, 'rb') as source, gzip.open(path + '.gz.tmp', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(path + '.gz.tmp', path + '.gz')
+                os.remove(path)
+                path = path + '.gz'
+
+            if self.catalog is not None:
+                day, _, _ = parse_history_file_name(os.path.basename(path).replace('.gz', ''))
+                self.catalog.add(self.symbol, self.kind, day, rows, first, last, path)
+
+        except Exception as e:
+            print(f'[ERROR] Could not archive history file {path}: {e}')
+
+    ##########################################################################
+
+
+"""
+# (number of rows, first timestamp, last timestamp) of a history file. timestamps are epoch ns.
+"""
+def history_file_stats(path):
+
+    if '.ticks' in path:
+        _, records = read_tick_file(path)
+        if len(records) == 0:
+            return 0, 0, 0
+        return len(records), int(records['date_time'][0]), int(records['date_time'][-1])
+
+    rows, first, last = 0, 0, 0
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            time_ns = parse_csv_time(line)
+            if time_ns is None:
+                continue
+            if rows == 0:
+                first = time_ns
+            last = time_ns
+            rows += 1
+    return rows, first, last
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+    history_index.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    Time range queries on the history files (history/<SYMBOL>.log / .ticks)
+
+    binary files have fixed-width records, so the memory-mapped timestamp column
+    is searched directly. CSV files have variable-width lines and get a sparse
+    index with the byte offset of every n-th row, which is extended as the file grows.
+"""
+
+import os
+import gzip
+import datetime
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+from dwxquickfix.helpers import datetime_to_ns
+from dwxquickfix.tick_file import read_tick_file
+
+
+"""
+# convert a datetime or epoch nanoseconds to epoch nanoseconds (None stays None)
+"""
+def to_ns(date_time):
+    if date_time is None or isinstance(date_time, (int, np.integer)):
+        return date_time
+    return datetime_to_ns(date_time)
+
+
+"""
+# epoch nanoseconds of the date_time column of a CSV history line (bytes), None for header lines
+"""
+def parse_csv_time(line):
+    try:
+        return datetime_to_ns(datetime.datetime.fromisoformat(line[:line.index(b',')].decode('utf-8')))
+    except ValueError:
+        return None
+
+
+"""
+# rows of a CSV history file as a dictionary of column arrays. 
+# names: column names, rows: lists of [time_ns, values...]
+"""
+def csv_rows_to_columns(names, rows):
+
+    columns = np.array(rows, dtype=np.float64).reshape(-1, len(names))
+    result = {'date_time': np.array([row[0] for row in rows], dtype=np.int64)}
+    for i, name in enumerate(names[1:]):
+        result[name] = columns[:, i + 1].astype(np.int32) if name == 'depth' else columns[:, i + 1]
+    return result
+
+
+"""
+# rows with start_ns <= date_time < end_ns of a (compressed) CSV history file, without an index
+"""
+def read_csv_range(path, start_ns=None, end_ns=None):
+
+    names = None
+    rows = []
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            time_ns = parse_csv_time(line)
+            if time_ns is None:
+                if names is None and line.startswith(b'date_time'):
+                    names = line.decode('utf-8').strip().split(',')
+                continue
+            if start_ns is not None and time_ns < start_ns:
+                continue
+            if end_ns is not None and time_ns >= end_ns:
+                break
+            values = line.decode('utf-8').strip().split(',')
+            rows.append([time_ns] + [float(value) for value in values[1:]])
+
+    return csv_rows_to_columns(names or ['date_time', 'depth', 'bid', 'ask', 'bid_size', 'ask_size'], rows)
+
+
+class csv_offset_index():
+
+    """
+    # every: number of rows between two index entries.
+    """
+    def __init__(self, path, every=1000):
+
+        self.path = path
+        self.every = every
+        self._reset()
+
+    def _reset(self):
+        self.names = None
+        self.times = []     # timestamp of every n-th row (epoch ns)
+        self.offsets = []   # byte offset of these rows
+        self._num_rows = 0
+        self._scanned = 0   # bytes of the file that are indexed
+        self._file_id = None  # (st_dev, st_ino) of the indexed file
+
+    ##########################################################################
+
+    """
+    # index the rows that were appended since the last update.
+    # the index is rebuilt if the file was replaced (another inode) or truncated.
+    """
+    def update(self):
+
+        stat = os.stat(self.path)
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._scanned:
+            self._reset()
+            self._file_id = file_id
+
+        if stat.st_size <= self._scanned:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._scanned)
+            offset = self._scanned
+
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # incomplete last line, will be indexed on the next update.
+
+                time_ns = parse_csv_time(line)
+                if time_ns is None:
+                    if self.names is None and line.startswith(b'date_time'):
+                        self.names = line.decode('utf-8').strip().split(',')
+                elif self._num_rows % self.every == 0:
+                    self.times.append(time_ns)
+                    self.offsets.append(offset)
+                    self._num_rows += 1
+                else:
+                    self._num_rows += 1
+
+                offset += len(line)
+
+            self._scanned = offset
+
+    """
+    # rows with start_ns <= date_time < end_ns as a dictionary of column arrays.
+    # only the part of the file between the closest index entries is read.
+    """
+    def read_range(self, start_ns=None, end_ns=None):
+
+        self.update()
+
+        names = self.names or ['date_time', 'depth', 'bid', 'ask', 'bid_size', 'ask_size']
+        rows = []
+
+        if len(self.offsets) > 0:
+            # the last entry before start_ns: the rows of a quote share their timestamp,
+            # so an entry with time == start_ns can have rows in range before it.
+            first = 0
+            if start_ns is not None:
+                first = max(bisect_left(self.times, start_ns) - 1, 0)
+
+            with open(self.path, 'rb') as f:
+                f.seek(self.offsets[first])
+                position = self.offsets[first]
+
+                for line in f:
+                    position += len(line)
+                    if position > self._scanned:
+                        break
+
+                    time_ns = parse_csv_time(line)
+                    if time_ns is None or (start_ns is not None and time_ns < start_ns):
+                        continue
+                    if end_ns is not None and time_ns >= end_ns:
+                        break
+
+                    values = line.decode('utf-8').strip().split(',')
+                    rows.append([time_ns] + [float(value) for value in values[1:]])
+
+        return csv_rows_to_columns(names, rows)
+
+    ##########################################################################
+
+
+# indexes of the most recently queried CSV files (least recently used are evicted).
+MAX_CSV_INDEXES = 64
+_csv_indexes = OrderedDict()  # format: path: csv_offset_index
+
+
+"""
+# rows of a history file with start <= date_time < end as a dictionary of column arrays.
+# start/end are datetimes or epoch nanoseconds (None = open ended).
+# for binary files (.ticks), the arrays are zero-copy views of the memory-mapped file.
+# compressed files (.gz) are read completely. 
+"""
+def read_history_range(path, start=None, end=None, every=1000):
+
+    start_ns, end_ns = to_ns(start), to_ns(end)
+
+    if path.endswith('.log.gz'):
+        return read_csv_range(path, start_ns, end_ns)
+
+    if path.endswith('.ticks') or path.endswith('.ticks.gz'):
+        _, records = read_tick_file(path)
+        time = records['date_time']
+        first = 0 if start_ns is None else int(time.searchsorted(start_ns, 'left'))
+        last = len(time) if end_ns is None else int(time.searchsorted(end_ns, 'left'))
+        records = records[first:max(first, last)]
+        return {name: records[name] for name in records.dtype.names}
+
+    index = _csv_indexes.get(path)
+    if index is None:
+        index = _csv_indexes[path] = csv_offset_index(path, every)
+        if len(_csv_indexes) > MAX_CSV_INDEXES:
+            _csv_indexes.popitem(last=False)
+    else:
+        _csv_indexes.move_to_end(path)
+    return index.read_range(start_ns, end_ns)
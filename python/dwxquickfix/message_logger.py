@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    message_logger.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    message_logger - Logging of the FIX messages of the application callbacks
+
+    a message is only converted to a string if it is printed (verbose) or written to the
+    message log, and only if it is not skipped by the sampling of its message type.
+    with an async_writer, the raw message string is handed to the writer thread, which
+    formats the log line. the timestamp of the line is still the time of the callback.
+"""
+
+import logging
+from time import time
+
+
+class message_logger():
+
+    """
+    # logger: logging.Logger of the message log (None to not write the messages to a file).
+    #     with a writer, it should not have an async_log_handler itself (see setup_logger()).
+    # verbose: print the messages.
+    # sampling: {MsgType: n} to log only 1 in n messages of a type, 0 to log none of them,
+    #     e.g. {'i': 100} logs every 100th MassQuote. other types are always logged.
+    # writer: optional async_writer to format and write the log lines off the calling thread.
+    """
+    def __init__(self, logger=None, verbose=False, sampling=None, writer=None):
+
+        self.logger = logger
+        self.verbose = verbose
+        self.sampling = dict(sampling or {})
+        self.writer = writer
+        self.enabled = logger is not None or verbose
+
+        self._counts = {msgType: 0 for msgType in self.sampling}  # format: 'i': messages seen
+        self.num_logged = 0
+        self.num_skipped = 0
+
+    ##########################################################################
+
+    """
+    # log a message of a callback, e.g. callback='fromApp'.
+    # msgType can be passed if it is already known, else it is read from the message if needed.
+    """
+    def message(self, callback, message, sessionID, msgType=None):
+
+        if not self.enabled:
+            return
+
+        if self.sampling:
+            if msgType is None:
+                msgType = message.getHeader().getField(35)
+            every = self.sampling.get(msgType)
+            if every is not None:
+                count = self._counts[msgType]
+                self._counts[msgType] = count + 1
+                if every <= 0 or count % every != 0:
+                    self.num_skipped += 1
+                    return
+
+        # the message and sessionID are only valid during the callback.
+        raw = message.toString()
+        session = sessionID.toString()
+        self.num_logged += 1
+
+        if self.verbose:
+            print(f'[{callback}] {session} | {self.format(raw)}')
+
+        if self.logger is not None:
+            text = (callback, session, raw)
+            if self.writer is not None:
+                self.writer.submit(self._write, time(), text)
+            else:
+                self._write(None, text)
+
+    """
+    # log a text, e.g. 'Logon.'. only written to the message log.
+    """
+    def event(self, text):
+
+        if self.logger is None:
+            return
+        if self.writer is not None:
+            self.writer.submit(self._write, time(), text)
+        else:
+            self._write(None, text)
+
+    ##########################################################################
+
+    """
+    # a raw FIX string in the format of read_FIX_message()
+    """
+    @staticmethod
+    def format(raw, delimiter=', '):
+        return raw[:-1].replace('\x01', delimiter) if raw.endswith('\x01') else raw.replace('\x01', delimiter)
+
+    """
+    # write one line. created: time of the callback (None = now).
+    """
+    def _write(self, created, text):
+
+        if isinstance(text, tuple):
+            callback, session, raw = text
+            text = f'[{callback}] {session} | {self.format(raw)}'
+
+        logger = self.logger
+        if created is None:
+            logger.info(text)
+            return
+
+        record = logger.makeRecord(logger.name, logging.INFO, '', 0, text, None, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        logger.handle(record)
+
+    ##########################################################################
+
+    def stats(self):
+        return {'logged': self.num_logged,
+                'skipped': self.num_skipped}
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+    order_book.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    order_book - Per-symbol price/size arrays for each side of the book
+"""
+
+import numpy as np
+
+
+class order_book():
+
+    """
+    # depth: number of levels that are preallocated per side. the arrays grow
+    # if the server sends deeper levels. unset levels are NaN.
+    """
+    def __init__(self, symbol, depth=10):
+
+        self.symbol = symbol
+        self.bid_price = np.full(depth, np.nan)
+        self.bid_size = np.full(depth, np.nan)
+        self.ask_price = np.full(depth, np.nan)
+        self.ask_size = np.full(depth, np.nan)
+
+        # lowest level that has a price. -1 if the side is empty.
+        self.top_bid_level = -1
+        self.top_ask_level = -1
+
+    ##########################################################################
+
+    def _grow(self, depth):
+
+        n = len(self.bid_price)
+        while n <= depth:
+            n *= 2
+        pad = n - len(self.bid_price)
+        self.bid_price = np.concatenate((self.bid_price, np.full(pad, np.nan)))
+        self.bid_size = np.concatenate((self.bid_size, np.full(pad, np.nan)))
+        self.ask_price = np.concatenate((self.ask_price, np.full(pad, np.nan)))
+        self.ask_size = np.concatenate((self.ask_size, np.full(pad, np.nan)))
+
+    """
+    # set the fields of one level that are not None.
+    # returns (new_tob_bid, new_tob_ask), True if the top of book of a side was updated.
+    """
+    def update(self, depth, bid=None, ask=None, bid_size=None, ask_size=None):
+
+        if depth >= len(self.bid_price):
+            self._grow(depth)
+
+        new_tob_bid, new_tob_ask = False, False
+
+        if bid is not None:
+            self.bid_price[depth] = bid
+            if depth <= self.top_bid_level or self.top_bid_level == -1:
+                self.top_bid_level = depth
+                new_tob_bid = True
+        if ask is not None:
+            self.ask_price[depth] = ask
+            if depth <= self.top_ask_level or self.top_ask_level == -1:
+                self.top_ask_level = depth
+                new_tob_ask = True
+        if bid_size is not None:
+            self.bid_size[depth] = bid_size
+        if ask_size is not None:
+            self.ask_size[depth] = ask_size
+
+        return new_tob_bid, new_tob_ask
+
+    """
+    # remove one level of a side ('bid' or 'ask'). returns True if it was the top of book.
+    """
+    def delete(self, side, depth):
+
+        if depth >= len(self.bid_price):
+            return False
+
+        if side == 'bid':
+            prices, sizes = self.bid_price, self.bid_size
+        else:
+            prices, sizes = self.ask_price, self.ask_size
+
+        prices[depth] = np.nan
+        sizes[depth] = np.nan
+
+        top = self.top_bid_level if side == 'bid' else self.top_ask_level
+        if depth != top:
+            return False
+
+        levels = np.flatnonzero(~np.isnan(prices))
+        top = int(levels[0]) if len(levels) > 0 else -1
+        if side == 'bid':
+            self.top_bid_level = top
+        else:
+            self.top_ask_level = top
+        return True
+
+    def clear(self):
+        self.bid_price.fill(np.nan)
+        self.bid_size.fill(np.nan)
+        self.ask_price.fill(np.nan)
+        self.ask_size.fill(np.nan)
+        self.top_bid_level = -1
+        self.top_ask_level = -1
+
+    """
+    # True if price and size of both sides are set for a level
+    """
+    def is_complete(self, depth):
+        return not (depth >= len(self.bid_price)
+                    or np.isnan(self.bid_price[depth]) or np.isnan(self.ask_price[depth])
+                    or np.isnan(self.bid_size[depth]) or np.isnan(self.ask_size[depth]))
+
+    ##########################################################################
+
+    # top of book (NaN if not available)
+
+    @property
+    def best_bid(self):
+        return self.bid_price[self.top_bid_level] if self.top_bid_level >= 0 else np.nan
+
+    @property
+    def best_ask(self):
+        return self.ask_price[self.top_ask_level] if self.top_ask_level >= 0 else np.nan
+
+    @property
+    def best_bid_size(self):
+        return self.bid_size[self.top_bid_level] if self.top_bid_level >= 0 else np.nan
+
+    @property
+    def best_ask_size(self):
+        return self.ask_size[self.top_ask_level] if self.top_ask_level >= 0 else np.nan
+
+    def spread(self):
+        return self.best_ask - self.best_bid
+
+    def mid(self):
+        return (self.best_ask + self.best_bid) / 2
+
+    ##########################################################################
+
+    # vectorized queries. side is 'bid' or 'ask', levels limits the number of levels (None = all).
+
+    def _side(self, side, levels):
+        if side == 'bid':
+            prices, sizes = self.bid_price, self.bid_size
+        elif side == 'ask':
+            prices, sizes = self.ask_price, self.ask_size
+        else:
+            raise ValueError(f'Invalid side: {side}')
+        if levels is not None:
+            prices, sizes = prices[:levels], sizes[:levels]
+        # sizes of levels without a price do not count.
+        sizes = np.where(np.isnan(prices) | np.isnan(sizes), 0., sizes)
+        return prices, sizes
+
+    """
+    # cumulative size per level
+    """
+    def cumulative_depth(self, side='bid', levels=None):
+        _, sizes = self._side(side, levels)
+        return np.cumsum(sizes)
+
+    """
+    # average price to fill size against a side ('bid' to sell, 'ask' to buy).
+    # NaN if the book is not deep enough.
+    """
+    def vwap(self, side, size):
+
+        prices, sizes = self._side(side, None)
+        cumulative = np.cumsum(sizes)
+
+        if size <= 0 or len(cumulative) == 0 or cumulative[-1] < size:
+            return np.nan
+
+        last = int(np.searchsorted(cumulative, size))
+        prices = np.where(sizes > 0, prices, 0.)
+        notional = np.dot(prices[:last], sizes[:last])
+        remaining = size - (cumulative[last - 1] if last > 0 else 0.)
+        return (notional + prices[last] * remaining) / size
+
+    """
+    # (bid size - ask size) / (bid size + ask size) over the first levels. in [-1, 1].
+    """
+    def imbalance(self, levels=1):
+
+        _, bid_sizes = self._side('bid', levels)
+        _, ask_sizes = self._side('ask', levels)
+        bid_volume = bid_sizes.sum()
+        ask_volume = ask_sizes.sum()
+        total = bid_volume + ask_volume
+
+        if total == 0:
+            return 0.
+        return (bid_volume - ask_volume) / total
+
+    ##########################################################################
+
+    """
+    # {depth: value} dictionary of the set levels of an array
+    """
+    @staticmethod
+    def levels_to_dict(values):
+        return {int(depth): values[depth].item() for depth in np.flatnonzero(~np.isnan(values))}
+
+    ##########################################################################
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+    order_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    order_store - The open orders by ClOrdID, with indexes by symbol, side, type and status
+
+    it is a dict (ClOrdID: order), so app.open_orders can be used as before. the indexes are
+    updated when an order is added or removed, and when its status is changed with set_status().
+    count() of one field value is O(1), query() starts from the smallest matching index.
+
+    the orders are changed on the QuickFIX thread, and the callbacks might run on dispatcher
+    threads. all changes are made under the lock (an RLock). code that iterates over the orders
+    from another thread should use snapshot() or hold the lock, e.g.
+        for ClOrdID, order in app.open_orders.snapshot().items(): ...
+"""
+
+from threading import RLock
+
+
+# order attributes that are indexed. type: '1' market, '2' limit, '3' stop. order_type: e.g. 'buy_limit'.
+INDEXED_FIELDS = ('symbol', 'side', 'type', 'order_type', 'status')
+
+
+class order_store(dict):
+
+    def __init__(self):
+
+        super().__init__()
+        self.lock = RLock()
+        self._indexes = {field: {} for field in INDEXED_FIELDS}  # format: 'symbol': {'EURUSD': {ClOrdID: order}}
+
+    ##########################################################################
+
+    def __setitem__(self, ClOrdID, order):
+
+        with self.lock:
+            if ClOrdID in self:
+                self._unindex(ClOrdID, dict.__getitem__(self, ClOrdID))
+            super().__setitem__(ClOrdID, order)
+            self._index(ClOrdID, order)
+
+    def __delitem__(self, ClOrdID):
+
+        with self.lock:
+            self._unindex(ClOrdID, dict.__getitem__(self, ClOrdID))
+            super().__delitem__(ClOrdID)
+
+    def pop(self, ClOrdID, *default):
+
+        with self.lock:
+            if ClOrdID not in self:
+                return super().pop(ClOrdID, *default)
+            order = dict.__getitem__(self, ClOrdID)
+            del self[ClOrdID]
+            return order
+
+    def setdefault(self, ClOrdID, order=None):
+
+        with self.lock:
+            if ClOrdID not in self:
+                self[ClOrdID] = order
+            return dict.__getitem__(self, ClOrdID)
+
+    def update(self, *args, **kwargs):
+        with self.lock:
+            for ClOrdID, order in dict(*args, **kwargs).items():
+                self[ClOrdID] = order
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+            for index in self._indexes.values():
+                index.clear()
+
+    """
+    # change the status of an order (e.g. OrdStatus of an execution report) and its index entry
+    """
+    def set_status(self, ClOrdID, status):
+
+        with self.lock:
+            order = dict.__getitem__(self, ClOrdID)
+            self._remove_from_index('status', order.status, ClOrdID)
+            order.status = status
+            self._add_to_index('status', status, ClOrdID, order)
+
+    """
+    # copy of the orders ({ClOrdID: order}) to iterate over while they might be changed
+    """
+    def snapshot(self):
+        with self.lock:
+            return dict(self)
+
+    ##########################################################################
+
+    def _index(self, ClOrdID, order):
+        for field in INDEXED_FIELDS:
+            self._add_to_index(field, getattr(order, field, None), ClOrdID, order)
+
+    def _unindex(self, ClOrdID, order):
+        for field in INDEXED_FIELDS:
+            self._remove_from_index(field, getattr(order, field, None), ClOrdID)
+
+    def _add_to_index(self, field, value, ClOrdID, order):
+        index = self._indexes[field]
+        if value not in index:
+            index[value] = {}
+        index[value][ClOrdID] = order
+
+    def _remove_from_index(self, field, value, ClOrdID):
+
+        orders = self._indexes[field].get(value)
+        if orders is None:
+            return
+        orders.pop(ClOrdID, None)
+        if len(orders) == 0:
+            del self._indexes[field][value]
+
+    ##########################################################################
+
+    """
+    # number of open orders with the given field values, e.g. count(symbol='EUR/USD').
+    # O(1) for one field, without fields the number of all open orders.
+    """
+    def count(self, **fields):
+
+        if len(fields) == 0:
+            return len(self)
+        if len(fields) == 1:
+            (field, value), = fields.items()
+            return len(self._indexes[_check_field(field)].get(value, ()))
+        return len(self.query(**fields))
+
+    """
+    # {ClOrdID: order} of the open orders with the given field values,
+    # e.g. query(symbol='EUR/USD', order_type='buy_limit') or query(symbol='EUR/USD', side='1', type='2').
+    """
+    def query(self, **fields):
+
+        if len(fields) == 0:
+            return self.snapshot()
+
+        with self.lock:
+            candidates = [self._indexes[_check_field(field)].get(value, {}) for field, value in fields.items()]
+            smallest = min(candidates, key=len)
+            others = [orders for orders in candidates if orders is not smallest]
+            return {ClOrdID: order for ClOrdID, order in smallest.items()
+                    if all(ClOrdID in orders for orders in others)}
+
+    """
+    # {value: number of open orders} of a field, e.g. counts('symbol') -> {'EUR/USD': 3, ...}
+    """
+    def counts(self, field):
+        with self.lock:
+            return {value: len(orders) for value, orders in self._indexes[_check_field(field)].items()}
+
+    ##########################################################################
+
+
+def _check_field(field):
+    if field not in INDEXED_FIELDS:
+        raise ValueError(f'Invalid order field: {field}. Indexed fields: {INDEXED_FIELDS}')
+    return field
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+    position_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    position_store - Write-ahead log and snapshots of the open orders and net positions
+
+    every change is appended to the log (<path>.wal) as one JSON line with a sequence number:
+        {"seq": 12, "op": "order", "key": 5, "value": {...order...}}   (value null: order closed)
+        {"seq": 13, "op": "position", "key": "EUR/USD", "value": [net, canceled]}
+    the values are absolute, so a record can be applied more than once.
+
+    every snapshot_interval records the complete state is written to <path>.snapshot.json
+    (temporary file, fsync, atomic rename) and the log is started again. load() reads the
+    snapshot and applies the records of the log with a higher sequence number. a partially
+    written last line (e.g. after a crash) is removed.
+"""
+
+import os
+import json
+
+
+class position_store():
+
+    """
+    # path: prefix of the files, e.g. 'positions' for positions.wal and positions.snapshot.json.
+    # writer: optional async_writer to write the records and snapshots off the calling thread.
+    #     they are submitted with block=True, so a writer with full_policy 'drop' does not drop them.
+    # snapshot_interval: records after which save_positions_to_file() should write a snapshot (see due()).
+    """
+    def __init__(self, path='positions', writer=None, snapshot_interval=1000):
+
+        self.wal_file = path + '.wal'
+        self.snapshot_file = path + '.snapshot.json'
+        self.writer = writer
+        self.snapshot_interval = snapshot_interval
+
+        self.seq = 0
+        self.num_records = 0       # since the last snapshot
+        self.num_snapshots = 0
+        self._file = None
+
+    ##########################################################################
+
+    """
+    # state of the snapshot and the log: (orders, positions, canceled).
+    # orders: {ClOrdID: order dict}, positions / canceled: {symbol: quantity}.
+    # None if there is neither a snapshot nor a log.
+    """
+    def load(self):
+
+        if not os.path.isfile(self.snapshot_file) and not os.path.isfile(self.wal_file):
+            return None
+
+        orders, positions, canceled = {}, {}, {}
+
+        if os.path.isfile(self.snapshot_file):
+            with open(self.snapshot_file) as f:
+                snapshot = json.load(f)
+            self.seq = snapshot['seq']
+            orders = {_key(key): value for key, value in snapshot['orders'].items()}
+            positions = snapshot['positions']
+            canceled = snapshot['canceled']
+
+        if os.path.isfile(self.wal_file):
+            end = 0
+            with open(self.wal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # partial last record
+                    if not line.endswith(b'\n'):
+                        break
+                    end += len(line)
+                    if record['seq'] <= self.seq:
+                        continue
+                    self.seq = record['seq']
+                    self.num_records += 1
+
+                    if record['op'] == 'order':
+                        if record['value'] is None:
+                            orders.pop(record['key'], None)
+                        else:
+                            orders[record['key']] = record['value']
+                    elif record['op'] == 'position':
+                        positions[record['key']], canceled[record['key']] = record['value']
+
+            # the new records are appended after the last complete one
+            if os.path.getsize(self.wal_file) > end:
+                with open(self.wal_file, 'r+b') as f:
+                    f.truncate(end)
+
+        return orders, positions, canceled
+
+    ##########################################################################
+
+    """
+    # append a change. op: 'order' (key: ClOrdID, value: order dict or None)
+    # or 'position' (key: symbol, value: [net, canceled]). the value is serialized immediately.
+    """
+    def record(self, op, key, value):
+
+        self.seq += 1
+        self.num_records += 1
+        line = json.dumps({'seq': self.seq, 'op': op, 'key': key, 'value': value}) + '\n'
+
+        if self.writer is not None:
+            self.writer.submit(self._append, line, block=True)
+        else:
+            self._append(line)
+
+    """
+    # True if a snapshot should be written
+    """
+    def due(self):
+        return self.num_records >= self.snapshot_interval
+
+    """
+    # write the complete state and start a new log. the arguments are copied.
+    """
+    def snapshot(self, orders, positions, canceled):
+
+        snapshot = {'seq': self.seq,
+                    'orders': {key: dict(value) for key, value in orders.items()},
+                    'positions': dict(positions),
+                    'canceled': dict(canceled)}
+        self.num_records = 0
+        self.num_snapshots += 1
+
+        if self.writer is not None:
+            self.writer.submit(self._write_snapshot, snapshot, block=True)
+        else:
+            self._write_snapshot(snapshot)
+
+    def close(self):
+
+        if self.writer is not None:
+            self.writer.submit(self._close, block=True)
+        else:
+            self._close()
+
+    ##########################################################################
+
+    # file operations, on the writer thread if there is one.
+
+    def _open(self):
+        self._file = open(self.wal_file, 'a')
+        if self.writer is not None:
+            self.writer.register(self._file)
+
+    def _append(self, line):
+
+        if self._file is None:
+            self._open()
+        self._file.write(line)
+        if self.writer is None:
+            self._file.flush()
+
+    def _write_snapshot(self, snapshot):
+
+        temp_file = self.snapshot_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.snapshot_file)
+
+        # the records up to snapshot['seq'] are in the snapshot. if the process stops before
+        # the log is truncated, load() skips them by their sequence number.
+        self._close()
+        open(self.wal_file, 'w').close()
+
+    def _close(self):
+
+        if self._file is None:
+            return
+        if self.writer is not None:
+            self.writer.unregister(self._file)
+        self._file.close()
+        self._file = None
+
+    ##########################################################################
+
+
+"""
+# JSON object keys are strings, the ClOrdIDs are ints
+"""
+def _key(key):
+    return int(key) if isinstance(key, str) and key.isdigit() else key
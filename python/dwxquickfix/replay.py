@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+    replay.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    Replay recorded ticks from the history directory through a tick_processor
+    without a FIX session, with simulated order fills.
+
+    example:
+        engine = replay_engine(my_tick_processor(), ['EUR/USD', 'GBP/USD'], file_format='binary')
+        print(engine.run())
+
+    journal_replay feeds the raw messages of a FIX journal (see fix_journal.py) through
+    application.fromApp()/fromAdmin(), e.g. to reproduce a session or to benchmark the parsers:
+        print(journal_replay(my_tick_processor(), 'messages.journal').run())
+"""
+
+import csv
+import gzip
+import datetime
+from os.path import join, isfile, isdir
+from time import perf_counter, sleep
+
+import numpy as np
+import quickfix as fix
+
+from dwxquickfix.helpers import datetime_to_ns
+from dwxquickfix.application import application
+from dwxquickfix.tick_file import read_tick_file
+from dwxquickfix.history_archive import history_catalog
+from dwxquickfix.history_index import to_ns
+from dwxquickfix.order import order
+from dwxquickfix.fix_journal import read_fix_journal
+from dwxquickfix.field_extractor import field_extractor
+
+
+"""
+# read a (compressed) CSV history file (history/<SYMBOL>.log) into
+# (date_time, depth, bid, ask, bid_size, ask_size) arrays. date_time is in epoch ns.
+"""
+def read_csv_history(path):
+
+    date_time, depth, bid, ask, bid_size, ask_size = [], [], [], [], [], []
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='') as f:
+        for row in csv.reader(f):
+            # header lines. files written by earlier versions repeat the header after every restart.
+            if len(row) != 6 or row[0] == 'date_time':
+                continue
+            try:
+                values = (datetime_to_ns(datetime.datetime.fromisoformat(row[0])), int(row[1]),
+                          float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+            except ValueError:
+                # incomplete last line or row without a timestamp.
+                continue
+            date_time.append(values[0])
+            depth.append(values[1])
+            bid.append(values[2])
+            ask.append(values[3])
+            bid_size.append(values[4])
+            ask_size.append(values[5])
+
+    return (np.array(date_time, dtype=np.int64), np.array(depth, dtype=np.int32),
+            np.array(bid), np.array(ask), np.array(bid_size), np.array(ask_size))
+
+
+"""
+# read a binary history file (history/<SYMBOL>.ticks), see tick_file.py
+"""
+def read_binary_history(path):
+
+    _, records = read_tick_file(path)
+    return (records['date_time'], records['depth'], records['bid'], records['ask'],
+            records['bid_size'], records['ask_size'])
+
+
+class simulated_sender():
+
+    """
+    # stand-in for sender that fills orders against the replayed top of book.
+    # orders sent from on_tick() are acknowledged and matched after the
+    # on_tick() call, at the prices of that tick:
+    #     market orders: filled at the ask (buy) or bid (sell).
+    #     limit orders:  filled at the ask/bid once it is at or better than price (+/- deviation).
+    #     stop orders:   filled at the ask/bid once it reached price.
+    # orders that are still open after their ttl (in ms) are canceled.
+    """
+    def __init__(self, app):
+
+        self.app = app
+        self.sessionID_Quote = None
+        self.sessionID_Trade = None
+        self.account = None
+
+        self._new_orders = []          # orders sent, but not yet acknowledged
+        self._cancel_requests = []     # ClOrdIDs
+        self._resting_orders = {}      # format: 'EURUSD': {ClOrdID: (order, sent_time_ns)}
+
+        self.time_ns = 0               # time of the current tick
+        self.num_orders = 0
+        self.num_fills = 0
+        self.num_cancels = 0
+
+    ##########################################################################
+
+    # sender methods
+
+    def send_MarketDataRequest(self, symbol='EURUSD', depth=0):
+        self.app.check_new_symbol(symbol)
+        self.app.add_symbol_to_positions(symbol)
+
+    def send_MarketDataSubscription(self, reqid, symbols, depth=0, subscribe=True):
+        pass
+
+    def send_NewOrderSingle(self, order):
+
+        if order.error:
+            print('[ERROR] The order cannot be sent because it contains errors.')
+            return False
+
+        if order.ClOrdID is None:
+            order.ClOrdID = self.app.next_ClOrdID()
+
+        self.app.add_order(order)
+        self._new_orders.append(order)
+        self.num_orders += 1
+        return True
+
+    def send_OrderCancelRequest(self, ClOrdID):
+        self._cancel_requests.append(ClOrdID)
+
+    def send_OrderStatusRequest(self, ClOrdID):
+        pass
+
+    def send_MassQuoteAcknowledgement(self, msg):
+        pass
+
+    def send_TestRequest(self, sessionID):
+        pass
+
+    ##########################################################################
+
+    """
+    # acknowledge new orders, process cancel requests and match the open orders of symbol.
+    # called by the replay engine after every tick.
+    """
+    def match(self, symbol):
+
+        app = self.app
+        transactTime = self.time_ns
+
+        while len(self._cancel_requests) > 0:
+            ClOrdID = self._cancel_requests.pop(0)
+            for resting_orders in self._resting_orders.values():
+                if ClOrdID in resting_orders:
+                    order, _ = resting_orders.pop(ClOrdID)
+                    self._report(order, '4', order.price, 0, transactTime)
+                    self.num_cancels += 1
+                    break
+            else:
+                print(f'[fromApp] Order Cancel Request Rejected for order: {ClOrdID}')
+
+        while len(self._new_orders) > 0:
+            order = self._new_orders.pop(0)
+            self._resting_orders.setdefault(order.symbol, {})[order.ClOrdID] = (order, self.time_ns)
+            self._report(order, '0', order.price, 0, transactTime)
+
+        resting_orders = self._resting_orders.get(symbol)
+        if not resting_orders:
+            return
+
+        bid = app.history_dict[symbol].BID_TOB
+        ask = app.history_dict[symbol].ASK_TOB
+
+        for ClOrdID in list(resting_orders.keys()):
+
+            order, sent_time = resting_orders[ClOrdID]
+            fill_price = self._fill_price(order, bid, ask)
+
+            if fill_price is not None:
+                del resting_orders[ClOrdID]
+                self._report(order, '2', fill_price, order.quantity, transactTime)
+                self.num_fills += 1
+
+            elif order.ttl is not None and self.time_ns - sent_time > order.ttl * 1000000:
+                del resting_orders[ClOrdID]
+                self._report(order, '4', order.price, 0, transactTime)
+                self.num_cancels += 1
+
+    def _fill_price(self, order, bid, ask):
+
+        if bid <= 0 or ask <= 0:
+            return None
+
+        buy = order.side == '1'
+        market_price = ask if buy else bid
+
+        if order.type == '1':
+            return market_price
+
+        deviation = order.deviation or 0.
+        if order.type == '2':
+            if (buy and ask <= order.price + deviation) or (not buy and bid >= order.price - deviation):
+                return market_price
+        elif order.type == '3':
+            if (buy and ask >= order.price) or (not buy and bid <= order.price):
+                return market_price
+
+        return None
+
+    def _report(self, order, ordStatus, price, cumQty, transactTime):
+
+        leavesQty = 0 if ordStatus != '0' else order.quantity
+        self.app.process_execution_report(order.ClOrdID, ordStatus if ordStatus != '2' else 'F', ordStatus,
+                                          order.type, price, order.side, order.symbol, transactTime,
+                                          order.quantity, order.min_quantity, cumQty, leavesQty, 
+                                          price if cumQty > 0 else 0.)
+
+    ##########################################################################
+
+
+class replay_engine():
+
+    """
+    # tick_processor: object with on_tick(symbol, app) and on_execution_report(report, app).
+    # symbols: symbols to replay, e.g. ['EUR/USD']. files are history_dir/<SYMBOL without '/'>.log/.ticks
+    # or, for daily files, the files of history_dir/<SYMBOL without '/'>/ found through the catalog.
+    # file_format: 'csv' or 'binary'.
+    # start/end: datetimes or epoch ns to replay only a part of the history (None = all).
+    """
+    def __init__(self, tick_processor, symbols, history_dir='history', file_format='csv',
+                 store_all_ticks='array', tick_store_capacity=100000, bar_time_frames=None,
+                 verbose=False, start=None, end=None):
+
+        if file_format not in ('csv', 'binary'):
+            raise ValueError(f'Invalid file_format: {file_format}')
+
+        self.symbols = list(symbols)
+        self.history_dir = history_dir
+        self.file_format = file_format
+        self.start_ns = to_ns(start)
+        self.end_ns = to_ns(end)
+
+        # the same application class as in live trading, without a session and without files.
+        self.app = application(None, tick_processor,
+                               store_all_ticks=store_all_ticks,
+                               save_history_to_files=False,
+                               verbose=verbose,
+                               message_log_file='',
+                               execution_history_file='',
+                               tick_store_capacity=tick_store_capacity,
+                               bar_time_frames=bar_time_frames)
+        self.sender = simulated_sender(self.app)
+        self.app.sender = self.sender
+
+        for symbol in self.symbols:
+            self.sender.send_MarketDataRequest(symbol)
+
+    ##########################################################################
+
+    """
+    # load all files and merge them by timestamp.
+    # returns (symbol_index, date_time, depth, bid, ask, bid_size, ask_size) arrays.
+    """
+    def load(self):
+
+        read = read_binary_history if self.file_format == 'binary' else read_csv_history
+        extension = '.ticks' if self.file_format == 'binary' else '.log'
+        catalog = None
+
+        columns = []
+        for i, symbol in enumerate(self.symbols):
+
+            name = symbol.replace('/', '')
+            if isdir(join(self.history_dir, name)):
+                # daily files
+                if catalog is None:
+                    catalog = history_catalog(self.history_dir)
+                paths = catalog.files(symbol, self.start_ns, self.end_ns, file_format=self.file_format)
+            else:
+                paths = [join(self.history_dir, f'{name}{extension}')]
+
+            for path in paths:
+
+                if not isfile(path):
+                    print(f'[ERROR] History file {path} not found.')
+                    continue
+
+                data = read(path)
+                if self.start_ns is not None or self.end_ns is not None:
+                    mask = np.ones(len(data[0]), dtype=bool)
+                    if self.start_ns is not None:
+                        mask &= data[0] >= self.start_ns
+                    if self.end_ns is not None:
+                        mask &= data[0] < self.end_ns
+                    data = tuple(column[mask] for column in data)
+
+                columns.append((np.full(len(data[0]), i, dtype=np.int32),) + tuple(data))
+
+        if len(columns) == 0:
+            return tuple(np.empty(0) for _ in range(7))
+
+        merged = [np.concatenate([c[j] for c in columns]) for j in range(7)]
+
+        # stable, so that ticks with the same timestamp keep their file order.
+        order = np.argsort(merged[1], kind='stable')
+        return tuple(column[order] for column in merged)
+
+    """
+    # replay all ticks (or the first max_ticks) as fast as possible.
+    # returns statistics including the number of ticks per second.
+    """
+    def run(self, max_ticks=None):
+
+        start = perf_counter()
+        symbol_index, date_time, depth, bid, ask, bid_size, ask_size = self.load()
+        load_time = perf_counter() - start
+
+        if max_ticks is not None:
+            symbol_index, date_time, depth = symbol_index[:max_ticks], date_time[:max_ticks], depth[:max_ticks]
+            bid, ask, bid_size, ask_size = bid[:max_ticks], ask[:max_ticks], bid_size[:max_ticks], ask_size[:max_ticks]
+
+        app = self.app
+        sender = self.sender
+        symbols = self.symbols
+
+        start = perf_counter()
+        for i, t, d, b, a, bs, _as in zip(symbol_index.tolist(), date_time.tolist(), depth.tolist(),
+                                           bid.tolist(), ask.tolist(), bid_size.tolist(), ask_size.tolist()):
+            symbol = symbols[i]
+            sender.time_ns = t
+            app.update_asset(t, symbol, d, b, a, bs, _as)
+            sender.match(symbol)
+        run_time = perf_counter() - start
+
+        num_ticks = len(date_time)
+        return {'ticks': num_ticks,
+                'load_seconds': load_time,
+                'run_seconds': run_time,
+                'ticks_per_second': num_ticks / run_time if run_time > 0 else 0.,
+                'orders': sender.num_orders,
+                'fills': sender.num_fills,
+                'cancels': sender.num_cancels}
+
+    ##########################################################################
+
+
+# outbound messages of the journal that restore the state of the application
+MARKET_DATA_REQUEST_FIELDS = field_extractor({35: ('MsgType', ''), 
+                                              262: ('MDReqID', ''), 
+                                              55: ('Symbol', '')})
+
+NEW_ORDER_FIELDS = field_extractor({35: ('MsgType', ''), 
+                                    11: ('ClOrdID', 'int'), 
+                                    55: ('Symbol', ''), 
+                                    54: ('Side', 'str'), 
+                                    40: ('OrdType', 'str'), 
+                                    44: ('Price', 'float'), 
+                                    38: ('OrderQty', 'int'), 
+                                    110: ('MinQty', 'int'), 
+                                    60: ('TransactTime', 'ns')})
+
+ORDER_TYPES = {('1', '1'): 'buy_market', ('1', '2'): 'buy_limit', ('1', '3'): 'buy_stop', 
+               ('2', '1'): 'sell_market', ('2', '2'): 'sell_limit', ('2', '3'): 'sell_stop'}
+
+
+class journal_replay():
+
+    """
+    # tick_processor: object with on_tick(symbol, app) and on_execution_report(report, app).
+    # path: journal written with journal_file='...'.
+    # data_dictionary: FIX specification to parse the repeating groups, as DataDictionary in the config.
+    # speed: None to replay as fast as possible, 1 at the recorded pace, 2 twice as fast, ...
+    # start/end: epoch ns to replay only a part of the journal (None = all).
+    # **kwargs: further application parameters, e.g. store_all_ticks='array'.
+    #
+    # the inbound messages are passed to fromApp()/fromAdmin() with the session they were received on.
+    # the recorded MarketDataRequests and NewOrderSingles restore the symbols and the open orders,
+    # so that the MassQuotes and ExecutionReports are processed as in the recorded session.
+    # orders sent by the tick_processor during the replay are not executed.
+    """
+    def __init__(self, tick_processor, path, data_dictionary='specs/FIX44-1.7_mod.xml', speed=None, 
+                 verbose=False, start=None, end=None, **kwargs):
+
+        self.path = path
+        self.speed = speed
+        self.start_ns = to_ns(start)
+        self.end_ns = to_ns(end)
+        self.data_dictionary = fix.DataDictionary(data_dictionary)
+        self._session_ids = {}  # format: (BeginString, SenderCompID, TargetCompID, qualifier): SessionID
+
+        kwargs.setdefault('save_history_to_files', False)
+        self.app = application(None, tick_processor,
+                               verbose=verbose,
+                               message_log_file='',
+                               execution_history_file='',
+                               **kwargs)
+        self.sender = simulated_sender(self.app)
+        self.app.sender = self.sender
+
+    ##########################################################################
+
+    """
+    # SessionID of an inbound message, as seen from the client
+    """
+    def _session_id(self, message, qualifier):
+
+        header = message.getHeader()
+        key = (header.getField(8), header.getField(56), header.getField(49), qualifier)
+        if key not in self._session_ids:
+            self._session_ids[key] = fix.SessionID(*key)
+        return self._session_ids[key]
+
+    """
+    # apply a recorded outbound application message to the application state
+    """
+    def _outbound(self, raw, time_ns):
+
+        app = self.app
+        fields = MARKET_DATA_REQUEST_FIELDS.parse(raw)[0]
+
+        if fields['MsgType'] == fix.MsgType_MarketDataRequest and fields['Symbol'] is not None:
+            symbol = fields['Symbol']
+            app.check_new_symbol(symbol, fields['MDReqID'])
+            app.add_symbol_to_positions(symbol)
+
+        elif fields['MsgType'] == fix.MsgType_NewOrderSingle:
+            fields = NEW_ORDER_FIELDS.parse(raw)[0]
+            side, ordType = fields['Side'], fields['OrdType']
+            replayed_order = order(fields['ClOrdID'], ORDER_TYPES.get((side, ordType), 'buy_market'), 
+                                   fields['Symbol'], fields['Price'], fields['OrderQty'], fields['MinQty'] or 0, 
+                                   openTime=fields['TransactTime'] or time_ns)
+            replayed_order.side, replayed_order.type = side, ordType
+            app.add_order(replayed_order)
+
+    """
+    # replay all messages (or the first max_messages inbound messages).
+    # returns statistics including the number of inbound messages per second.
+    """
+    def run(self, max_messages=None):
+
+        app = self.app
+        num_messages = 0
+        first_time = None
+        processing_time = 0.
+        start = perf_counter()
+
+        for time_ns, callback, session, raw in read_fix_journal(self.path, self.start_ns, self.end_ns):
+
+            if callback == 'toAdmin':
+                continue
+            if callback == 'toApp':
+                self._outbound(raw, time_ns)
+                continue
+
+            if max_messages is not None and num_messages >= max_messages:
+                break
+
+            if self.speed is not None:
+                if first_time is None:
+                    first_time = time_ns
+                delay = (time_ns - first_time) / 1e9 / self.speed - (perf_counter() - start)
+                if delay > 0:
+                    sleep(delay)
+
+            message_start = perf_counter()
+            message = fix.Message(raw, self.data_dictionary, False)
+            self.sender.time_ns = time_ns
+            if callback == 'fromApp':
+                app.fromApp(message, self._session_id(message, session))
+            else:
+                app.fromAdmin(message, self._session_id(message, session))
+            processing_time += perf_counter() - message_start
+            num_messages += 1
+
+        run_time = perf_counter() - start
+        return {'messages': num_messages,
+                'run_seconds': run_time,
+                'processing_seconds': processing_time,
+                'messages_per_second': num_messages / processing_time if processing_time > 0 else 0.}
+
+    ##########################################################################
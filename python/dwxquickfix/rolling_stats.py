@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+    rolling_stats.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    rolling_stats - Incrementally updated statistics of the top of book of one symbol
+"""
+
+from math import log, sqrt
+
+
+class rolling_stats():
+
+    """
+    # window: length of the sliding time window in seconds.
+    # ewma_alpha: weight of the newest tick in the exponentially weighted averages.
+    # capacity: maximum number of ticks in the window. the buffers are allocated once.
+    #
+    # attributes, updated in O(1) (amortized) per tick:
+    #     ewma_mid, ewma_spread           exponentially weighted mid price and spread
+    #     realized_variance               sum of squared log returns of the mid price in the window
+    #     tick_rate                       ticks per second in the window
+    #     mid_min, mid_max                lowest/highest mid price in the window
+    #     count                           number of ticks in the window
+    """
+    def __init__(self, window=60., ewma_alpha=0.05, capacity=100000):
+
+        self.window_ns = int(window * 1e9)
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.capacity = capacity
+
+        self.mid = 0.
+        self.spread = 0.
+        self.ewma_mid = 0.
+        self.ewma_spread = 0.
+        self.realized_variance = 0.
+        self.tick_rate = 0.
+        self.mid_min = 0.
+        self.mid_max = 0.
+        self.count = 0
+
+        # ring buffers, indexed by sequence number % capacity.
+        self._times = [0] * capacity
+        self._mids = [0.] * capacity
+        self._squared_returns = [0.] * capacity
+        self._first = 0  # sequence number of the oldest tick in the window
+        self._next = 0   # sequence number of the next tick
+
+        # monotonic queues of sequence numbers for the window minimum/maximum.
+        self._min_queue = [0] * capacity
+        self._max_queue = [0] * capacity
+        self._min_head = self._min_tail = 0
+        self._max_head = self._max_tail = 0
+
+    ##########################################################################
+
+    def update(self, time_ns, bid, ask):
+
+        capacity = self.capacity
+        mid = (bid + ask) / 2
+        spread = ask - bid
+
+        if self._next == 0:
+            self.ewma_mid = mid
+            self.ewma_spread = spread
+            squared_return = 0.
+        else:
+            alpha = self.ewma_alpha
+            self.ewma_mid += alpha * (mid - self.ewma_mid)
+            self.ewma_spread += alpha * (spread - self.ewma_spread)
+            squared_return = log(mid / self.mid) ** 2 if self.mid > 0 and mid > 0 else 0.
+
+        self.mid = mid
+        self.spread = spread
+
+        # add the tick
+        if self._next - self._first == capacity:
+            self._evict()
+        seq = self._next
+        i = seq % capacity
+        self._times[i] = time_ns
+        self._mids[i] = mid
+        self._squared_returns[i] = squared_return
+        self._next = seq + 1
+        self.realized_variance += squared_return
+
+        # remove ticks that are older than the window
+        cutoff = time_ns - self.window_ns
+        while self._times[self._first % capacity] < cutoff:
+            self._evict()
+
+        # window minimum/maximum
+        # the evicted ticks are removed from the queues first, otherwise a full queue
+        # would overwrite its head with the new tick.
+        mids = self._mids
+        queue = self._max_queue
+        while self._max_tail > self._max_head and queue[self._max_head % capacity] < self._first:
+            self._max_head += 1
+        while self._max_tail > self._max_head and mids[queue[(self._max_tail - 1) % capacity] % capacity] <= mid:
+            self._max_tail -= 1
+        queue[self._max_tail % capacity] = seq
+        self._max_tail += 1
+
+        queue = self._min_queue
+        while self._min_tail > self._min_head and queue[self._min_head % capacity] < self._first:
+            self._min_head += 1
+        while self._min_tail > self._min_head and mids[queue[(self._min_tail - 1) % capacity] % capacity] >= mid:
+            self._min_tail -= 1
+        queue[self._min_tail % capacity] = seq
+        self._min_tail += 1
+
+        self.mid_max = mids[self._max_queue[self._max_head % capacity] % capacity]
+        self.mid_min = mids[self._min_queue[self._min_head % capacity] % capacity]
+
+        self.count = self._next - self._first
+        self.tick_rate = self.count / self.window
+
+    def _evict(self):
+        self.realized_variance -= self._squared_returns[self._first % self.capacity]
+        self._first += 1
+        if self.realized_variance < 0:
+            self.realized_variance = 0.  # rounding errors of the running sum
+
+    ##########################################################################
+
+    """
+    # square root of the realized variance in the window
+    """
+    @property
+    def realized_volatility(self):
+        return sqrt(self.realized_variance)
+
+    def __str__(self):
+        return (f'mid: {self.mid}, spread: {self.spread}, ewma_mid: {self.ewma_mid}, '
+                f'ewma_spread: {self.ewma_spread}, realized_variance: {self.realized_variance}, '
+                f'tick_rate: {self.tick_rate}, mid_min: {self.mid_min}, mid_max: {self.mid_max}, '
+                f'count: {self.count}')
@@ -36,16 +36,21 @@ class sender():  # fix.Application
     ##########################################################################
 
     """
-    # Create Market Data Request (35=V)
+    # Subscribe to a symbol, see subscription_manager.subscribe() for depth and batches. 
     """
-    def send_MarketDataRequest(self, symbol='EURUSD'):
+    def send_MarketDataRequest(self, symbol='EURUSD', depth=0):
+        self.app.subscriptions.subscribe(symbol, depth)
+
+    """
+    # Create Market Data Request (35=V) for one or more symbols. 
+    # subscribe=False to unsubscribe the request with this MDReqID. 
+    # depth: 0 = full book, 1 = top of book, N = N levels
+    """
+    def send_MarketDataSubscription(self, reqid, symbols, depth=0, subscribe=True):
         
         # If no symbols provided, exit with error.
-        if len(symbol) is 0:
+        if len(symbols) == 0:
             raise RuntimeError('No symbol specified for MarketDataRequest')
-            
-        reqid = self.app.check_new_symbol(symbol)  # fffff: ok to reference it here?
-        self.app.add_symbol_to_positions(symbol)
         
         # Create new message of type MarketDataRequest
         message = fix.Message()
@@ -54,23 +59,28 @@ class sender():  # fix.Application
         # Set message type to MarketDataRequest (35=V)
         header.setField(fix.MsgType(fix.MsgType_MarketDataRequest))
         
-        # Assign request ID (262)
+        # Assign request ID (262). the same ID is used to unsubscribe. 
         header.setField(fix.MDReqID(str(reqid)))
         
-        # Set Subscription Request Type (263) to SNAPSHOT + UPDATES (1)
-        header.setField(fix.SubscriptionRequestType(fix.SubscriptionRequestType_SNAPSHOT_PLUS_UPDATES))
-        
-        # Set MDUpdateType (required when SubscribtionRequestType is S+U)
-        header.setField(fix.MDUpdateType(fix.MDUpdateType_INCREMENTAL_REFRESH))
+        if subscribe:
+            # Set Subscription Request Type (263) to SNAPSHOT + UPDATES (1)
+            header.setField(fix.SubscriptionRequestType(fix.SubscriptionRequestType_SNAPSHOT_PLUS_UPDATES))
+            
+            # Set MDUpdateType (required when SubscribtionRequestType is S+U)
+            header.setField(fix.MDUpdateType(fix.MDUpdateType_INCREMENTAL_REFRESH))
+        else:
+            # Set Subscription Request Type (263) to DISABLE PREVIOUS (2)
+            header.setField(fix.SubscriptionRequestType(
+                fix.SubscriptionRequestType_DISABLE_PREVIOUS_SNAPSHOT_PLUS_UPDATE_REQUEST))
         
         # Set market depth (264)
-        header.setField(fix.MarketDepth(0)) # 0 = full book, 1 = top of book
+        header.setField(fix.MarketDepth(int(depth))) # 0 = full book, 1 = top of book
         
-        # Create NoRelatedSym group (to place 146=1 before Symbol)
-        group = fix44.MarketDataRequest.NoRelatedSym()
-                
-        group.setField(fix.Symbol(symbol))
-        message.addGroup(group)
+        # Create NoRelatedSym group (146), one entry per symbol
+        for symbol in symbols:
+            group = fix44.MarketDataRequest.NoRelatedSym()
+            group.setField(fix.Symbol(symbol))
+            message.addGroup(group)
         
         # Set Currency (15). not really needed?
         # message.setField(fix.Currency(_currency))
@@ -80,7 +90,7 @@ class sender():  # fix.Application
             
             fix.Session.sendToTarget(message, self.sessionID_Quote)
         else:
-            print('[ERROR] send_MassQuoteAcknowledgement() failed. sessionID_Quote is None!')
+            print('[ERROR] send_MarketDataSubscription() failed. sessionID_Quote is None!')
 
     ##########################################################################
     """
@@ -131,17 +141,19 @@ class sender():  # fix.Application
     # 8=FIX.4.4 9=197 35=D 49=T01 56=XCxxx 34=22989 52=20151105-06:40:48.723 115=32155137
     # 11=12345W 1=5629910 55=EUR/USD 54=1 38=250000 44=1.08666 40=2 10000=300
     # 60=20151105-06:40:48.723 10=128
+    #
+    # returns True if the order was sent, False if not (the reason is printed).
     def send_NewOrderSingle(self, order):
 
         if order.error:
             print('[ERROR] The order cannot be sent because it contains errors.')
-            return
+            return False
         
         if order.ClOrdID is None:
             order.ClOrdID = self.app.next_ClOrdID()
-        elif order.ClOrdID in self.Open_Orders.keys():
+        elif order.ClOrdID in self.app.open_orders.keys():
             print('[ERROR] Order not sent. There is already an open order with the same ID. Please use a different one or just leave it empty.')
-            return
+            return False
 
         message = fix.Message()
         header = message.getHeader()
@@ -192,8 +204,10 @@ class sender():  # fix.Application
             self.app.add_order(order)
             
             fix.Session.sendToTarget(message, self.sessionID_Trade)
-        else:
-            print('[ERROR] send_NewOrderSingle() failed. sessionID_Trade is None!')
+            return True
+        
+        print('[ERROR] send_NewOrderSingle() failed. sessionID_Trade is None!')
+        return False
 
     ##########################################################################
     
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+    subscriptions.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    subscription_manager - Market data subscriptions of the Quote session
+
+    keeps the MarketDataRequests (35=V) that are active, so they can be unsubscribed (263=2)
+    and sent again after a reconnect. requests made before the Quote session is logged on
+    are sent on logon, so there is no need to wait between the subscriptions.
+
+    depth (264 MarketDepth) is set per request: 0 = full book, 1 = top of book, N = N levels.
+
+    batch=True subscribes several symbols with one request (one NoRelatedSym entry per symbol).
+    the MassQuotes identify a symbol only by QuoteSetID (302), which is the MDReqID of its
+    request, so MassQuotes of batched symbols cannot be assigned to a symbol and are ignored
+    (an [ERROR] is printed once per request when they arrive). only use batches if the server
+    sends market data with a Symbol (55), i.e. snapshots (35=W) or incremental refreshes (35=X).
+"""
+
+from threading import Lock
+
+
+class subscription_manager():
+
+    def __init__(self, app):
+
+        self.app = app
+        self.lock = Lock()
+        self.logged_on = False
+
+        self._requests = {}       # format: MDReqID: (['EUR/USD', ...], depth)
+        self._symbol_to_id = {}   # format: 'EUR/USD': MDReqID
+        self._ignored_batches = set()   # MDReqIDs of batches whose MassQuotes were reported
+
+    ##########################################################################
+
+    """
+    # subscribe to one symbol or a list of symbols. symbols that are already subscribed
+    # with the same depth are skipped, with another depth they are subscribed again.
+    # batch: one request for all new symbols. not for MassQuote feeds (see above).
+    # returns the MDReqIDs of the new requests.
+    """
+    def subscribe(self, symbols, depth=0, batch=False):
+
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        if len(symbols) == 0 or any(len(symbol) == 0 for symbol in symbols):
+            raise RuntimeError('No symbol specified for MarketDataRequest')
+        if int(depth) < 0:
+            raise ValueError(f'Invalid market depth: {depth}')
+        depth = int(depth)
+
+        with self.lock:
+
+            resubscribe = [symbol for symbol in symbols
+                           if symbol in self._symbol_to_id and self._requests[self._symbol_to_id[symbol]][1] != depth]
+            if len(resubscribe) > 0:
+                self._unsubscribe(resubscribe)
+
+            new_symbols = []
+            for symbol in symbols:
+                if symbol not in self._symbol_to_id and symbol not in new_symbols:
+                    new_symbols.append(symbol)
+
+            # one MDReqID per symbol, as used in the QuoteSetIDs of the MassQuotes
+            reqids = [str(self.app.check_new_symbol(symbol)) for symbol in new_symbols]
+            for symbol in new_symbols:
+                self.app.add_symbol_to_positions(symbol)
+
+            if batch and len(new_symbols) > 1:
+                requests = [(str(self.app.next_MDReqID()), new_symbols)]
+            else:
+                requests = [(reqid, [symbol]) for reqid, symbol in zip(reqids, new_symbols)]
+
+            for reqid, request_symbols in requests:
+                self._requests[reqid] = (request_symbols, depth)
+                for symbol in request_symbols:
+                    self._symbol_to_id[symbol] = reqid
+                if self.logged_on:
+                    self.app.sender.send_MarketDataSubscription(reqid, request_symbols, depth)
+
+        return [reqid for reqid, _ in requests]
+
+    """
+    # unsubscribe from one symbol or a list of symbols.
+    # the other symbols of a batch are subscribed again with a new request. if only one symbol
+    # is left, the request has the symbol's own MDReqID, so its MassQuotes can be assigned again.
+    """
+    def unsubscribe(self, symbols):
+
+        if isinstance(symbols, str):
+            symbols = [symbols]
+
+        with self.lock:
+            self._unsubscribe(symbols)
+
+    def _unsubscribe(self, symbols):
+
+        reqids = []
+        for symbol in symbols:
+            reqid = self._symbol_to_id.pop(symbol, None)
+            if reqid is None:
+                if self.app.verbose:
+                    print(f'[ERROR] {symbol} is not subscribed.')
+            elif reqid not in reqids:
+                reqids.append(reqid)
+
+        for reqid in reqids:
+
+            request_symbols, depth = self._requests.pop(reqid)
+            if self.logged_on:
+                self.app.sender.send_MarketDataSubscription(reqid, request_symbols, depth, subscribe=False)
+
+            remaining = [symbol for symbol in request_symbols if symbol in self._symbol_to_id]
+            if len(remaining) == 0:
+                continue
+
+            if len(remaining) == 1:
+                new_reqid = str(self.app.check_new_symbol(remaining[0]))
+            else:
+                new_reqid = str(self.app.next_MDReqID())
+            self._requests[new_reqid] = (remaining, depth)
+            for symbol in remaining:
+                self._symbol_to_id[symbol] = new_reqid
+            if self.logged_on:
+                self.app.sender.send_MarketDataSubscription(new_reqid, remaining, depth)
+
+    ##########################################################################
+
+    """
+    # called by the application when the Quote session logs on.
+    # sends all requests again (or for the first time) with their MDReqIDs.
+    """
+    def on_logon(self):
+
+        with self.lock:
+            self.logged_on = True
+            for reqid, (request_symbols, depth) in self._requests.items():
+                self.app.sender.send_MarketDataSubscription(reqid, request_symbols, depth)
+
+    """
+    # the server drops the subscriptions on logout
+    """
+    def on_logout(self):
+        self.logged_on = False
+
+    """
+    # called by the application for a MassQuote QuoteSetID that is not the MDReqID of a symbol.
+    # prints an [ERROR] the first time the QuoteSetID is a batch request. returns True if it is.
+    """
+    def check_quote_set(self, reqid):
+
+        request = self._requests.get(reqid)
+        if request is None or len(request[0]) < 2:
+            return False
+        if reqid not in self._ignored_batches:
+            self._ignored_batches.add(reqid)
+            print(f'[ERROR] MassQuotes of the batch request {reqid} ({", ".join(request[0])}) '
+                  f'cannot be assigned to a symbol and are ignored. subscribe with batch=False.')
+        return True
+
+    ##########################################################################
+
+    def is_subscribed(self, symbol):
+        return symbol in self._symbol_to_id
+
+    """
+    # depth of the subscription of a symbol, None if not subscribed
+    """
+    def depth(self, symbol):
+        reqid = self._symbol_to_id.get(symbol)
+        return None if reqid is None else self._requests[reqid][1]
+
+    """
+    # {MDReqID: (symbols, depth)} of the active requests
+    """
+    def requests(self):
+        with self.lock:
+            return {reqid: (list(request_symbols), depth)
+                    for reqid, (request_symbols, depth) in self._requests.items()}
+
+    ##########################################################################
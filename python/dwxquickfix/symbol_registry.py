@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+    symbol_registry.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    symbol_registry - Dense integer ids for the symbols of an application
+
+    every symbol gets an id (0, 1, 2, ...) in the order in which it was added. the MDReqIDs
+    (= QuoteSetIDs of the MassQuotes) map directly to the ids through a list, so the hot path
+    does not hash the symbol strings. the histories and the top of book and net position of
+    every symbol are kept in id-indexed lists and arrays for cross-symbol calculations, e.g.
+        registry.mid()[registry.symbol_id('EUR/USD')]
+"""
+
+import numpy as np
+
+
+class symbol_registry():
+
+    def __init__(self, capacity=16):
+
+        self.symbols = []         # format: id: 'EUR/USD'
+        self.histories = []       # format: id: history (None until it is created)
+        self._ids = {}            # format: 'EUR/USD': id
+        self._reqids = []         # format: id: MDReqID (str, None if not requested)
+        self._reqid_ids = []      # format: int(MDReqID): id (-1 for unused MDReqIDs)
+        self._other_reqid_ids = {}  # format: MDReqID: id, for MDReqIDs that are not numbers
+
+        # top of book (0 if a side is not set) and net positions
+        self._bid = np.zeros(capacity)
+        self._ask = np.zeros(capacity)
+        self._net_position = np.zeros(capacity)
+
+    ##########################################################################
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._ids
+
+    """
+    # id of a symbol, added if it is new
+    """
+    def add(self, symbol):
+
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+
+        symbol_id = len(self.symbols)
+        self.symbols.append(symbol)
+        self.histories.append(None)
+        self._reqids.append(None)
+        self._ids[symbol] = symbol_id
+
+        if symbol_id >= len(self._bid):
+            pad = len(self._bid)
+            self._bid = np.concatenate((self._bid, np.zeros(pad)))
+            self._ask = np.concatenate((self._ask, np.zeros(pad)))
+            self._net_position = np.concatenate((self._net_position, np.zeros(pad)))
+
+        return symbol_id
+
+    """
+    # id of a symbol, None if it is not registered
+    """
+    def symbol_id(self, symbol):
+        return self._ids.get(symbol)
+
+    def symbol(self, symbol_id):
+        return self.symbols[symbol_id]
+
+    ##########################################################################
+
+    # MDReqIDs. a symbol can have more than one (e.g. after it was subscribed again),
+    # reqid() is the last one. all of them are resolved.
+
+    def set_reqid(self, symbol_id, reqid):
+
+        reqid = str(reqid)
+        self._reqids[symbol_id] = reqid
+        if reqid.isdigit():
+            index = int(reqid)
+            if index >= len(self._reqid_ids):
+                self._reqid_ids.extend([-1] * (index + 1 - len(self._reqid_ids)))
+            self._reqid_ids[index] = symbol_id
+        else:
+            self._other_reqid_ids[reqid] = symbol_id
+
+    def reqid(self, symbol_id):
+        return self._reqids[symbol_id]
+
+    """
+    # id of the symbol of an MDReqID / QuoteSetID (str), None if unknown
+    """
+    def id_for_reqid(self, reqid):
+
+        if reqid is None:
+            return None
+        if reqid.isdigit():
+            index = int(reqid)
+            symbol_id = self._reqid_ids[index] if index < len(self._reqid_ids) else -1
+            return symbol_id if symbol_id >= 0 else None
+        return self._other_reqid_ids.get(reqid)
+
+    def symbol_for_reqid(self, reqid):
+        symbol_id = self.id_for_reqid(reqid)
+        return None if symbol_id is None else self.symbols[symbol_id]
+
+    def history_for_reqid(self, reqid):
+        symbol_id = self.id_for_reqid(reqid)
+        return None if symbol_id is None else self.histories[symbol_id]
+
+    ##########################################################################
+
+    # per-symbol state
+
+    def set_history(self, symbol_id, history):
+        self.histories[symbol_id] = history
+
+    """
+    # called by the histories when the top of book changes (0 for an empty side)
+    """
+    def set_tob(self, symbol_id, bid, ask):
+        self._bid[symbol_id] = bid
+        self._ask[symbol_id] = ask
+
+    def set_net_position(self, symbol_id, quantity):
+        self._net_position[symbol_id] = quantity
+
+    ##########################################################################
+
+    # id-indexed arrays (length = number of symbols). bid / ask are NaN for an empty side. 
+
+    @property
+    def bid(self):
+        bid = self._bid[:len(self.symbols)]
+        return np.where(bid > 0, bid, np.nan)
+
+    @property
+    def ask(self):
+        ask = self._ask[:len(self.symbols)]
+        return np.where(ask > 0, ask, np.nan)
+
+    @property
+    def net_position(self):
+        return self._net_position[:len(self.symbols)]
+
+    def mid(self):
+        return (self.bid + self.ask) / 2
+
+    def spread(self):
+        return self.ask - self.bid
+
+    ##########################################################################
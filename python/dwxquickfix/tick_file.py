@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+    tick_file.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    Binary append-only tick files and a memory-mapped reader
+
+    File layout (little endian):
+        header:  magic 'DWXT' | uint16 schema version | uint16 record type | 24 bytes symbol (utf-8, zero padded)
+        records: fixed-width rows, see DEPTH_DTYPE and TOB_DTYPE
+"""
+
+import os
+import gzip
+import struct
+
+import numpy as np
+
+
+MAGIC = b'DWXT'
+SCHEMA_VERSION = 1
+
+RECORD_DEPTH = 1
+RECORD_TOB = 2
+
+SYMBOL_SIZE = 24  # bytes
+HEADER = struct.Struct(f'<4sHH{SYMBOL_SIZE}s')
+
+# packed record layouts. date_time is in epoch nanoseconds.
+DEPTH_DTYPE = np.dtype([('date_time', '<i8'), ('depth', '<i4'),
+                        ('bid', '<f8'), ('ask', '<f8'),
+                        ('bid_size', '<f8'), ('ask_size', '<f8')])
+TOB_DTYPE = np.dtype([('date_time', '<i8'), ('bid', '<f8'), ('ask', '<f8')])
+
+DTYPES = {RECORD_DEPTH: DEPTH_DTYPE, RECORD_TOB: TOB_DTYPE}
+
+_RECORDS = {RECORD_DEPTH: struct.Struct('<qidddd'), RECORD_TOB: struct.Struct('<qdd')}
+
+
+class tick_file_writer():
+
+    """
+    # appends records to path. the header is only written if the file is new,
+    # an existing file must have the same symbol, schema version and record type.
+    # if an async_writer is given, the records are written on its thread.
+    # the symbol must not be longer than SYMBOL_SIZE bytes (utf-8).
+    """
+    def __init__(self, path, symbol, record_type=RECORD_DEPTH, buffer_size=65536, writer=None):
+
+        if len(symbol.encode('utf-8')) > SYMBOL_SIZE:
+            raise ValueError(f'Symbol {symbol} is longer than {SYMBOL_SIZE} bytes and cannot be stored '
+                             f'in the header of tick file {path}')
+
+        self.path = path
+        self.symbol = symbol
+        self.record_type = record_type
+        self.writer = writer
+        self._pack = _RECORDS[record_type].pack
+
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            header = read_tick_file_header(path)
+            if (header['symbol'] != symbol or header['version'] != SCHEMA_VERSION
+                    or header['record_type'] != record_type):
+                raise ValueError(f'Tick file {path} does not match (symbol: {symbol}, '
+                                 f'version: {SCHEMA_VERSION}, record type: {record_type}): {header}')
+            self._file = open(path, 'ab', buffering=buffer_size)
+            self._truncate_partial_record()
+        else:
+            self._file = open(path, 'ab', buffering=buffer_size)
+            self._file.write(HEADER.pack(MAGIC, SCHEMA_VERSION, record_type, symbol.encode('utf-8')))
+
+        if self.writer is not None:
+            self.writer.register(self._file)
+
+    """
+    # a record that was only partially written (e.g. on a crash) would shift all following records.
+    """
+    def _truncate_partial_record(self):
+
+        size = os.path.getsize(self.path)
+        partial = (size - HEADER.size) % DTYPES[self.record_type].itemsize
+        if partial > 0:
+            self._file.truncate(size - partial)
+
+    ##########################################################################
+
+    """
+    # write one record. depth files: (date_time, depth, bid, ask, bid_size, ask_size),
+    # TOB files: (date_time, bid, ask).
+    """
+    def write(self, *values):
+        if self.writer is not None:
+            self.writer.submit(self._file.write, self._pack(*values))
+        else:
+            self._file.write(self._pack(*values))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.unregister(self._file)
+        if not self._file.closed:
+            self._file.close()
+
+    ##########################################################################
+
+
+"""
+# read the header of a tick file
+"""
+def read_tick_file_header(path):
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        data = f.read(HEADER.size)
+
+    return _parse_header(data, path)
+
+
+def _parse_header(data, path):
+
+    if len(data) < HEADER.size:
+        raise ValueError(f'{path} is not a tick file (header too short).')
+
+    magic, version, record_type, symbol = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a tick file (magic: {magic}).')
+
+    return {'symbol': symbol.rstrip(b'\x00').decode('utf-8'),
+            'version': version,
+            'record_type': record_type}
+
+
+"""
+# memory-map a tick file and return (header, records) where records is a read-only
+# NumPy structured array (DEPTH_DTYPE or TOB_DTYPE). nothing is read until accessed.
+# compressed files (.gz) are decompressed into memory instead.
+"""
+def read_tick_file(path):
+
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            data = f.read()
+        header = _parse_header(data, path)
+        _check_version(header, path)
+        dtype = DTYPES[header['record_type']]
+        count = (len(data) - HEADER.size) // dtype.itemsize
+        return header, np.frombuffer(data, dtype=dtype, count=count, offset=HEADER.size)
+
+    header = read_tick_file_header(path)
+    _check_version(header, path)
+
+    dtype = DTYPES[header['record_type']]
+    count = (os.path.getsize(path) - HEADER.size) // dtype.itemsize  # ignores a partial last record
+
+    if count == 0:
+        return header, np.empty(0, dtype=dtype)
+
+    return header, np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(count,))
+
+
+def _check_version(header, path):
+    if header['version'] != SCHEMA_VERSION:
+        raise ValueError(f'Unsupported tick file version {header["version"]} in {path}.')
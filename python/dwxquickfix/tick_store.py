@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+    tick_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    tick_store - A bounded, columnar ring buffer to hold incoming ticks
+"""
+
+import numpy as np
+
+
+# column layouts (name, dtype). the first column must be the int64 timestamp in ns.
+TICK_COLUMNS = (('date_time', np.int64),
+                ('depth', np.int32),
+                ('bid', np.float64),
+                ('ask', np.float64),
+                ('bid_size', np.float64),
+                ('ask_size', np.float64))
+
+TOB_COLUMNS = (('date_time', np.int64),
+               ('bid', np.float64),
+               ('ask', np.float64))
+
+
+class tick_store():
+
+    """
+    # capacity: maximum number of rows that are kept.
+    # time_window: maximum age of the rows in seconds, relative to the newest row (None = no limit).
+    # the oldest rows are evicted if one of the limits is exceeded.
+    """
+    def __init__(self, columns=TICK_COLUMNS, capacity=100000, time_window=None):
+
+        if capacity <= 0:
+            raise ValueError(f'capacity must be positive, got {capacity}')
+
+        self.names = [name for name, _ in columns]
+        self.capacity = capacity
+        self.time_window_ns = None
+        if time_window is not None:
+            self.time_window_ns = int(time_window * 1e9)
+
+        # the buffers are twice the capacity so that the live rows are always
+        # contiguous and can be returned as views. when the end of the buffer
+        # is reached, the live rows are moved to the front (amortized O(1)).
+        self._columns = [np.zeros(2 * capacity, dtype=dtype) for _, dtype in columns]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._time = self._columns[0]
+        self._start = 0
+        self._end = 0
+
+        self.num_evicted = 0
+
+    ##########################################################################
+
+    """
+    # append one row. values must be given in the order of the columns.
+    """
+    def append(self, *values):
+
+        if self._end == len(self._time):
+            self._compact()
+
+        end = self._end
+        for column, value in zip(self._columns, values):
+            column[end] = value
+        self._end = end + 1
+
+        if self._end - self._start > self.capacity:
+            self._start += 1
+            self.num_evicted += 1
+
+        if self.time_window_ns is not None:
+            cutoff = self._time[end] - self.time_window_ns
+            while self._time[self._start] < cutoff:
+                self._start += 1
+                self.num_evicted += 1
+
+    """
+    # move the live rows to the front of the buffers.
+    # views returned before are not valid anymore after this.
+    """
+    def _compact(self):
+
+        n = self._end - self._start
+        for column in self._columns:
+            column[:n] = column[self._start:self._end]
+        self._start = 0
+        self._end = n
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+
+    ##########################################################################
+
+    def __len__(self):
+        return self._end - self._start
+
+    """
+    # store['bid'] returns a zero-copy view of a column, store[-1] a row as dict.
+    # views are only valid until the buffer is compacted, use .copy() to keep them longer.
+    """
+    def __getitem__(self, key):
+
+        if isinstance(key, str):
+            return self.column(key)
+
+        n = self._end - self._start
+        if key < 0:
+            key += n
+        if key < 0 or key >= n:
+            raise IndexError('tick_store index out of range')
+
+        i = self._start + key
+        return {name: column[i].item() for name, column in zip(self.names, self._columns)}
+
+    def column(self, name):
+        return self._columns[self._index[name]][self._start:self._end]
+
+    """
+    # dictionary with zero-copy views of all columns.
+    """
+    def columns(self):
+        return {name: column[self._start:self._end] for name, column in zip(self.names, self._columns)}
+
+    ##########################################################################
+
+    # time range queries (binary search, rows are expected in time order). 
+    # times are epoch nanoseconds.
+
+    """
+    # (first, last) positions of the rows with start_ns <= date_time < end_ns
+    """
+    def index_range(self, start_ns=None, end_ns=None):
+
+        time = self._time[self._start:self._end]
+        first = 0 if start_ns is None else int(time.searchsorted(start_ns, 'left'))
+        last = len(time) if end_ns is None else int(time.searchsorted(end_ns, 'left'))
+        return first, max(first, last)
+
+    """
+    # zero-copy views of all columns for start_ns <= date_time < end_ns
+    """
+    def between(self, start_ns=None, end_ns=None):
+
+        first, last = self.index_range(start_ns, end_ns)
+        first += self._start
+        last += self._start
+        return {name: column[first:last] for name, column in zip(self.names, self._columns)}
+
+    """
+    # zero-copy views of all columns for the last seconds before the newest row
+    """
+    def last(self, seconds):
+
+        if self._end == self._start:
+            return self.between()
+        return self.between(self._time[self._end - 1] - int(seconds * 1e9), None)
+
+    ##########################################################################
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+    conftest.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+
+    the tests import the dwxquickfix package from the python directory
+"""
+
+import sys
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+    test_async_writer.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from threading import Thread, Event
+from time import sleep
+
+from dwxquickfix.async_writer import async_writer
+
+
+def test_drop_policy_keeps_blocking_submits():
+
+    gate = Event()
+    written = []
+    writer = async_writer(queue_size=1, full_policy='drop')
+    writer.submit(gate.wait)
+    sleep(0.05)  # the writer thread waits on the gate, the queue is empty
+
+    writer.submit(written.append, 'queued')
+    writer.submit(written.append, 'dropped')
+    thread = Thread(target=writer.submit, args=(written.append, 'kept'), kwargs={'block': True})
+    thread.start()
+    sleep(0.05)
+    gate.set()
+    thread.join()
+    writer.stop()
+
+    assert written == ['queued', 'kept']
+    assert writer.num_dropped == 1
+
+
+def test_stop_writes_everything_submitted_concurrently():
+
+    written = []
+    writer = async_writer(queue_size=10)
+
+    def produce(n):
+        for i in range(2000):
+            writer.submit(written.append, (n, i))
+
+    threads = [Thread(target=produce, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    sleep(0.001)
+    assert writer.stop()
+    for thread in threads:
+        thread.join()
+
+    assert len(written) == 8000
+    for n in range(4):
+        assert [i for m, i in written if m == n] == list(range(2000))
+
+
+def test_writes_after_a_stop_timeout_wait_for_the_thread():
+
+    gate = Event()
+    written = []
+    writer = async_writer()
+    writer.submit(gate.wait)
+    writer.submit(written.append, 'queued')
+
+    assert not writer.stop(timeout=0.05)
+    Thread(target=lambda: (sleep(0.05), gate.set())).start()
+    writer.submit(written.append, 'after stop')
+
+    assert written == ['queued', 'after stop']
+    assert writer.stop()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+    test_dispatcher.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from threading import Event, RLock, current_thread
+
+from dwxquickfix.dispatcher import conflating_dispatcher, queued_dispatcher, sharded_dispatcher
+from dwxquickfix.execution_report import execution_report
+
+
+class recording_processor():
+
+    def __init__(self):
+        self.calls = []      # format: (callback, argument, thread name)
+        self.entered = Event()
+        self.release = Event()
+
+    def on_tick(self, symbol, app):
+        self.entered.set()
+        self.release.wait(5)
+        self.calls.append(('tick', symbol, current_thread().name))
+
+    def on_bar(self, symbol, time_frame, bar, app):
+        self.calls.append(('bar', symbol, current_thread().name))
+
+    def on_execution_report(self, report, app):
+        self.calls.append(('report', report.ClOrdID, current_thread().name))
+
+
+class stub_app():
+
+    def __init__(self):
+        self.lock = RLock()
+        self.tick_processor = recording_processor()
+
+
+def report(ClOrdID):
+    return execution_report(ClOrdID, 'EUR/USD', '1', None, '2', '2', 1000, None, 1000, 0)
+
+
+def test_conflating_dispatcher_delivers_everything_from_its_thread():
+
+    app = stub_app()
+    dispatcher = conflating_dispatcher(app)
+
+    dispatcher.dispatch_tick('EUR/USD')     # blocks the dispatcher thread until released
+    assert app.tick_processor.entered.wait(5)
+    for _ in range(3):
+        dispatcher.dispatch_tick('GBP/USD')
+    dispatcher.dispatch_bar('EUR/USD', '1m', None)
+    dispatcher.dispatch_execution_report(report(1))
+    dispatcher.dispatch_execution_report(report(2))
+
+    app.tick_processor.release.set()
+    dispatcher.stop()
+
+    calls = app.tick_processor.calls
+    assert {thread for _, _, thread in calls} == {'dwx_conflating_dispatcher'}
+    assert [(kind, value) for kind, value, _ in calls] == [('tick', 'EUR/USD'), 
+                                                           ('report', 1), ('report', 2),
+                                                           ('bar', 'EUR/USD'), 
+                                                           ('tick', 'GBP/USD')]
+    assert dispatcher.stats()['conflated'] == 2
+
+
+def test_queued_dispatcher_drops_ticks_instead_of_blocking():
+
+    app = stub_app()
+    dispatcher = queued_dispatcher(app, queue_size=1)
+
+    dispatcher.dispatch_tick('EUR/USD')     # blocks the worker until released
+    assert app.tick_processor.entered.wait(5)
+    for _ in range(5):
+        dispatcher.dispatch_tick('GBP/USD')
+    dispatcher.dispatch_execution_report(report(1))
+
+    stats = dispatcher.stats()
+    assert (stats['dropped'], stats['blocked']) == (4, 0)
+
+    app.tick_processor.release.set()
+    dispatcher.stop()
+    # the execution reports have their own thread, so only the order of the ticks is fixed
+    calls = [(kind, value) for kind, value, _ in app.tick_processor.calls]
+    assert sorted(calls) == [('report', 1), ('tick', 'EUR/USD'), ('tick', 'GBP/USD')]
+    assert calls.index(('tick', 'EUR/USD')) < calls.index(('tick', 'GBP/USD'))
+
+
+def test_sharded_dispatcher_locks_the_updates_of_a_shard():
+
+    app = stub_app()
+    dispatcher = sharded_dispatcher(app, shards=[['EUR/USD'], ['GBP/USD']], queue_size=1, 
+                                    full_policy='block')
+
+    dispatcher.dispatch_tick('EUR/USD')     # blocks the worker of shard 0 until released
+    assert app.tick_processor.entered.wait(5)
+
+    # the QuickFIX thread waits for the callback of the shard, not for the other shards
+    assert not dispatcher.locks[0].acquire(blocking=False)
+    with dispatcher.symbol_lock('GBP/USD'):
+        dispatcher.dispatch_bar('GBP/USD', '1m', None)
+        dispatcher.dispatch_bar('GBP/USD', '5m', None)  # published when the lock is released
+    app.tick_processor.release.set()
+    with dispatcher.symbol_lock('EUR/USD'):
+        pass
+
+    dispatcher.stop()
+    stats = dispatcher.stats()
+    assert stats['events_delivered'] == 3
+    assert stats['errors'] == 0
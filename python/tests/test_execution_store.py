@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    test_execution_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+import json
+
+from dwxquickfix.execution_report import execution_report
+from dwxquickfix.execution_store import execution_store
+from dwxquickfix.symbol_registry import symbol_registry
+
+
+def report(ClOrdID, side, price, status, quantity, cum_qty, time, avg_px=None):
+    return execution_report(ClOrdID, 'EUR/USD', side, price, '1' if price is None else '2', status,
+                            quantity, 0, cum_qty, quantity - cum_qty, time, avg_px)
+
+
+def test_average_fill_price_uses_AvgPx():
+
+    store = execution_store(symbol_registry())
+    store.append(report(1, '1', None, '0', 1000, 0, 1))                # market order, no Price
+    store.append(report(1, '1', None, '1', 1000, 400, 2, 1.10))
+    store.append(report(1, '1', None, '2', 1000, 1000, 3, 1.12))
+    store.append(report(2, '2', 1.19, '2', 3000, 3000, 4, 1.20))       # filled better than its Price
+
+    assert abs(store.average_fill_price()['EUR/USD'] - 1.18) < 1e-12
+    assert store.traded_volume(signed=True) == {'EUR/USD': -2000}
+
+
+def test_slices_return_reports():
+
+    store = execution_store(symbol_registry(), capacity=3)
+    for i in range(5):
+        store.append(report(i, '1', 1.1, '0', 1000, 0, i))
+
+    assert [r.ClOrdID for r in store[-2:]] == [3, 4]
+    assert [r.ClOrdID for r in store[:]] == [2, 3, 4]
+    assert store[-1].ClOrdID == 4
+
+
+def test_string_ClOrdIDs_are_separate_orders():
+
+    store = execution_store(symbol_registry())
+    store.append(report('a', '1', None, '2', 1000, 1000, 1, 1.10))
+    store.append(report('b', '1', None, '0', 1000, 0, 2))
+    store.append(report(7, '1', None, '2', 1000, 1000, 3, 1.20))
+
+    assert store.fill_rate() == {'EUR/USD': 2 / 3}
+    assert abs(store.average_fill_price()['EUR/USD'] - 1.15) < 1e-12
+    assert [r.ClOrdID for r in store[:]] == ['a', 'b', 7]
+    assert len(store.query(ClOrdID='b')['time']) == 1
+    assert len(store.query(ClOrdID='c')['time']) == 0
+
+
+def test_reports_are_json_serializable():
+
+    store = execution_store(symbol_registry())
+    store.append(report(1, '1', 1.1, '2', 1000, 1000, 1, 1.1))
+    assert json.loads(json.dumps(store[-1].__dict__))['AvgPx'] == 1.1
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+    test_history.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from time import time_ns
+
+from dwxquickfix.history import history
+
+
+def test_ticks_without_timestamp_get_the_arrival_time():
+
+    asset = history('EUR/USD', store_all_ticks='array', save_history_to_files=False)
+    start = time_ns()
+    asset._update_asset(start - 2000, 'EUR/USD', 0, 1.1, 1.2, 100000, 100000)
+    asset._update_asset(None, 'EUR/USD', 0, 1.2, 1.3, 100000, 100000)
+    asset._update_asset(time_ns() + 1000, 'EUR/USD', 0, 1.3, 1.4, 100000, 100000)
+
+    times = asset.HISTORY.column('date_time')
+    assert times[1] >= start
+    assert list(times) == sorted(times)
+    assert len(asset.ticks_between(start - 1000)['date_time']) == 2
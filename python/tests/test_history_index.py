@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+    test_history_index.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+import os
+from threading import Event, Thread
+from time import sleep
+
+import numpy as np
+
+from dwxquickfix.async_writer import async_writer
+from dwxquickfix.history_archive import history_archive
+from dwxquickfix.history_index import (csv_offset_index, read_csv_range, read_history_range, parse_csv_time,
+                                       _csv_indexes, MAX_CSV_INDEXES)
+
+
+HEADER = 'date_time,depth,bid,ask,bid_size,ask_size\n'
+
+
+def write_history(path, times):
+    with open(path, 'w') as f:
+        f.write(HEADER)
+        for i, time in enumerate(times):
+            f.write(f'{time},{i % 3},1.1,1.2,100000,100000\n')
+
+
+"""
+# the depth levels of a quote share their timestamp. with every=5, the quote at rows 4-6
+# starts before the index entry of row 5.
+"""
+def test_read_range_duplicate_times_across_index_entry(tmp_path):
+
+    path = str(tmp_path / 'EURUSD.log')
+    times = ['2021-06-01 10:00:00.000000'] * 4 + ['2021-06-01 10:00:01.000000'] * 3 + \
+            ['2021-06-01 10:00:02.000000'] * 5
+    write_history(path, times)
+
+    start = parse_csv_time(times[4].encode('utf-8') + b',')
+    end = parse_csv_time(times[-1].encode('utf-8') + b',')
+
+    index = csv_offset_index(path, every=5)
+    indexed = index.read_range(start, end)
+    scanned = read_csv_range(path, start, end)
+
+    assert len(indexed['date_time']) == 3
+    for name in scanned:
+        np.testing.assert_array_equal(indexed[name], scanned[name])
+
+
+def test_read_range_matches_scan(tmp_path):
+
+    path = str(tmp_path / 'EURUSD.log')
+    times = [f'2021-06-01 10:00:{second // 3:02d}.000000' for second in range(90)]
+    write_history(path, times)
+
+    index = csv_offset_index(path, every=4)
+    bounds = [None] + [parse_csv_time(time.encode('utf-8') + b',') for time in times[::7]]
+    for start in bounds:
+        for end in bounds:
+            indexed = index.read_range(start, end)
+            scanned = read_csv_range(path, start, end)
+            for name in scanned:
+                np.testing.assert_array_equal(indexed[name], scanned[name])
+
+
+"""
+# rows that are still queued in the async writer are visible after flush()
+"""
+def test_read_range_after_flush_with_writer(tmp_path):
+
+    gate = Event()
+    writer = async_writer()
+    archive = history_archive(str(tmp_path), 'EUR/USD', writer=writer)
+    writer.submit(gate.wait)
+
+    start = parse_csv_time(b'2021-06-01 10:00:00.000000,')
+    for i in range(10):
+        archive.write(start + i * 1000000000, 0, 1.1, 1.2, 100000, 100000)
+
+    Thread(target=lambda: (sleep(0.05), gate.set())).start()
+    archive.flush()
+    assert len(read_history_range(archive.path, start)['date_time']) == 10
+
+    archive.close()
+    writer.stop()
+
+
+def test_index_is_rebuilt_for_a_replaced_file(tmp_path):
+
+    path = str(tmp_path / 'EURUSD.log')
+    write_history(path, [f'2021-06-01 10:00:{second:02d}.000000' for second in range(40)])
+    assert len(read_history_range(path, every=4)['date_time']) == 40
+
+    # e.g. a rotated file, written again under the same name with other (shorter) rows
+    write_history(path + '.new', [f'2021-06-02 10:00:{second:02d}.000000' for second in range(30)])
+    os.replace(path + '.new', path)
+    result = read_history_range(path, every=4)
+    np.testing.assert_array_equal(result['date_time'], read_csv_range(path)['date_time'])
+
+
+def test_index_cache_is_bounded(tmp_path):
+
+    for i in range(MAX_CSV_INDEXES + 5):
+        path = str(tmp_path / f'{i}.log')
+        write_history(path, ['2021-06-01 10:00:00.000000'])
+        read_history_range(path)
+    assert len(_csv_indexes) <= MAX_CSV_INDEXES
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+    test_mass_quote.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+fix = pytest.importorskip('quickfix')
+
+from dwxquickfix.application import application
+from dwxquickfix.replay import simulated_sender
+
+
+DATA_DICTIONARY = os.path.join(os.path.dirname(__file__), '..', 'specs', 'FIX44-1.7_mod.xml')
+SYMBOLS = ['EUR/USD', 'GBP/USD', 'USD/JPY']
+
+
+class recording_processor():
+
+    def __init__(self):
+        self.ticks = []  # format: (symbol, bid, ask) when on_tick() was called
+
+    def on_tick(self, symbol, app):
+        history = app.history_dict[symbol]
+        self.ticks.append((symbol, history.BID_TOB, history.ASK_TOB))
+
+    def on_execution_report(self, report, app):
+        pass
+
+
+def build_message(fields, data_dictionary):
+
+    body = fields.replace('|', '\x01')
+    raw = f'8=FIX.4.4\x019={len(body)}\x01{body}'
+    raw += f'10={sum(raw.encode()) % 256:03d}\x01'
+    return fix.Message(raw, data_dictionary, False)
+
+
+"""
+# MassQuote with random quote sets. a symbol can have more than one set, some sets have no bid or ask. 
+"""
+def random_MassQuote(reqids, data_dictionary):
+
+    quote_sets = [random.choice(reqids) for _ in range(random.randint(1, 5))]
+    fields = f'35=i|34=1|49=XC116|52=20171208-12:43:57.593|56=Q024|296={len(quote_sets)}|'
+    for reqid in quote_sets:
+        fields += f'302={reqid}|295=1|299={random.randint(0, 2)}|'
+        fields += f'134={random.randint(1, 50) * 100000}|135={random.randint(1, 50) * 100000}|'
+        price = 1.1 + random.randint(0, 1000) * 1e-5
+        kind = random.random()
+        if kind < 0.8 or kind >= 0.9:
+            fields += f'188={price:.5f}|'
+        if kind < 0.9:
+            fields += f'190={price + random.randint(1, 20) * 1e-5:.5f}|'
+    return build_message(fields, data_dictionary)
+
+
+def mass_quote_app(fast):
+
+    app = application(None, recording_processor(), store_all_ticks='array', save_history_to_files=False,
+                      verbose=False, message_log_file='', execution_history_file='', fast_mass_quote=fast)
+    app.sender = simulated_sender(app)
+    reqids = [app.check_new_symbol(symbol) for symbol in SYMBOLS]
+    return app, reqids
+
+
+def test_fast_path_matches_parse_MassQuote(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    random.seed(16)
+    data_dictionary = fix.DataDictionary(DATA_DICTIONARY)
+
+    app, reqids = mass_quote_app(False)
+    fast_app, fast_reqids = mass_quote_app(True)
+    assert reqids == fast_reqids
+
+    for i in range(2000):
+        message = random_MassQuote(reqids, data_dictionary)
+        sending_time = 1512737037593000000 + i * 1000000
+        app.parse_MassQuote(message, sending_time)
+        fast_app.parse_MassQuote_fast(message, sending_time)
+
+    assert len(app.tick_processor.ticks) > 2000
+    assert app.tick_processor.ticks == fast_app.tick_processor.ticks
+
+    for symbol in SYMBOLS:
+        history, fast_history = app.history_dict[symbol], fast_app.history_dict[symbol]
+        for name in ('bid_price', 'ask_price', 'bid_size', 'ask_size'):
+            assert np.array_equal(getattr(history.book, name), getattr(fast_history.book, name), equal_nan=True)
+        for store, fast_store in ((history.HISTORY, fast_history.HISTORY), 
+                                  (history.HISTORY_TOB, fast_history.HISTORY_TOB)):
+            fast_columns = fast_store.columns()
+            for name, column in store.columns().items():
+                assert np.array_equal(column, fast_columns[name], equal_nan=True)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+    test_order_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from threading import Thread
+
+from dwxquickfix.order_store import order_store
+
+
+class stub_order():
+
+    def __init__(self, symbol, status='0'):
+        self.symbol = symbol
+        self.side = '1'
+        self.type = '2'
+        self.order_type = 'buy_limit'
+        self.status = status
+
+
+def test_snapshot_while_orders_change():
+
+    orders = order_store()
+    errors = []
+
+    def change():
+        for i in range(20000):
+            orders[i] = stub_order('EUR/USD')
+            orders.set_status(i, '1')
+            if i >= 50:
+                del orders[i - 50]
+
+    def iterate():
+        try:
+            while thread.is_alive():
+                for ClOrdID, order in orders.snapshot().items():
+                    assert order.symbol == 'EUR/USD'
+        except Exception as e:
+            errors.append(e)
+
+    thread = Thread(target=change)
+    thread.start()
+    iterate()
+    thread.join()
+
+    assert errors == []
+    assert len(orders) == 50
+    assert orders.count(status='1') == 50
+    assert orders.counts('symbol') == {'EUR/USD': 50}
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+    test_position_store.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from threading import Event, Thread
+from time import sleep
+
+from dwxquickfix.async_writer import async_writer
+from dwxquickfix.position_store import position_store
+
+
+def test_records_are_not_dropped_by_a_dropping_writer(tmp_path):
+
+    gate = Event()
+    writer = async_writer(queue_size=2, full_policy='drop')
+    writer.submit(gate.wait)
+    sleep(0.05)
+
+    store = position_store(str(tmp_path / 'positions'), writer, snapshot_interval=20)
+
+    def record():
+        for i in range(50):
+            store.record('position', 'EUR/USD', [i, 0])
+            store.record('order', i, {'symbol': 'EUR/USD'} if i % 2 == 0 else None)
+            if store.due():
+                store.snapshot({}, {'EUR/USD': i}, {'EUR/USD': 0})
+
+    thread = Thread(target=record)
+    thread.start()
+    sleep(0.05)
+    gate.set()
+    thread.join()
+    store.close()
+    writer.stop()
+
+    assert writer.num_dropped == 0
+    orders, positions, canceled = position_store(str(tmp_path / 'positions')).load()
+    assert orders == {}
+    assert positions == {'EUR/USD': 49} and canceled == {'EUR/USD': 0}
+
+
+def test_partial_last_record_is_removed(tmp_path):
+
+    path = str(tmp_path / 'positions')
+    store = position_store(path)
+    store.record('position', 'EUR/USD', [1000, 0])
+    store.close()
+    with open(path + '.wal', 'a') as f:
+        f.write('{"seq": 2, "op": "posi')
+
+    store = position_store(path)
+    assert store.load() == ({}, {'EUR/USD': 1000}, {'EUR/USD': 0})
+    store.record('position', 'EUR/USD', [2000, 0])
+    store.close()
+    assert position_store(path).load() == ({}, {'EUR/USD': 2000}, {'EUR/USD': 0})
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+    test_rolling_stats.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+import random
+
+import pytest
+
+from dwxquickfix.rolling_stats import rolling_stats
+
+
+"""
+# the window minimum/maximum against a scan of the ticks in the window
+"""
+def check_against_scan(mids, times, window, capacity):
+
+    stats = rolling_stats(window=window, capacity=capacity)
+    window_ns = int(window * 1e9)
+
+    for n, (time_ns, mid) in enumerate(zip(times, mids)):
+        stats.update(time_ns, mid, mid)
+
+        in_window = [m for t, m in zip(times[:n + 1], mids[:n + 1]) if t >= time_ns - window_ns][-capacity:]
+        assert stats.count == len(in_window)
+        assert stats.mid_max == max(in_window)
+        assert stats.mid_min == min(in_window)
+
+
+@pytest.mark.parametrize('mids', [[5., 4., 3., 2.], [2., 3., 4., 5.]])
+def test_min_max_at_capacity(mids):
+    check_against_scan(mids, list(range(len(mids))), window=60., capacity=3)
+
+
+@pytest.mark.parametrize('capacity', [1, 2, 3, 7, 50])
+def test_min_max_random(capacity):
+
+    rng = random.Random(capacity)
+    mids = [float(rng.randint(1, 20)) for _ in range(500)]
+    times, time_ns = [], 0
+    for _ in mids:
+        time_ns += rng.randint(0, 400_000_000)
+        times.append(time_ns)
+
+    check_against_scan(mids, times, window=2., capacity=capacity)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+    test_subscriptions.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+from dwxquickfix.subscriptions import subscription_manager
+from dwxquickfix.symbol_registry import symbol_registry
+
+
+class recording_sender():
+
+    def __init__(self):
+        self.sent = []   # format: (MDReqID, symbols, depth, subscribe)
+
+    def send_MarketDataSubscription(self, reqid, symbols, depth=0, subscribe=True):
+        self.sent.append((reqid, list(symbols), depth, subscribe))
+
+
+"""
+# the parts of the application that the subscription_manager uses
+"""
+class stub_app():
+
+    verbose = False
+
+    def __init__(self):
+        self.symbols = symbol_registry()
+        self.sender = recording_sender()
+        self._ID_Incrementor = 1
+
+    def next_MDReqID(self):
+        reqid = self._ID_Incrementor
+        self._ID_Incrementor += 1
+        return reqid
+
+    def check_new_symbol(self, symbol, reqid=None):
+        symbol_id = self.symbols.add(symbol)
+        if self.symbols.reqid(symbol_id) is None:
+            self.symbols.set_reqid(symbol_id, self.next_MDReqID())
+        return self.symbols.reqid(symbol_id)
+
+    def add_symbol_to_positions(self, symbol):
+        pass
+
+
+def test_last_symbol_of_a_batch_gets_its_own_MDReqID():
+
+    app = stub_app()
+    manager = subscription_manager(app)
+    manager.on_logon()
+
+    batch_reqid, = manager.subscribe(['EUR/USD', 'GBP/USD'], batch=True)
+    manager.unsubscribe('EUR/USD')
+
+    (reqid, (symbols, depth)), = manager.requests().items()
+    assert symbols == ['GBP/USD']
+    assert reqid != batch_reqid
+    assert app.symbols.symbol_for_reqid(reqid) == 'GBP/USD'
+    assert app.sender.sent[-2:] == [(batch_reqid, ['EUR/USD', 'GBP/USD'], 0, False),
+                                    (reqid, ['GBP/USD'], 0, True)]
+
+
+def test_requests_before_logon_are_sent_on_logon():
+
+    app = stub_app()
+    manager = subscription_manager(app)
+
+    reqids = manager.subscribe(['EUR/USD', 'GBP/USD'], depth=1)
+    assert app.sender.sent == []
+
+    manager.on_logon()
+    assert app.sender.sent == [(reqids[0], ['EUR/USD'], 1, True), (reqids[1], ['GBP/USD'], 1, True)]
+
+
+def test_mass_quotes_of_a_batch_are_reported_once(capsys):
+
+    app = stub_app()
+    manager = subscription_manager(app)
+
+    batch_reqid, = manager.subscribe(['EUR/USD', 'GBP/USD'], batch=True)
+    single_reqid, = manager.subscribe('USD/JPY')
+
+    assert manager.check_quote_set(batch_reqid)
+    assert manager.check_quote_set(batch_reqid)
+    assert not manager.check_quote_set(single_reqid)
+    assert not manager.check_quote_set('999')
+    assert capsys.readouterr().out.count('[ERROR]') == 1
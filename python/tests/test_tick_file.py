@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+    test_tick_file.py
+    @author: Darwinex Labs (www.darwinex.com), 2021-*
+"""
+
+import pytest
+
+from dwxquickfix.tick_file import tick_file_writer, read_tick_file, RECORD_TOB
+
+
+def test_reopen_and_append(tmp_path):
+
+    path = str(tmp_path / 'EURUSD_TOB.ticks')
+    for i in range(2):
+        writer = tick_file_writer(path, 'EUR/USD', RECORD_TOB)
+        writer.write(i, 1.1, 1.2)
+        writer.close()
+
+    header, records = read_tick_file(path)
+    assert header['symbol'] == 'EUR/USD'
+    assert list(records['date_time']) == [0, 1]
+
+
+def test_symbol_longer_than_the_header_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        tick_file_writer(str(tmp_path / 'LONG.ticks'), 'A' * 25, RECORD_TOB)